@@ -0,0 +1,412 @@
+# ------------------ Worker agents ------------------
+# Runs apps from this machine's launcher_config.json on behalf of another launcher,
+# so runs and fan-out items can spread over several workstations. Kept free of Qt imports:
+#   python main.py agent [--bind 0.0.0.0 --token SECRET] [--port 7821] [--slots 8]   (on each worker)
+#   python main.py nodes [--jobs]                                                    (capacity of each node)
+#   python main.py run "EVTX Parse" --remote [--node ws2] [--fanout TEMPLATE_EVTX=...]
+#
+# Nodes are listed in the launcher config. "templates" replace template values on
+# that node, "paths" rewrite path prefixes in every value sent (fan-out values and
+# per-item output directories included):
+#   "nodes": [{"name": "ws2", "host": "10.0.0.12", "port": 7821, "token": "...",
+#              "templates": {"TEMPLATE_EVTX": "/mnt/evtx"}, "paths": {"/cases": "/mnt/cases"}}]
+# A job is sent as app id plus template values; the agent resolves the command from
+# its own copy of the app, so it only ever runs apps configured on that machine:
+#   - templates in the app's path (e.g. TEMPLATE_TOOLS) always come from the agent's config,
+#   - input templates the app uses may be set by the launcher,
+#   - output templates only to a directory below the agent's own value (per-item subdirectories),
+#   - for quote_values apps (arguments are shell text) values must not carry shell syntax.
+# Anything else is refused. An agent only listens on other than a loopback address with a
+# token; the token itself never goes over the wire, requests are signed with it instead.
+# Several agents on localhost (different ports) stand in for a cluster.
+#
+# Protocol: one JSON line request per TCP connection, JSON line replies.
+#   <- {"ev": "hello", "nonce": "..."}   first, on every connection
+#   -> {"op": "info"}             <- {"node", "slots", "active", "free", "cores", "busy", "mem_avail_mb"}
+#   -> {"op": "status"}           <- {"node", "jobs": [{"job", "name", "state", "returncode", "error", "duration"}]}
+#   -> {"op": "kill", "job": 3}   <- {"ok": true}
+#   -> {"op": "run", "app": "<id>", "templates": {...}, "name": "..."}
+#   <- {"ev": "accepted", "job": 3, "argv": [...], "command": "..."}
+#   <- {"ev": "output", "data": "..."} ...
+#   <- {"ev": "exited", "state": "finished", "returncode": 0, "error": null}
+# Failures are answered with {"ev": "error", "error": "..."}. With a token (--token or
+# FCKCMD_AGENT_TOKEN) a request carries "auth": HMAC-SHA256(token, nonce + the request
+# as sorted-key JSON without "auth"), so a captured request cannot be replayed.
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from ToolWin.Core import build_command, find_app, load_config
+from ToolWin.ExecMode import local_path
+from ToolWin.Model import AppSpec
+from ToolWin.TemplateEngine import expand_templates, is_output_template, referenced_templates
+import codecs
+import hashlib
+import hmac
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+
+TOKEN_ENV = 'FCKCMD_AGENT_TOKEN'
+LABEL_BAD = re.compile(r'[^A-Za-z0-9._-]+')
+LOOPBACK = ('127.0.0.1', '::1', 'localhost')
+SHELL_SYNTAX = re.compile(r'[\'"`$;&|<>(){}%^\r\n]')
+
+
+def sign(token, nonce, msg):
+    body = json.dumps({k: v for k, v in msg.items() if k != 'auth'}, sort_keys=True)
+    return hmac.new(token.encode('utf-8'), (nonce + body).encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def remote_templates(app, templates):
+    """Template keys a launcher may set for an app: the ones it uses, except those naming the program."""
+    return referenced_templates(app, templates) - referenced_templates(AppSpec(path=app.path), templates)
+
+
+def accepted_templates(app, templates, sent):
+    """The launcher's template values for a run of app, checked against this node's templates.
+
+    Raises PermissionError for a value the launcher may not set; keys the app does not use are dropped.
+    """
+    allowed = remote_templates(app, templates)
+    used = referenced_templates(app, templates)
+    out = {}
+    for k, v in sent.items():
+        v = str(v)
+        if k not in used:
+            continue
+        if k not in allowed:
+            raise PermissionError(f'{k} names the program and is taken from this node\'s config')
+        if app.quote_values and SHELL_SYNTAX.search(v):
+            raise PermissionError(f'{k}: shell syntax in a value for an app with quote_values')
+        out[k] = v
+    expanded = expand_templates(dict(templates, **out))
+    own = expand_templates(templates)
+    for k in out:
+        if is_output_template(k):
+            # compared as the tool will see them: $Env:NAME expanded with this node's environment
+            base = os.path.realpath(local_path(own[k])) if own.get(k) else None
+            path = os.path.realpath(local_path(expanded[k]))
+            if base is None or not (path == base or path.startswith(base.rstrip(os.sep) + os.sep)):
+                raise PermissionError(f'{k} may only name a directory below {own.get(k) or "(unset here)"}')
+    return out
+
+
+# ---- agent side ----
+
+class Agent:
+    """Serves requests on an asyncio loop. Jobs go through this host's scheduler and
+    supervisor, so they are admitted against its budgets and kept in its run history."""
+    def __init__(self, name=None, slots=None, token=None, poll=AGENT_POLL_SECONDS):
+        self.name = name or socket.gethostname()
+        self.slots = slots or os.cpu_count() or 1
+        self.token = token
+        self.poll = poll
+        self.jobs = {}  # job (run) id -> Run, the latest RUN_KEEP finished ones are kept
+
+    def active(self):
+        return sum(1 for r in self.jobs.values() if not r.done.is_set())
+
+    def info(self):
+        from ToolWin.Scheduler import scheduler
+        s = scheduler().monitor.sample()
+        active = self.active()
+        return {'node': self.name, 'slots': self.slots, 'active': active, 'free': self.slots - active,
+                'cores': s['cores'], 'busy': s['busy'], 'mem_avail_mb': s['mem_avail_mb']}
+
+    def status(self):
+        return {'node': self.name, 'jobs': [{'job': r.id, 'name': r.name, 'state': r.state, 'returncode': r.returncode,
+                                             'error': r.error, 'duration': r.duration} for r in self.jobs.values()]}
+
+    def kill(self, job):
+        from ToolWin.Scheduler import scheduler
+        from ToolWin.Supervisor import supervisor
+        run = self.jobs.get(job)
+        if run is None:
+            raise KeyError(f'No job {job}')
+        if not scheduler().cancel(run):
+            supervisor().kill(run)
+        return {'ok': True}
+
+    def _prune(self):
+        done = [i for i, r in self.jobs.items() if r.done.is_set()]
+        for i in done[:max(0, len(done) - RUN_KEEP)]:
+            del self.jobs[i]
+
+    async def handle(self, reader, writer):
+        try:
+            nonce = os.urandom(16).hex()
+            await _send(writer, {'ev': 'hello', 'nonce': nonce})
+            req = json.loads(await reader.readline() or b'{}')
+            if self.token and not hmac.compare_digest(str(req.get('auth') or ''), sign(self.token, nonce, req)):
+                raise PermissionError('invalid token')
+            op = req.get('op')
+            if op == 'run':
+                await self._run(req, writer)
+            elif op == 'info':
+                await _send(writer, self.info())
+            elif op == 'status':
+                await _send(writer, self.status())
+            elif op == 'kill':
+                await _send(writer, self.kill(int(req['job'])))
+            else:
+                raise ValueError(f'Unknown op {op!r}')
+        except (KeyError, ValueError, TypeError, PermissionError) as e:
+            try:
+                await _send(writer, {'ev': 'error', 'error': str(e.args[0] if e.args else e)})
+            except ConnectionError:
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run(self, req, writer):
+        import asyncio
+        from ToolWin.ExecMode import app_plan
+        from ToolWin.History import run_meta
+        from ToolWin.Scheduler import scheduler
+        cfg = load_config()
+        app = find_app(cfg, req['app'])
+        templates = accepted_templates(app, cfg.get('templates', {}), req.get('templates') or {})
+        parts, command = build_command(app, cfg, templates)
+        p = app_plan(app, parts if parts[0] else parts[1:], batch=True)
+        peer = writer.get_extra_info('peername')
+        meta = run_meta(app, cfg, templates, source=f'agent:{peer[0]}' if peer else 'agent')
+        run = scheduler().submit(p['argv'], req.get('name') or app.get('name'), app.get('cost'), meta=meta,
+                                 command=p['command'])
+        self.jobs[run.id] = run
+        try:
+            await _send(writer, {'ev': 'accepted', 'job': run.id, 'argv': p['argv'], 'command': command})
+            # the output is streamed from the run's ring buffer; the full log stays in RUN_LOG_DIR here
+            decoder = codecs.getincrementaldecoder('utf-8')('replace')
+            sent = 0
+            while True:
+                finished = run.done.is_set()
+                data, total = run.output.since(sent)
+                if total > sent:
+                    lost = total - sent - len(data)
+                    text = (f'\n[... {lost} bytes of output not sent ...]\n' if lost else '') + decoder.decode(data)
+                    sent = total
+                    if text:
+                        await _send(writer, {'ev': 'output', 'data': text})
+                if finished:
+                    break
+                await asyncio.sleep(self.poll)
+            await _send(writer, {'ev': 'exited', 'state': run.state, 'returncode': run.returncode, 'error': run.error})
+        except ConnectionError:
+            pass  # the launcher went away: the job keeps running (see status)
+        finally:
+            self._prune()
+
+
+async def _send(writer, msg):
+    writer.write((json.dumps(msg) + '\n').encode('utf-8'))
+    await writer.drain()
+
+
+def serve_agent(bind=AGENT_BIND, port=AGENT_PORT, name=None, slots=None, token=None):
+    """Run an agent until interrupted (python main.py agent)."""
+    import asyncio
+    if bind not in LOOPBACK and not token:
+        raise ValueError(f'Refusing to listen on {bind} without a token (--token or {TOKEN_ENV}): '
+                         'anyone who can connect could run the configured apps')
+    agent = Agent(name, slots, token)
+
+    async def main():
+        server = await asyncio.start_server(agent.handle, bind, port)
+        print(f'agent {agent.name}: listening on {bind}:{port} with {agent.slots} slots', file=sys.stderr, flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# ---- launcher side ----
+
+def _read(f, node):
+    line = f.readline()
+    if not line:
+        raise ConnectionError(f'{node.name}: connection closed')
+    msg = json.loads(line)
+    if msg.get('ev') == 'error':
+        raise OSError(f"{node.name}: {msg.get('error')}")
+    return msg
+
+
+class Node:
+    """One "nodes" entry of the config."""
+    def __init__(self, spec):
+        self.host = spec.get('host') or '127.0.0.1'
+        self.port = int(spec.get('port') or AGENT_PORT)
+        self.name = spec.get('name') or f'{self.host}:{self.port}'
+        self.token = spec.get('token')
+        self.templates = spec.get('templates') or {}
+        # longest prefix first, so /cases/hostA wins over /cases
+        self.paths = sorted((spec.get('paths') or {}).items(), key=lambda kv: -len(kv[0]))
+
+    def _open(self, msg, timeout=AGENT_TIMEOUT):
+        sock = socket.create_connection((self.host, self.port), timeout)
+        f = sock.makefile('rwb')
+        try:
+            hello = _read(f, self)
+            if self.token:
+                msg = dict(msg, auth=sign(self.token, str(hello.get('nonce') or ''), msg))
+            f.write((json.dumps(msg) + '\n').encode('utf-8'))
+            f.flush()
+        except BaseException:
+            f.close()
+            sock.close()
+            raise
+        return sock, f
+
+    def call(self, msg, timeout=AGENT_TIMEOUT):
+        """Send one request and return the reply."""
+        sock, f = self._open(msg, timeout)
+        with sock, f:
+            return _read(f, self)
+
+    def map_value(self, value):
+        for src, dst in self.paths:
+            src = src.rstrip('/\\')
+            if value == src or value.startswith(src) and value[len(src)] in '/\\':
+                return dst.rstrip('/\\') + value[len(src):]
+        return value
+
+    def job_templates(self, cfg, overrides=None, app=None):
+        """Template values sent for a run: the launcher's, the node's, then the run's; paths mapped.
+
+        With app, only what the agent accepts for it: not the templates naming the program,
+        and output templates only when the run sets them (per-item directories); otherwise
+        the node writes where its own config says.
+        """
+        templates = {**cfg.get('templates', {}), **self.templates, **(overrides or {})}
+        if app is not None:
+            keys = {k for k in remote_templates(app, templates) if not is_output_template(k) or k in (overrides or {})}
+            templates = {k: v for k, v in templates.items() if k in keys}
+        return {k: self.map_value(str(v)) for k, v in templates.items()}
+
+    def start(self, app, cfg, overrides=None, name=None):
+        """Submit a run of app; returns a RemoteJob once the agent accepted it."""
+        msg = {'op': 'run', 'app': app.get('id') or app.get('name'), 'templates': self.job_templates(cfg, overrides, app),
+               'name': name}
+        sock, f = self._open(msg)
+        try:
+            accepted = _read(f, self)
+        except BaseException:
+            f.close()
+            sock.close()
+            raise
+        sock.settimeout(None)  # runs take as long as they take
+        return RemoteJob(self, sock, f, accepted)
+
+
+class RemoteJob:
+    """A run accepted by an agent; wait() follows it until it exits."""
+    def __init__(self, node, sock, f, accepted):
+        self.node = node
+        self.job = accepted['job']
+        self.argv = accepted.get('argv') or []
+        self.command = accepted.get('command') or ''
+        self._sock = sock
+        self._f = f
+
+    def wait(self, on_output=None):
+        """Block until the job exits; returns the agent's exited event."""
+        with self._sock, self._f:
+            while True:
+                ev = _read(self._f, self.node)
+                if ev.get('ev') == 'output':
+                    if on_output:
+                        on_output(ev['data'])
+                elif ev.get('ev') == 'exited':
+                    return ev
+
+    def kill(self):
+        self.node.call({'op': 'kill', 'job': self.job})
+
+
+class NodePool:
+    """The configured nodes. run() sends a job to the node with the most free slots
+    (then the most idle cores), waiting while every node is full."""
+    def __init__(self, nodes, poll=AGENT_POLL_SECONDS):
+        if not nodes:
+            raise ValueError('No worker nodes configured ("nodes" in the config)')
+        self.nodes = nodes
+        self.poll = poll
+        self._lock = threading.Lock()
+
+    def _query(self, node, op):
+        try:
+            return dict(node.call({'op': op}), name=node.name, address=f'{node.host}:{node.port}')
+        except (OSError, ValueError) as e:
+            return {'name': node.name, 'address': f'{node.host}:{node.port}', 'error': str(e)}
+
+    def status(self, op='info'):
+        """info (or status) of every node, queried in parallel; unreachable ones carry 'error'."""
+        with ThreadPoolExecutor(max_workers=len(self.nodes)) as pool:
+            return list(pool.map(lambda n: self._query(n, op), self.nodes))
+
+    def slots(self):
+        return sum(i['slots'] for i in self.status() if 'error' not in i)
+
+    def pick(self):
+        while True:
+            infos = [i for i in self.status() if 'error' not in i]
+            if not infos:
+                raise OSError('No worker node reachable')
+            best = max(infos, key=lambda i: (i['free'], i['cores'] - (i['busy'] or 0.0)))
+            if best['free'] > 0:
+                return next(n for n in self.nodes if n.name == best['name'])
+            time.sleep(self.poll)
+
+    def run(self, app, cfg, overrides=None, name=None, meta=None, on_output=None, on_start=None):
+        """Run app on the freest node and block until it exits; returns its exit code.
+
+        The output goes to a local log in RUN_LOG_DIR (and to on_output), and the run is
+        recorded in the run history with source "node:<name>". Raises OSError if no
+        node is reachable or the agent could not start it.
+        """
+        from ToolWin.History import history
+        name = name or app.get('name')
+        with self._lock:  # a job counts against its node once accepted, so picks are serialized
+            node = self.pick()
+            job = node.start(app, cfg, overrides, name)
+        if on_start:
+            on_start(node, job)
+        started = time.time()
+        meta = dict(meta or {}, source=f'node:{node.name}')
+        log = Path(RUN_LOG_DIR) / f"{time.strftime('%Y%m%d-%H%M%S')}-{LABEL_BAD.sub('_', node.name)}-{job.job}.log"
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with open(log, 'a', encoding='utf-8') as out:
+            def write(text):
+                out.write(text)
+                if on_output:
+                    on_output(text)
+            try:
+                ev = job.wait(write)
+            except OSError as e:
+                history().record(job.argv, name, meta, started, time.time(), 'error', error=str(e))
+                raise
+        history().record(job.argv, name, meta, started, time.time(), ev['state'], ev.get('returncode'), ev.get('error'))
+        if ev.get('returncode') is None:
+            raise OSError(f"{node.name}: {ev.get('error') or ev['state']}")
+        return ev['returncode']
+
+
+def node_pool(cfg, names=None):
+    """NodePool of the config's "nodes", or only those named."""
+    nodes = [Node(spec) for spec in cfg.get('nodes') or []]
+    if names:
+        known = {n.name: n for n in nodes}
+        missing = [n for n in names if n not in known]
+        if missing:
+            raise KeyError(f"No node named {missing[0]!r} (configured: {', '.join(known) or 'none'})")
+        nodes = [known[n] for n in names]
+    return NodePool(nodes)
@@ -1,113 +1,359 @@
-# ------------------ App tile widget ------------------
-from PySide6 import QtCore, QtGui, QtWidgets
-import ctypes
-from ToolWin.HelpFunction import *
-import re
-import os
-
-class AppTile(QtWidgets.QFrame):
-    def __init__(self, app_conf, cfg, parent=None):
-        super().__init__(parent)
-        self.app = app_conf
-        self.cfg = cfg
-        self.setFrameShape(QtWidgets.QFrame.StyledPanel)
-        self.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Preferred)
-        self.setMinimumSize(140, 100)
-
-        v = QtWidgets.QVBoxLayout(self)
-        h = QtWidgets.QHBoxLayout()
-
-        self.icon_lbl = QtWidgets.QLabel()
-        self.icon_lbl.setFixedSize(48, 48)
-        self.icon_lbl.setScaledContents(True)
-        self.load_icon()
-        h.addWidget(self.icon_lbl)
-
-        self.name_lbl = QtWidgets.QLabel(self.app.get('name') or os.path.basename(self.app.get('path', '')))
-        self.name_lbl.setWordWrap(True)
-        h.addWidget(self.name_lbl)
-
-        self.gear_btn = QtWidgets.QPushButton()
-        self.gear_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView))
-        self.gear_btn.setFixedSize(24, 24)
-        h.addWidget(self.gear_btn)
-
-        v.addLayout(h)
-        btn_h = QtWidgets.QHBoxLayout()
-        launch_btn = QtWidgets.QPushButton('Launch')
-        launch_btn.clicked.connect(self.on_launch)
-        btn_h.addWidget(launch_btn)
-
-        copy_btn = QtWidgets.QPushButton('Copy')
-        copy_btn.clicked.connect(self.on_copy)
-        btn_h.addWidget(copy_btn)
-
-        del_btn = QtWidgets.QPushButton('Delete')
-        del_btn.clicked.connect(self.on_delete)
-        btn_h.addWidget(del_btn)
-
-        v.addLayout(btn_h)
-
-    def load_icon(self):
-        ip = self.app.get('icon_path', '')
-        w = max(24, self.icon_lbl.width())
-        h = max(24, self.icon_lbl.height())
-        if ip and os.path.exists(ip):
-            pix = QtGui.QIcon(ip).pixmap(w, h)
-            self.icon_lbl.setPixmap(pix)
-            return
-        provider = QtWidgets.QFileIconProvider()
-        fi = QtCore.QFileInfo(self.app.get('path', ''))
-        if fi.exists():
-            icon = provider.icon(fi)
-            pix = icon.pixmap(w, h)
-            self.icon_lbl.setPixmap(pix)
-            return
-        self.icon_lbl.setPixmap(self.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon).pixmap(w, h))
-
-    def _build_args_and_command(self, reload_templates=True):
-        templates = (load_config().get('templates', {}) if reload_templates else self.cfg.get('templates', {}))
-        quote_values = bool(self.app.get('quote_values', False))
-        parts = [self.app.get('path', '')]
-        for a in self.app.get('args', []):
-            val = a.get('value', '')
-            def repl(m):
-                k = m.group(1)
-                v = str(templates.get(k, k))
-                if quote_values:
-                    v = v.replace("'", "''")
-                    return f"'{v}'"
-                return v
-            val_sub = re.sub(r"(TEMPLATE_[A-Z0-9_]+)", repl, val)
-            name = a.get('name', '')
-            if name:
-                parts.append(name)
-                if val_sub:
-                    parts.append(val_sub)
-            else:
-                if val_sub:
-                    parts.append(val_sub)
-        return parts, ' '.join(parts)
-
-    def on_launch(self):
-        parts, assembled = self._build_args_and_command(reload_templates=True)
-        if is_windows():
-            try:
-                ps_cmd = assembled.replace('"', '\"')
-                params = f'-NoExit -Command "{ps_cmd}"'
-                ctypes.windll.shell32.ShellExecuteW(None, 'runas', 'powershell.exe', params, None, 1)
-            except Exception as e:
-                QtWidgets.QMessageBox.warning(self, 'Launch failed', f'Failed to launch elevated PowerShell: {e}')
-        else:
-            launch_process(self.app.get('path'), parts[1:], self.app.get('run_as_admin', False))
-
-    def on_copy(self):
-        parts, assembled = self._build_args_and_command(reload_templates=True)
-        cb = QtWidgets.QApplication.clipboard()
-        cb.setText(assembled)
-        QtWidgets.QMessageBox.information(self, 'Copied', 'Assembled command copied to clipboard.')
-
-    def on_delete(self):
-        win = self.window()
-        if hasattr(win, 'remove_app_by_id'):
-            win.remove_app_by_id(self.app.get('id'))
+# ------------------ App tiles (model / delegate) ------------------
+from PySide6 import QtCore, QtGui, QtWidgets
+from ToolWin.HelpFunction import *
+from ToolWin.IconCache import icon_cache
+from ToolWin.Workers import resolver, stager
+from ToolWin.TemplateEngine import TemplateCycleError
+from ToolWin.Trace import traced
+
+ADD_KEY = '+'
+AppRole = QtCore.Qt.UserRole + 1
+KeyRole = QtCore.Qt.UserRole + 2
+
+BUTTON_H = 26
+MARGIN = 8
+
+
+def app_key(app, idx):
+    return app.id or f'#{idx}'
+
+
+def app_title(app):
+    return app.title
+
+
+# ------------------ Tile actions ------------------
+
+# app id -> sources pinned in the staging cache while its inputs are staged, until its run is
+# queued (which pins them itself); a new launch of the app supersedes the previous request
+_staging_holds = {}
+
+
+def _stage_inputs(app, cfg):
+    # runs on a resolver thread: returns an error text instead of raising
+    from ToolWin.Staging import stage_app
+    try:
+        stage_app(app, cfg)
+    except (OSError, ValueError) as e:
+        return str(e)
+    return None
+
+
+@traced('launch_app')
+def launch_app(app, parent=None, force=False):
+    cfg = config_store().cfg
+    if (cfg.get('staging') or {}).get('enabled') and parent is not None:
+        # copy inputs on slow storage to the local staging cache first, off the GUI thread
+        if hasattr(parent, 'statusBar'):
+            parent.statusBar().showMessage(f'Staging inputs for {app_title(app)}...')
+        from ToolWin.Staging import app_sources, pin, unpin
+        unpin(_staging_holds.pop(app.id, ()))
+        _staging_holds[app.id] = pin(app_sources(app, cfg))
+        stager().submit(parent, ('stage', app.id), _stage_inputs, (app, cfg),
+                          lambda error: _launch_staged(app, parent, force, error))
+        return
+    _launch(app, parent, force)
+
+
+def _launch_staged(app, parent, force, error):
+    from ToolWin.Staging import unpin
+    try:
+        if error:
+            QtWidgets.QMessageBox.warning(parent, 'Staging failed', f'{error}\n\nLaunching from the original location.')
+        elif hasattr(parent, 'statusBar'):
+            parent.statusBar().clearMessage()
+        _launch(app, parent, force)
+    finally:
+        unpin(_staging_holds.pop(app.id, ()))
+
+
+def _launch(app, parent=None, force=False):
+    from ToolWin.ExecMode import app_plan
+    from ToolWin.History import run_meta
+    try:
+        parts, assembled = build_command(app)
+        # the argument list itself, unless the app's exec mode asks for a shell or elevation
+        plan = app_plan(app, parts)
+    except ValueError as e:  # template cycle, unknown exec mode/shell
+        QtWidgets.QMessageBox.warning(parent, 'Launch failed', str(e))
+        return
+    launch_process(app.path, parts[1:], cost=app.cost, incremental=app if app.incremental else None,
+                   force=force, meta=run_meta(app, config_store().cfg, source='gui'), plan=plan, name=app_title(app))
+
+
+def copy_command(app, parent=None):
+    try:
+        parts, assembled = build_command(app)
+    except TemplateCycleError as e:
+        QtWidgets.QMessageBox.warning(parent, 'Copy failed', str(e))
+        return
+    cb = QtWidgets.QApplication.clipboard()
+    cb.setText(assembled)
+    QtWidgets.QMessageBox.information(parent, 'Copied', 'Assembled command copied to clipboard.')
+
+
+# ------------------ Model ------------------
+
+class AppListModel(QtCore.QAbstractListModel):
+    """Apps as a flat list model; row 0 is the '+' (add app) tile.
+
+    Icons are fetched on demand: only rows the view actually paints ask for
+    their DecorationRole, which returns a placeholder and resolves the real
+    icon in the background.
+
+    set_filter() restricts (and orders) the rows to a list of app keys, e.g.
+    ranked search hits; the '+' tile is hidden while a filter is active.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._apps = []
+        self._keys = []
+        self._pos = {}      # key -> index into _apps
+        self._view = []     # indexes into _apps, in display order
+        self._rows = {}     # key -> row
+        self._filter = None
+        self._count = 1
+        self._icons = {}    # key -> QPixmap at icon_px
+        self._requested = set()
+        self.icon_px = 48
+
+    @property
+    def _offset(self):
+        return 0 if self._filter is not None else 1
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        row = index.row() - self._offset
+        if row < 0:
+            if role == QtCore.Qt.DisplayRole:
+                return '+'
+            if role == KeyRole:
+                return ADD_KEY
+            if role == QtCore.Qt.ToolTipRole:
+                return 'Add app'
+            return None
+        i = self._view[row]
+        app = self._apps[i]
+        if role == QtCore.Qt.DisplayRole:
+            return app_title(app)
+        if role == QtCore.Qt.DecorationRole:
+            return self._icon(i)
+        if role == QtCore.Qt.ToolTipRole:
+            # resolved command on hover; cheap thanks to the engine cache
+            try:
+                return build_command(app)[1]
+            except TemplateCycleError as e:
+                return str(e)
+        if role == AppRole:
+            return app
+        if role == KeyRole:
+            return self._keys[i]
+        return None
+
+    def index_of(self, key):
+        row = self._rows.get(key)
+        return self.index(row) if row is not None else QtCore.QModelIndex()
+
+    def set_apps(self, apps):
+        """Diff against the current apps: patch changed rows in place, reset only if rows moved."""
+        keys = [app_key(a, i) for i, a in enumerate(apps)]
+        if keys == self._keys:
+            old = self._apps
+            self._apps = list(apps)
+            for i, (a, b) in enumerate(zip(old, apps)):
+                if a is not b and a != b:
+                    if (a.icon_path, a.path) != (b.icon_path, b.path):
+                        self._forget_icon(keys[i])
+                    row = self._rows.get(keys[i])
+                    if row is not None:
+                        idx = self.index(row)
+                        self.dataChanged.emit(idx, idx)
+            return
+        gone = set(self._keys) - set(keys)
+        self.beginResetModel()
+        for k in gone:
+            self._forget_icon(k)
+        self._apps = list(apps)
+        self._keys = keys
+        self._pos = {k: i for i, k in enumerate(keys)}
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter(self, keys):
+        """Show only these app keys, in this order (None shows everything)."""
+        if keys == self._filter:
+            return
+        self.beginResetModel()
+        self._filter = list(keys) if keys is not None else None
+        self._apply_filter()
+        self.endResetModel()
+
+    def _apply_filter(self):
+        if self._filter is None:
+            self._view = list(range(len(self._apps)))
+        else:
+            self._view = [self._pos[k] for k in self._filter if k in self._pos]
+        off = self._offset
+        self._rows = {self._keys[i]: row + off for row, i in enumerate(self._view)}
+        self._count = len(self._view) + off
+
+    def set_icon_px(self, px):
+        if px == self.icon_px:
+            return
+        self.icon_px = px
+        self._icons.clear()
+        self._requested.clear()
+        resolver().cancel(self)
+        if self._view:
+            self.dataChanged.emit(self.index(0), self.index(self.rowCount() - 1), [QtCore.Qt.DecorationRole])
+
+    def _forget_icon(self, key):
+        self._icons.pop(key, None)
+        self._requested.discard(key)
+        resolver().cancel(self, key)
+
+    def _icon(self, i):
+        key = self._keys[i]
+        pix = self._icons.get(key)
+        if key not in self._requested:
+            self._requested.add(key)
+            app = self._apps[i]
+            ip, path, px = app.icon_path, app.path, self.icon_px
+            cache = icon_cache()
+            pix = cache.peek(ip, px) or cache.peek(path, px) or pix
+            if pix is None:
+                pix = self._placeholder(px)
+            self._icons[key] = pix
+            resolver().submit(self, key, cache.resolve, ([(ip, 'image'), (path, 'exe')], px),
+                              lambda result, k=key, p=px: self._on_icon_resolved(k, p, result))
+        return pix
+
+    def _on_icon_resolved(self, key, px, result):
+        if px != self.icon_px or key not in self._pos:
+            return
+        pix = None
+        if isinstance(result, tuple):
+            k, kind, img, fresh = result
+            pix = icon_cache().finish(k, img, kind, fresh)
+        self._icons[key] = pix or self._placeholder(px)
+        row = self._rows.get(key)
+        if row is not None:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [QtCore.Qt.DecorationRole])
+
+    @staticmethod
+    def _placeholder(px):
+        return QtWidgets.QApplication.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon).pixmap(px, px)
+
+
+# ------------------ Delegate ------------------
+
+class AppTileDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints a tile (icon, name, edit gear, Launch/Copy/Delete buttons) without any child widgets.
+
+    Clicks on the painted buttons are reported through `action(name, index)`
+    with name in add/launch/copy/edit/delete.
+    """
+    action = QtCore.Signal(str, QtCore.QModelIndex)
+
+    BUTTONS = (('launch', 'Launch'), ('copy', 'Copy'), ('delete', 'Delete'))
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.icon_px = 48
+        self._pressed = None
+
+    @staticmethod
+    def tile_height(px):
+        return MARGIN + max(px, 24) + MARGIN + BUTTON_H + MARGIN + 6
+
+    def sizeHint(self, option, index):
+        view = option.widget
+        if view is not None and view.gridSize().isValid():
+            return view.gridSize() - QtCore.QSize(6, 6)
+        return QtCore.QSize(DESIRED_TILE_WIDTH - 6, self.tile_height(self.icon_px))
+
+    def layout(self, rect):
+        r = rect.adjusted(3, 3, -3, -3)
+        px = self.icon_px
+        icon = QtCore.QRect(r.left() + MARGIN, r.top() + MARGIN, px, px)
+        gear = QtCore.QRect(r.right() - MARGIN - 24, r.top() + MARGIN, 24, 24)
+        name = QtCore.QRect(icon.right() + MARGIN, icon.top(), gear.left() - icon.right() - 2 * MARGIN, max(px, 24))
+        btn_w = (r.width() - 2 * MARGIN - 2 * 4) // 3
+        top = r.bottom() - MARGIN - BUTTON_H
+        buttons = {}
+        for i, (key, _) in enumerate(self.BUTTONS):
+            buttons[key] = QtCore.QRect(r.left() + MARGIN + i * (btn_w + 4), top, btn_w, BUTTON_H)
+        return r, icon, gear, name, buttons
+
+    def paint(self, painter, option, index):
+        view = option.widget
+        style = view.style() if view is not None else QtWidgets.QApplication.style()
+        painter.save()
+        r, icon_r, gear_r, name_r, buttons = self.layout(option.rect)
+        hovered = bool(option.state & QtWidgets.QStyle.State_MouseOver)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(option.palette.color(QtGui.QPalette.Mid))
+        painter.setBrush(option.palette.color(QtGui.QPalette.Midlight if hovered else QtGui.QPalette.Button))
+        painter.drawRoundedRect(r, 4, 4)
+        mouse = view.viewport().mapFromGlobal(QtGui.QCursor.pos()) if view is not None else QtCore.QPoint(-1, -1)
+
+        if index.data(KeyRole) == ADD_KEY:
+            self._button(painter, style, view, r.adjusted(MARGIN, MARGIN, -MARGIN, -MARGIN), '+', mouse, 'add', index)
+            painter.restore()
+            return
+
+        pix = index.data(QtCore.Qt.DecorationRole)
+        if pix is not None:
+            painter.drawPixmap(icon_r, pix)
+        painter.setPen(option.palette.color(QtGui.QPalette.ButtonText))
+        painter.drawText(name_r, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter | QtCore.Qt.TextWordWrap, index.data(QtCore.Qt.DisplayRole))
+        self._button(painter, style, view, gear_r, '', mouse, 'edit', index,
+                     icon=style.standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView))
+        for key, text in self.BUTTONS:
+            self._button(painter, style, view, buttons[key], text, mouse, key, index)
+        painter.restore()
+
+    def _button(self, painter, style, view, rect, text, mouse, key, index, icon=None):
+        opt = QtWidgets.QStyleOptionButton()
+        opt.rect = rect
+        opt.text = text
+        opt.state = QtWidgets.QStyle.State_Enabled | QtWidgets.QStyle.State_Raised
+        if rect.contains(mouse):
+            opt.state |= QtWidgets.QStyle.State_MouseOver
+            if self._pressed == (key, QtCore.QPersistentModelIndex(index)):
+                opt.state |= QtWidgets.QStyle.State_Sunken
+        if icon is not None:
+            opt.icon = icon
+            opt.iconSize = QtCore.QSize(16, 16)
+        style.drawControl(QtWidgets.QStyle.CE_PushButton, opt, painter, view)
+
+    def hit(self, rect, index, pos):
+        r, icon_r, gear_r, name_r, buttons = self.layout(rect)
+        if index.data(KeyRole) == ADD_KEY:
+            return 'add' if r.contains(pos) else None
+        if gear_r.contains(pos):
+            return 'edit'
+        for key, b in buttons.items():
+            if b.contains(pos):
+                return key
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        t = event.type()
+        if t in (QtCore.QEvent.MouseButtonPress, QtCore.QEvent.MouseButtonRelease) and event.button() == QtCore.Qt.LeftButton:
+            key = self.hit(option.rect, index, event.position().toPoint())
+            if t == QtCore.QEvent.MouseButtonPress:
+                self._pressed = (key, QtCore.QPersistentModelIndex(index)) if key else None
+            else:
+                pressed, self._pressed = self._pressed, None
+                if key and pressed == (key, QtCore.QPersistentModelIndex(index)):
+                    self.action.emit(key, index)
+            if option.widget is not None:
+                option.widget.viewport().update(option.rect)
+            return key is not None
+        if t == QtCore.QEvent.MouseMove and option.widget is not None:
+            option.widget.viewport().update(option.rect)
+        return False
@@ -0,0 +1,316 @@
+# ------------------ Headless CLI ------------------
+# python main.py list | show-command <app> | run <app> [--set TEMPLATE_X=...] [--fanout TEMPLATE_X=glob] | pipeline <name>
+#                | hash [TEMPLATE_X ...] | timeline [--app <app> ...] [--input CSV ...] | stage [TEMPLATE_X ...]
+#                | history [--app <app>] [--days N] [--recent N] | agent [--port N] | nodes [--jobs]
+#                | watch <app-or-pipeline> [--template TEMPLATE_X ...] [--pattern GLOB ...] [--settle S]
+# Never imports Qt.
+from ToolWin.Core import *
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog='main.py', description='Run configured tools without the GUI.')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('list', help='list configured apps')
+
+    for name, text in (('show-command', 'print the resolved command'), ('run', 'run an app and wait for it')):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('app', help='app name or id')
+        p.add_argument('--set', dest='overrides', action='append', default=[], metavar='TEMPLATE_X=VALUE',
+                       help='override a template value (repeatable)')
+        if name == 'run':
+            p.add_argument('--fanout', action='append', default=[], metavar='TEMPLATE_X=VALUE_OR_GLOB',
+                           help='run once per value; repeat a template to add values, several templates form a matrix')
+            p.add_argument('--workers', type=int, default=None, help='max concurrent fan-out runs')
+            p.add_argument('--retries', type=int, default=None, help='extra attempts for a fan-out run exiting non-zero')
+            p.add_argument('--force', action='store_true', help='run even if an incremental app is up to date')
+            p.add_argument('--remote', action='store_true', help='run on the configured worker nodes (see nodes)')
+            p.add_argument('--node', dest='nodes', action='append', default=[], metavar='NAME',
+                           help='run on this node (repeatable, implies --remote)')
+
+    p = sub.add_parser('pipeline', help='run a configured pipeline')
+    p.add_argument('pipeline', help='pipeline name or id')
+    p.add_argument('--workers', type=int, default=None, help='max concurrent stages')
+    p.add_argument('--force', action='store_true', help='run incremental stages even when up to date')
+
+    p = sub.add_parser('hash', help='hash the evidence templates point at and write a manifest')
+    p.add_argument('templates', nargs='*', metavar='TEMPLATE_X', help='templates to hash (default: all but output templates)')
+    p.add_argument('--out', default=None, help='manifest directory (default: TEMPLATE_OUTPUT_DIR)')
+    p.add_argument('--workers', type=int, default=None, help='hashing processes')
+
+    p = sub.add_parser('timeline', help="merge tools' CSV outputs into one time-sorted timeline")
+    p.add_argument('--app', dest='apps', action='append', default=[], help="app whose output CSVs to merge (repeatable)")
+    p.add_argument('--input', dest='inputs', action='append', default=[], help='CSV file or glob (repeatable)')
+    p.add_argument('--out', default=None, help='timeline file (default: TEMPLATE_OUTPUT_DIR/timeline.csv)')
+
+    p = sub.add_parser('stage', help='copy inputs to the local staging cache')
+    p.add_argument('templates', nargs='*', metavar='TEMPLATE_X', help='templates to stage (default: staging.templates)')
+
+    p = sub.add_parser('history', help='per-app run durations (p50/p95), failure rate and resource use')
+    p.add_argument('--app', default=None, help='only this app (name or id)')
+    p.add_argument('--days', type=float, default=None, help='only runs of the last N days')
+    p.add_argument('--recent', type=int, default=0, metavar='N', help='also list the N latest runs')
+
+    p = sub.add_parser('agent', help="run configured apps on request of other launchers (worker node)")
+    p.add_argument('--bind', default=AGENT_BIND,
+                   help=f'address to listen on (default {AGENT_BIND}; any other than loopback needs a token)')
+    p.add_argument('--port', type=int, default=AGENT_PORT, help=f'port (default {AGENT_PORT})')
+    p.add_argument('--slots', type=int, default=None, help='runs offered to launchers at once (default: cores)')
+    p.add_argument('--name', default=None, help='node name (default: host name)')
+    p.add_argument('--token', default=None, help='shared secret requests are signed with (default: $FCKCMD_AGENT_TOKEN)')
+
+    p = sub.add_parser('nodes', help='free capacity of the configured worker nodes')
+    p.add_argument('--jobs', action='store_true', help="also list each node's recent jobs")
+
+    p = sub.add_parser('watch', help='run an app or pipeline on each batch of newly arrived input files')
+    p.add_argument('target', help='app or pipeline name or id')
+    p.add_argument('--template', dest='templates', action='append', default=[], metavar='TEMPLATE_X',
+                   help='watch this template\'s directory (repeatable; default: all input directories)')
+    p.add_argument('--pattern', dest='patterns', action='append', default=[], metavar='GLOB',
+                   help='only files matching this name pattern (repeatable, e.g. "*.evtx")')
+    p.add_argument('--settle', type=float, default=None, help=f'seconds without changes before a batch runs (default {WATCH_SETTLE_SECONDS})')
+    p.add_argument('--interval', type=float, default=WATCH_POLL_SECONDS, help='seconds between directory scans')
+    p.add_argument('--once', action='store_true', help='process what is new now as one batch and exit')
+    p.add_argument('--skip-existing', action='store_true', help='mark the files there now as processed first')
+    p.add_argument('--reset', action='store_true', help='forget which files were processed for this target')
+    return ap
+
+
+def cmd_list(ns, cfg):
+    for a in cfg.get('apps', []):
+        print(f"{a.get('id', '')}\t{a.get('name', '')}")
+    return 0
+
+
+def _resolve(ns, cfg):
+    app = find_app(cfg, ns.app)
+    return build_command(app, cfg, parse_overrides(ns.overrides))
+
+
+def cmd_show_command(ns, cfg):
+    print(_resolve(ns, cfg)[1])
+    return 0
+
+
+def cmd_run(ns, cfg):
+    if ns.fanout:
+        return cmd_fanout(ns, cfg)
+    if ns.remote or ns.nodes:
+        return cmd_remote(ns, cfg)
+    from ToolWin.ExecMode import app_plan
+    from ToolWin.History import history, run_meta
+    from ToolWin.RunCache import run_incremental
+    app = find_app(cfg, ns.app)
+    overrides = parse_overrides(ns.overrides)
+    if (cfg.get('staging') or {}).get('enabled'):
+        from ToolWin.Staging import stage_app
+        stage_app(app, cfg, _staging_progress)
+        print(file=sys.stderr)
+    parts, _ = build_command(app, cfg, overrides)
+    argv = parts if parts[0] else parts[1:]
+    meta = run_meta(app, cfg, overrides, source='cli')
+    plan = app_plan(app, argv, batch=True)
+
+    def call():
+        # like subprocess.call, but sampled and recorded in the run history
+        started = time.time()
+        cmd = plan['command'] if plan['command'] is not None else plan['argv']
+        with subprocess.Popen(cmd, shell=plan['command'] is not None) as proc:
+            try:
+                return history().watch(proc, plan['argv'], started, app.get('name'), meta)
+            except BaseException:
+                proc.kill()
+                raise
+
+    try:
+        code, cached = run_incremental(app, cfg, argv, call, overrides, force=ns.force, meta=meta)
+        if cached:
+            print(f"{app.get('name')}: up to date (use --force to run anyway)")
+        return code
+    except OSError as e:
+        print(f'Failed to launch: {e}', file=sys.stderr)
+        return 127
+
+
+def cmd_remote(ns, cfg):
+    from ToolWin.Agent import node_pool
+    from ToolWin.History import run_meta
+    app = find_app(cfg, ns.app)
+    overrides = parse_overrides(ns.overrides)
+    pool = node_pool(cfg, ns.nodes)
+    return pool.run(app, cfg, overrides, meta=run_meta(app, cfg, overrides, source='cli'),
+                    on_output=lambda text: print(text, end='', flush=True),
+                    on_start=lambda node, job: print(f'[{node.name}] job {job.job}: {job.command}', file=sys.stderr,
+                                                     flush=True))
+
+
+def _staging_progress(key, done, total):
+    print(f'\rstaging {key}: {done / 1e6:.0f}/{total / 1e6:.0f} MB', end='', file=sys.stderr, flush=True)
+
+
+def cmd_stage(ns, cfg):
+    from ToolWin.Staging import stage_templates, enabled
+    staged = stage_templates(cfg, ns.templates, _staging_progress)
+    print(file=sys.stderr)
+    for k, v in staged.items():
+        print(f'{k}\t{v}')
+    if not enabled(cfg):
+        print('Note: staging is not enabled in the config, so apps still read the original paths.', file=sys.stderr)
+    return 0
+
+
+def cmd_fanout(ns, cfg):
+    from ToolWin import FanOut
+    app = find_app(cfg, ns.app)
+    fanout = {}
+    for pair in ns.fanout:
+        key, value = next(iter(parse_overrides([pair]).items()))
+        fanout.setdefault(key, []).append(value)
+    # --set values apply to every item, fan-out values win
+    base = dict(cfg, templates=dict(cfg.get('templates', {}), **parse_overrides(ns.overrides)))
+    items, outputs = FanOut.build_matrix(app, base, fanout)
+    nodes = None
+    if ns.remote or ns.nodes:
+        from ToolWin.Agent import node_pool
+        nodes = node_pool(cfg, ns.nodes)
+    print(f'{len(items)} runs, output templates made unique: {", ".join(outputs) or "none"}', flush=True)
+
+    def on_event(label, state, info):
+        if state in ('started', 'retry', 'dispatched'):
+            print(f'[{state}] {label}: {info}', flush=True)
+        else:
+            print(f'[{state}] {label}' + (' (up to date)' if info.get('cached') else f" (exit {info['returncode']})"
+                                          if 'returncode' in info else f": {info.get('error')}"), flush=True)
+
+    workers = ns.workers or (nodes.slots() if nodes else None)
+    runner = FanOut.FanOutRunner(app, base, items, outputs, max_workers=workers, retries=ns.retries, on_event=on_event,
+                                 force=ns.force, nodes=nodes)
+    results = runner.run()
+    print(FanOut.summary(results, runner.elapsed))
+    return 0 if all(r['state'] == 'finished' for r in results.values()) else 1
+
+
+def cmd_pipeline(ns, cfg):
+    from ToolWin import Pipeline
+    argv = [ns.pipeline] + (['--workers', str(ns.workers)] if ns.workers else []) + (['--force'] if ns.force else [])
+    return Pipeline.main(argv)
+
+
+def cmd_hash(ns, cfg):
+    from ToolWin import EvidenceHash
+
+    def on_progress(files, total, done, size):
+        print(f'\r{files}/{total} files, {done / 1e6:.0f}/{size / 1e6:.0f} MB', end='', file=sys.stderr, flush=True)
+
+    rows, manifest = EvidenceHash.run_hash_stage(cfg, ns.templates, ns.out, ns.workers, on_progress)
+    print(file=sys.stderr)
+    for r in rows:
+        print(f"{r['sha256'] if not r['error'] else 'ERROR ' + r['error']}  {r['path']}")
+    print(EvidenceHash.summary(rows) + (f'\nManifest: {manifest}' if manifest else
+                                         '\nNo --out and TEMPLATE_OUTPUT_DIR is not an existing directory: '
+                                         'manifest not written'))
+    if not rows:
+        print('No evidence found', file=sys.stderr)
+    return 1 if not rows or any(r['error'] for r in rows) else 0
+
+
+def cmd_timeline(ns, cfg):
+    from ToolWin import Timeline
+    stage = {'apps': [find_app(cfg, a).get('id') for a in ns.apps], 'inputs': ns.inputs, 'output': ns.out}
+    code, detail = Timeline.timeline_stage(stage, cfg, lambda text: print(f'\r{text}', end='', file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    print(detail)
+    return code
+
+
+def cmd_history(ns, cfg):
+    from ToolWin.History import history, format_stats, fmt_kb, fmt_seconds
+    app_id = find_app(cfg, ns.app).get('id') if ns.app else None
+    since = time.time() - ns.days * 86400 if ns.days else None
+    print(format_stats(history().app_stats(since, app_id)))
+    for r in history().recent(ns.recent, app_id) if ns.recent else []:
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['started']))
+        print(f"{stamp}  {r['state']:<9} {fmt_seconds(r['duration']):>8} {fmt_kb(r['peak_rss_kb']):>9}  {r['name']}")
+    return 0
+
+
+def cmd_watch(ns, cfg):
+    from ToolWin.Watch import Watcher, find_target
+
+    def on_event(state, info):
+        if state == 'dirs':
+            return
+        if state == 'pending':
+            print(f'{info} new file(s) waiting to settle', file=sys.stderr, flush=True)
+        elif state == 'batch':
+            print(f"[batch] {info['label']}: {info['files']} file(s) in {info['dir']}", flush=True)
+        elif state == 'error':
+            print(f'[error] {info}', file=sys.stderr, flush=True)
+        else:
+            print(f"[{state}] {info['label']}" + (f" (exit {info['returncode']})" if info['returncode'] is not None
+                                                  else f": {info.get('error')}") + f" in {info['duration']:.1f}s", flush=True)
+
+    kind, target = find_target(cfg, ns.target)
+    watcher = Watcher(kind, target, cfg, ns.templates, ns.patterns, ns.settle, ns.interval, on_event)
+    if ns.reset:
+        watcher.index.reset(watcher.key)
+    if ns.skip_existing:
+        print(f'{watcher.mark_existing()} existing file(s) marked as processed', file=sys.stderr)
+    if ns.once:
+        res = watcher.run_once()
+        if res is None:
+            print('Nothing new.')
+        return 0 if res is None or res['returncode'] == 0 else 1
+    print(f"Watching {', '.join(f'{k}={d}' for k, d in watcher.dirs.items())} for {' '.join(watcher.patterns)} "
+          f"(settle {watcher.settle:g}s, Ctrl+C to stop)", file=sys.stderr, flush=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_agent(ns, cfg):
+    from ToolWin.Agent import serve_agent, TOKEN_ENV
+    return serve_agent(ns.bind, ns.port, ns.name, ns.slots, ns.token or os.environ.get(TOKEN_ENV))
+
+
+def cmd_nodes(ns, cfg):
+    from ToolWin.Agent import node_pool
+    pool = node_pool(cfg)
+    print(f"{'node':<20} {'address':<22} {'free':>9} {'load':>10} {'mem free':>9}")
+    for i in pool.status():
+        if 'error' in i:
+            print(f"{i['name'][:20]:<20} {i['address']:<22} {i['error']}")
+            continue
+        load = f"{i['busy']:.1f}/{i['cores']}" if i['busy'] is not None else f"-/{i['cores']}"
+        mem = f"{i['mem_avail_mb'] / 1024:.1f} GB" if i['mem_avail_mb'] is not None else '-'
+        free = f"{i['free']}/{i['slots']}"
+        print(f"{i['name'][:20]:<20} {i['address']:<22} {free:>9} {load:>10} {mem:>9}")
+    for i in pool.status('status') if ns.jobs else []:
+        for j in i.get('jobs', []):
+            code = '' if j['returncode'] is None else f" exit {j['returncode']}"
+            print(f"  {i['name']} job {j['job']}: {j['state']}{code}  {j['name']}")
+    return 0
+
+
+COMMANDS = {'list': cmd_list, 'show-command': cmd_show_command, 'run': cmd_run, 'pipeline': cmd_pipeline, 'hash': cmd_hash, 'timeline': cmd_timeline, 'stage': cmd_stage, 'history': cmd_history,
+            'agent': cmd_agent, 'nodes': cmd_nodes, 'watch': cmd_watch}
+
+
+def main(argv=None):
+    ns = build_parser().parse_args(argv)
+    cfg = load_config()
+    try:
+        return COMMANDS[ns.command](ns, cfg)
+    except (KeyError, ValueError) as e:
+        print(e.args[0] if e.args else e, file=sys.stderr)
+        return 2
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
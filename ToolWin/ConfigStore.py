@@ -0,0 +1,289 @@
+# ------------------ Config store ------------------
+# Kept free of Qt imports so it can be used by headless code.
+from config import *
+from ToolWin.Model import AppList, ConfigError, TemplateSet, as_app, json_default, load_model
+from ToolWin.Trace import traced
+import json
+import os
+import shutil
+import threading
+
+
+def default_config():
+    return {'apps': AppList(), 'templates': TemplateSet()}
+
+
+def apply_op(cfg, op):
+    """Apply one journal entry to a loaded config (see ToolWin.Model.load_model) in place."""
+    kind = op.get('op')
+    if kind in ('add_app', 'update_app'):
+        cfg['apps'].put(as_app(op['app']))
+    elif kind == 'delete_app':
+        cfg['apps'].remove_id(op.get('id'))
+    elif kind == 'set_template':
+        cfg['templates'][op['key']] = op.get('value', '')
+    elif kind == 'delete_template':
+        cfg['templates'].pop(op.get('key'), None)
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file next to `path`, fsync it and rename it over `path`."""
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ConfigStore:
+    """Owns the parsed launcher config, apps and templates loaded into ToolWin.Model records.
+
+    The file is only re-read when its (mtime, size) signature changes; callers
+    trigger that check with refresh() (e.g. from a file watcher). Every change
+    bumps `version` and notifies subscribers with (cfg, version);
+    `templates_version` only moves when the templates themselves change.
+
+    Single edits (add/update/delete app, set template) are appended to an
+    append-only journal next to the config and replayed on load. Once the
+    journal grows past JOURNAL_COMPACT_BYTES it is compacted into the main
+    JSON in a background thread (write to temp, then rename), so a crash never
+    leaves a half-written config behind.
+    """
+    def __init__(self, path=CONFIG_FILE, journal_path=None, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = Path(path)
+        self.journal_path = Path(journal_path) if journal_path else self.path.with_suffix('.journal')
+        self.compact_bytes = compact_bytes
+        self.cfg = default_config()
+        self.version = 0
+        self.templates_version = 0
+        self._templates_seen = None
+        self.load_error = None
+        self.compact_error = None
+        self._sig = None
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._compactor = None
+
+    def _stat_sig(self):
+        sig = []
+        for p in (self.path, self.journal_path):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    @traced('ConfigStore.refresh')
+    def refresh(self):
+        """Re-read the file (and replay the journal) if either changed on disk.
+
+        Returns True if the config changed.
+        """
+        with self._lock:
+            sig = self._stat_sig()
+            if sig == self._sig and self.version:
+                return False
+            self._sig = sig
+            cfg = default_config()
+            self.load_error = None
+            if sig[0] is not None:
+                problems = []
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        cfg = load_model(json.load(f), problems)
+                    if problems:
+                        self.load_error = ConfigError(f"{len(problems)} entr{'y' if len(problems) == 1 else 'ies'} "
+                                                      f"skipped: {'; '.join(problems)}")
+                except Exception as e:
+                    self.load_error = e
+                if self.load_error is not None:
+                    # nothing is written while the file is not fully read (see _check_writable),
+                    # and a copy is kept in case it gets replaced by hand
+                    try:
+                        shutil.copy2(self.path, self.path.with_name(self.path.name + '.corrupt'))
+                    except OSError:
+                        pass
+            pending = self._replay(cfg)
+            if self.version and cfg == self.cfg:
+                return False
+        self._set(cfg)
+        if pending and self.load_error is None:
+            self.compact_async()
+        return True
+
+    def _replay(self, cfg):
+        """Replay journal entries into cfg; returns the number applied."""
+        n = 0
+        good = 0
+        try:
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        op = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        # torn write from a crash: cut it off so later appends stay readable
+                        with open(self.journal_path, 'r+b') as jf:
+                            jf.truncate(good)
+                        self._sig = self._stat_sig()
+                        break
+                    try:
+                        apply_op(cfg, op)
+                    except (ConfigError, KeyError):
+                        pass  # an entry that does not validate is skipped (and gone after the next compaction)
+                    good += len(line)
+                    n += 1
+        except OSError:
+            pass
+        return n
+
+    # ---- edits ----
+    def add_app(self, app):
+        self._commit({'op': 'add_app', 'app': as_app(app)})
+
+    def update_app(self, app):
+        self._commit({'op': 'update_app', 'app': as_app(app)})
+
+    def delete_app(self, app_id):
+        self._commit({'op': 'delete_app', 'id': app_id})
+
+    def set_template(self, key, value):
+        self._commit({'op': 'set_template', 'key': key, 'value': value})
+
+    def delete_template(self, key):
+        self._commit({'op': 'delete_template', 'key': key})
+
+    def set_templates(self, templates):
+        """Journal only the template keys that differ from the current ones."""
+        cur = self.cfg.get('templates', {})
+        ops = [{'op': 'delete_template', 'key': k} for k in cur if k not in templates]
+        ops += [{'op': 'set_template', 'key': k, 'value': v} for k, v in templates.items() if cur.get(k) != v]
+        if ops:
+            self._commit(*ops)
+
+    def _check_writable(self):
+        if self.load_error is not None:
+            raise ConfigError(f'{self.path.name} was not read completely ({self.load_error}); '
+                              'fix or restore it before making changes')
+
+    def _commit(self, *ops):
+        with self._lock:
+            self._check_writable()
+            data = ''.join(json.dumps(op, ensure_ascii=False, default=json_default) + '\n' for op in ops)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            for op in ops:
+                apply_op(self.cfg, op)
+            self._sig = self._stat_sig()
+            journal_size = self._sig[1][1] if self._sig[1] else 0
+        self._set(self.cfg)
+        if journal_size > self.compact_bytes:
+            self.compact_async()
+
+    def save(self, cfg):
+        """Replace the whole config (import, clear) with an atomic rewrite; raises ConfigError if it is not valid."""
+        cfg = load_model(cfg)
+        with self._lock:
+            self._check_writable()
+            atomic_write_json(self.path, cfg)
+            self._truncate_journal(None)
+            self._sig = self._stat_sig()
+        self._set(cfg)
+
+    # ---- compaction ----
+    def compact(self):
+        """Fold the journal into the main JSON file (not while the file was not read completely)."""
+        with self._lock:
+            if self.load_error is not None:
+                return
+            try:
+                upto = os.path.getsize(self.journal_path)
+            except OSError:
+                return
+            text = json.dumps(self.cfg, ensure_ascii=False, indent=2, default=json_default)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            os.replace(tmp, self.path)
+            self._truncate_journal(upto)
+            self._sig = self._stat_sig()
+
+    def compact_async(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact_quietly, name='config-compact', daemon=True)
+        self._compactor.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            # the journal is still intact; the next compaction retries
+            self.compact_error = e
+
+    def close(self):
+        """Wait for a running compaction and fold any remaining journal entries."""
+        if self._compactor is not None:
+            self._compactor.join()
+        if os.path.exists(self.journal_path):
+            self.compact()
+
+    def _truncate_journal(self, upto):
+        """Drop the first `upto` bytes of the journal (all of it if None)."""
+        rest = ''
+        if upto is not None:
+            try:
+                with open(self.journal_path, 'r', encoding='utf-8') as f:
+                    f.seek(upto)
+                    rest = f.read()
+            except OSError:
+                pass
+        if rest:
+            tmp = self.journal_path.with_name(self.journal_path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(rest)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal_path)
+        else:
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+
+    def _set(self, cfg):
+        self.cfg = cfg
+        self.version += 1
+        templates = cfg.get('templates', {})
+        if templates != self._templates_seen:
+            self.templates_version += 1
+            self._templates_seen = dict(templates)
+        for fn in list(self._listeners):
+            fn(cfg, self.version)
+
+    def subscribe(self, fn):
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+
+_store = None
+
+
+def config_store():
+    """Process-wide ConfigStore for CONFIG_FILE, loaded on first use."""
+    global _store
+    if _store is None:
+        _store = ConfigStore()
+        _store.refresh()
+    return _store
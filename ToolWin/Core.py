@@ -0,0 +1,70 @@
+# ------------------ Core ------------------
+# Config access and command assembly shared by the GUI and the headless CLI.
+# Must not import Qt: `python main.py run ...` only loads this and its imports.
+import os
+from config import *
+from ToolWin.ConfigStore import config_store
+from ToolWin.TemplateEngine import template_engine, TemplateCycleError, TOKEN_RE
+from ToolWin.Trace import traced
+
+
+@traced('load_config')
+def load_config():
+    """Current config; only re-reads the file if it changed on disk."""
+    store = config_store()
+    store.refresh()
+    return store.cfg
+
+
+def is_windows():
+    # os.name instead of platform.system(): importing platform costs more than the rest of startup
+    return os.name == 'nt'
+
+
+def find_app(cfg, key):
+    """Look an app up by id, then by name (exact, then case-insensitive)."""
+    apps = cfg['apps']
+    app = apps.by_id(key)
+    if app is not None:
+        return app
+    for a in apps:
+        if a.name == key:
+            return a
+    for a in apps:
+        if a.name.lower() == key.lower():
+            return a
+    raise KeyError(f'No app named {key!r}')
+
+
+def parse_overrides(pairs):
+    """Turn ['TEMPLATE_X=value', ...] into a dict."""
+    out = {}
+    for p in pairs or []:
+        key, sep, value = p.partition('=')
+        if not sep or not TOKEN_RE.fullmatch(key):
+            raise ValueError(f'Expected TEMPLATE_NAME=value, got {p!r}')
+        out[key] = value
+    return out
+
+
+@traced('build_command')
+def build_command(app, cfg=None, overrides=None):
+    """Return (parts, assembled command) for an app, with optional template overrides."""
+    store = config_store()
+    if cfg is None:
+        cfg = store.cfg
+    templates = cfg.get('templates', {})
+    staged = None
+    if (cfg.get('staging') or {}).get('enabled'):
+        # inputs copied to the local staging cache are read from there
+        from ToolWin.Staging import staged_templates
+        staged, staged_sig = staged_templates(cfg)
+        if staged:
+            templates = dict(templates, **staged)
+    if overrides:
+        return template_engine().build(app, dict(templates, **overrides))
+    # the store's config is versioned, so its commands can be served from the engine cache
+    version = store.templates_version if cfg is store.cfg else None
+    if version is not None and staged:
+        version = (version, staged_sig)
+    return template_engine().build(app, templates, version)
@@ -0,0 +1,259 @@
+# ------------------ Evidence hashing ------------------
+# Chain-of-custody hashes for the evidence the templates point at. Kept free of Qt imports:
+#   python main.py hash [TEMPLATE_MFT_FILE TEMPLATE_EVTX ...] [--out DIR] [--workers N]
+#
+# Files are hashed in a process pool of spawned workers (MD5, SHA1 and SHA256 in a
+# single pass over an mmap of the file) and the digests cached by (path, size, mtime,
+# inode), so unchanged evidence is never read twice. A CSV manifest is written to the output dir;
+# a template whose evidence is missing is an error row there and fails the run.
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config import *
+from ToolWin.ConfigStore import atomic_write_json
+from ToolWin.ExecMode import local_path
+from ToolWin.TemplateEngine import expand_templates, is_output_template
+import csv
+import datetime
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+
+ALGORITHMS = ('md5', 'sha1', 'sha256')
+# small files are sent to the workers in batches of about this many bytes
+BATCH_BYTES = 64 * 1024 * 1024
+
+
+def hash_file(path, chunk=HASH_CHUNK_BYTES):
+    """{algorithm: hexdigest} of one file, all digests from one read pass."""
+    hashes = [hashlib.new(a) for a in ALGORITHMS]
+    with open(path, 'rb') as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            m = None  # empty or unmappable (pipes, some network shares): plain large reads
+        if m is not None:
+            with m:
+                with memoryview(m) as view:
+                    for off in range(0, len(m), chunk):
+                        with view[off:off + chunk] as piece:
+                            for h in hashes:
+                                h.update(piece)
+        else:
+            buf = bytearray(chunk)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                for h in hashes:
+                    h.update(view[:n])
+    return {a: h.hexdigest() for a, h in zip(ALGORITHMS, hashes)}
+
+
+def _hash_batch(paths):
+    # runs in a worker process
+    out = []
+    for p in paths:
+        try:
+            out.append((p, hash_file(p), None))
+        except OSError as e:
+            out.append((p, None, str(e)))
+    return out
+
+
+def collect_files(paths):
+    """Existing files below `paths` with their stat: [(path, stat_result)]."""
+    out, seen = [], set()
+    for root in paths:
+        if os.path.isfile(root):
+            walk = [(os.path.dirname(root), [], [os.path.basename(root)])]
+        else:
+            walk = os.walk(root)
+        for d, dirs, files in walk:
+            dirs.sort()
+            for name in sorted(files):
+                p = os.path.abspath(os.path.join(d, name))
+                if p in seen:
+                    continue
+                seen.add(p)
+                try:
+                    out.append((p, os.stat(p)))
+                except OSError:
+                    continue
+    return out
+
+
+def evidence_paths(cfg, keys=None, missing=None):
+    """Resolved, existing paths of the given templates (default: every non-output template).
+
+    With a `missing` list, templates whose path does not exist are appended to it as
+    (template, path), and so are empty ones named in `keys`.
+    """
+    expanded = expand_templates(cfg.get('templates', {}))
+    named = bool(keys)
+    keys = keys or [k for k in sorted(expanded) if not is_output_template(k)]
+    out = []
+    for k in keys:
+        if k not in expanded:
+            raise KeyError(f'No template named {k!r}')
+        path = local_path(expanded[k])
+        if path and os.path.exists(path):
+            out.append(path)
+        elif missing is not None and (path or named):
+            missing.append((k, path))
+    return out
+
+
+def output_dir(cfg):
+    expanded = expand_templates(cfg.get('templates', {}))
+    path = local_path(expanded.get('TEMPLATE_OUTPUT_DIR', ''))
+    return path if path and os.path.isdir(path) else None
+
+
+class HashCache:
+    """Persistent digests keyed by path|size|mtime_ns|inode; least recently used are dropped first."""
+    def __init__(self, path=HASH_CACHE_FILE, max_entries=HASH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = None
+
+    @staticmethod
+    def key(path, st):
+        return f'{path}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}'
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, key):
+        with self._lock:
+            data = self._load()
+            entry = data.pop(key, None)
+            if entry is not None:
+                data[key] = entry  # move to the most recently used end
+            return entry
+
+    def put(self, key, digests):
+        with self._lock:
+            data = self._load()
+            data.pop(key, None)
+            data[key] = digests
+            while len(data) > self.max_entries:
+                del data[next(iter(data))]
+
+    def save(self):
+        with self._lock:
+            if self._data is None:
+                return
+            try:
+                atomic_write_json(self.path, self._data)
+            except OSError:
+                pass  # only costs re-hashing next time
+
+
+def hash_paths(paths, workers=None, cache=None, on_progress=None):
+    """Hash every file below `paths`. Returns [{path, size, mtime, md5, sha1, sha256, cached, error}].
+
+    on_progress(files_done, files_total, bytes_done, bytes_total) is called from the calling thread.
+    """
+    cache = cache or hash_cache()
+    files = collect_files(paths)
+    total_bytes = sum(st.st_size for _, st in files)
+    rows, todo = {}, []
+    done_files = done_bytes = 0
+    for p, st in files:
+        row = {'path': p, 'size': st.st_size, 'mtime': st.st_mtime, 'cached': False, 'error': None}
+        rows[p] = row
+        digests = cache.get(HashCache.key(p, st))
+        if digests is not None:
+            row.update(digests, cached=True)
+            done_files += 1
+            done_bytes += st.st_size
+        else:
+            todo.append((p, st))
+    if on_progress:
+        on_progress(done_files, len(files), done_bytes, total_bytes)
+    if todo:
+        # large files alone, small ones batched, biggest first so the pool stays busy to the end
+        todo.sort(key=lambda f: -f[1].st_size)
+        batches, cur, cur_bytes = [], [], 0
+        for p, st in todo:
+            cur.append(p)
+            cur_bytes += st.st_size
+            if cur_bytes >= BATCH_BYTES or len(cur) >= 256:
+                batches.append(cur)
+                cur, cur_bytes = [], 0
+        if cur:
+            batches.append(cur)
+        stats = dict(todo)
+        with ProcessPoolExecutor(max_workers=min(workers or HASH_WORKERS, len(batches)),
+                                 mp_context=multiprocessing.get_context(WORKER_START_METHOD)) as pool:
+            for fut in as_completed([pool.submit(_hash_batch, b) for b in batches]):
+                for p, digests, error in fut.result():
+                    row = rows[p]
+                    if digests is None:
+                        row['error'] = error
+                    else:
+                        row.update(digests)
+                        cache.put(HashCache.key(p, stats[p]), digests)
+                    done_files += 1
+                    done_bytes += row['size']
+                if on_progress:
+                    on_progress(done_files, len(files), done_bytes, total_bytes)
+        cache.save()
+    return [rows[p] for p, _ in files]
+
+
+def write_manifest(rows, out_dir):
+    """Write evidence_hashes-<timestamp>.csv into out_dir and return its path."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"evidence_hashes-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(['path', 'size', 'mtime_utc', *ALGORITHMS, 'error'])
+        for r in rows:
+            mtime = (datetime.datetime.fromtimestamp(r['mtime'], datetime.timezone.utc).isoformat()
+                     if r['mtime'] is not None else '')
+            w.writerow([r['path'], r['size'], mtime, *(r.get(a, '') for a in ALGORITHMS), r['error'] or ''])
+    return path
+
+
+def run_hash_stage(cfg, keys=None, out_dir=None, workers=None, on_progress=None):
+    """Hash the evidence of `keys` and write the manifest. Returns (rows, manifest path or None).
+
+    Evidence that is not there gets an error row (in the manifest too), so it fails the run.
+    The manifest is written whenever there is an output directory, even with no rows.
+    """
+    missing = []
+    rows = hash_paths(evidence_paths(cfg, keys, missing), workers=workers, on_progress=on_progress)
+    rows += [{'path': path or k, 'size': 0, 'mtime': None, 'cached': False,
+              'error': f'{k}: not found' if path else f'{k} is empty'} for k, path in missing]
+    out_dir = out_dir or output_dir(cfg)
+    return rows, (write_manifest(rows, out_dir) if out_dir else None)
+
+
+def summary(rows):
+    cached = sum(1 for r in rows if r['cached'])
+    failed = sum(1 for r in rows if r['error'])
+    size = sum(r['size'] for r in rows)
+    return f'{len(rows)} files, {size / 1e6:.1f} MB, {cached} from cache, {failed} failed'
+
+
+_hash_cache = None
+
+
+def hash_cache():
+    """Process-wide HashCache on HASH_CACHE_FILE."""
+    global _hash_cache
+    if _hash_cache is None:
+        _hash_cache = HashCache()
+    return _hash_cache
@@ -0,0 +1,164 @@
+# ------------------ Execution modes ------------------
+# How an app's resolved argument list is started. Kept free of Qt imports. Per app:
+#   "exec_mode": "auto" | "direct" | "shell" | "elevated",  "shell": "powershell" | "cmd" | "sh"
+#
+#   direct    the argv goes straight to the OS, no shell and no re-quoting
+#   shell     the argv is quoted for the chosen shell and run through it
+#             (default: powershell on Windows, sh elsewhere)
+#   elevated  Windows only: UAC prompt, then a console kept open (powershell -NoExit or
+#             cmd /k); elsewhere, and in pipelines/fan-out/CLI, it runs like direct
+#   auto      (default) the cheapest mode that is correct: elevated for run_as_admin,
+#             shell for .bat/.cmd/.ps1 scripts on Windows and for apps with
+#             quote_values (their values already carry PowerShell quoting), else direct
+#
+# Paths written for the old PowerShell launch, like C:/Users/$Env:UserName/..., keep working:
+# $Env:NAME (and %NAME% on Windows) is expanded here, before the argv is quoted or passed on,
+# since neither direct exec nor verbatim quoting would expand it.
+import os
+import re
+import shlex
+import subprocess
+
+EXEC_MODES = ('auto', 'direct', 'shell', 'elevated')
+SHELLS = ('powershell', 'cmd', 'sh')
+SCRIPT_SHELLS = {'.bat': 'cmd', '.cmd': 'cmd', '.ps1': 'powershell'}
+CMD_META = '()%!^"<>&|'
+PS_ENV_RE = re.compile(r'\$(?:env:([A-Za-z_][A-Za-z0-9_]*)|\{env:([^}]+)\})', re.IGNORECASE)
+CMD_ENV_RE = re.compile(r'%([A-Za-z_][A-Za-z0-9_()]*)%')
+PS_QUOTED_RE = re.compile(r"'((?:[^']|'')*)'")
+
+
+def default_shell():
+    return 'powershell' if os.name == 'nt' else 'sh'
+
+
+def _getenv(name):
+    value = os.environ.get(name)
+    if value is None:
+        # Windows names are case-insensitive
+        value = next((v for k, v in os.environ.items() if k.upper() == name.upper()), None)
+    return value
+
+
+def expand_env(arg):
+    """Expand PowerShell $Env:NAME / ${env:NAME} (unset: empty, as PowerShell does) and, on Windows,
+    cmd's %NAME% (unset: left as is, as cmd does)."""
+    if '$' in arg:
+        arg = PS_ENV_RE.sub(lambda m: _getenv(m.group(1) or m.group(2)) or '', arg)
+    if os.name == 'nt' and '%' in arg:
+        arg = CMD_ENV_RE.sub(lambda m: _getenv(m.group(1)) if _getenv(m.group(1)) is not None else m.group(0), arg)
+    return arg
+
+
+def local_path(value):
+    """A template value or argument as a path on this machine: expand_env, then os.path.expandvars ($HOME...)."""
+    return os.path.expandvars(expand_env(value))
+
+
+def unquote_powershell(arg):
+    """arg with the verbatim '...' quoting of quote_values apps taken off."""
+    return PS_QUOTED_RE.sub(lambda m: m.group(1).replace("''", "'"), arg) if "'" in arg else arg
+
+
+def quote_posix(arg):
+    return shlex.quote(arg)
+
+
+def quote_powershell(arg):
+    """A PowerShell verbatim string: nothing inside single quotes is expanded."""
+    return "'" + arg.replace("'", "''") + "'"
+
+
+def quote_cmd(arg):
+    """Quote for the program's argv parser (MSVCRT rules), then ^-escape every cmd.exe metacharacter,
+    quotes included, so cmd passes the text through unchanged (no %VAR% expansion, no redirection)."""
+    quoted = subprocess.list2cmdline([arg]) if arg else '""'
+    if arg and not quoted.startswith('"') and any(c in arg for c in CMD_META):
+        quoted = '"' + quoted + '"'  # list2cmdline only quotes on whitespace
+    return ''.join('^' + c if c in CMD_META else c for c in quoted)
+
+
+QUOTERS = {'powershell': quote_powershell, 'cmd': quote_cmd, 'sh': quote_posix}
+
+
+def shell_command(argv, shell, raw_args=False):
+    """One command line running argv in `shell`. With raw_args the arguments are taken
+    verbatim (they already carry the shell's quoting) and only the program is quoted."""
+    if shell not in QUOTERS:
+        raise ValueError(f'Unknown shell {shell!r} (expected one of {", ".join(SHELLS)})')
+    if not argv:
+        return ''
+    quote = QUOTERS[shell]
+    prog, args = str(argv[0]), [str(a) for a in argv[1:]]
+    # cmd takes the program name up to the first unquoted blank, so it gets plain quotes
+    words = ['"' + prog + '"' if shell == 'cmd' else quote(prog)]
+    words += args if raw_args else [quote(a) for a in args]
+    line = ' '.join(words)
+    # PowerShell treats a quoted string as a value, so the program needs the call operator
+    return '& ' + line if shell == 'powershell' else line
+
+
+def resolve_mode(app):
+    """(mode, shell) an app runs with; 'auto' is resolved here."""
+    mode = app.exec_mode or 'auto'
+    if mode not in EXEC_MODES:
+        raise ValueError(f"App {app.name!r}: unknown exec_mode {mode!r} (expected one of {', '.join(EXEC_MODES)})")
+    ext = os.path.splitext(app.path)[1].lower()
+    script_shell = SCRIPT_SHELLS.get(ext) if os.name == 'nt' else None
+    if mode == 'auto':
+        if app.run_as_admin and os.name == 'nt':
+            mode = 'elevated'
+        elif script_shell or app.quote_values:
+            mode = 'shell'
+        else:
+            mode = 'direct'
+    shell = app.shell or script_shell or ('powershell' if app.quote_values and os.name == 'nt' else None)
+    return mode, (shell or default_shell()) if mode != 'direct' else None
+
+
+def plan(argv, mode='direct', shell=None, raw_args=False, batch=False):
+    """How to start argv. Returns a dict:
+
+    argv     what is executed (a shell wrapper for shell mode), shown in Runs and the history
+    command  a command line for the system shell (cmd.exe via COMSPEC) when argv cannot carry it, else None
+    elevate  (file, parameters) for a Windows 'runas' ShellExecute, else None
+    """
+    argv = [str(a) for a in argv if a is not None]
+    if argv and not argv[0]:
+        argv = argv[1:]
+    # raw (quote_values) arguments are shell text: the shell expands their variables itself
+    argv = [expand_env(a) if i == 0 or not raw_args else a for i, a in enumerate(argv)]
+    if mode == 'elevated' and (batch or os.name != 'nt'):
+        mode = 'direct'
+    if mode == 'direct':
+        return {'mode': mode, 'shell': None, 'argv': argv, 'command': None, 'elevate': None}
+    shell = shell or default_shell()
+    line = shell_command(argv, shell, raw_args)
+    ps = 'powershell.exe' if os.name == 'nt' else 'pwsh'
+    if mode == 'elevated':
+        if shell == 'cmd':
+            elevate = ('cmd.exe', f'/d /s /k "{line}"')
+        else:
+            if shell != 'powershell':
+                line = shell_command(argv, 'powershell', raw_args)
+            elevate = (ps, subprocess.list2cmdline(['-NoProfile', '-NoExit', '-Command', line]))
+        return {'mode': mode, 'shell': shell, 'argv': [elevate[0], elevate[1]], 'command': None, 'elevate': elevate}
+    if shell == 'powershell':
+        wrapped, command = [ps, '-NoProfile', '-NonInteractive', '-Command', line], None
+    elif shell == 'cmd':
+        if os.name != 'nt':
+            raise ValueError('The cmd shell is only available on Windows')
+        # cmd does not use MSVCRT argv rules, so the line goes through COMSPEC as is
+        wrapped, command = ['cmd.exe', '/d', '/c', line], line
+    else:
+        wrapped, command = ['/bin/sh', '-c', line], None
+    return {'mode': mode, 'shell': shell, 'argv': wrapped, 'command': command, 'elevate': None}
+
+
+def app_plan(app, argv, batch=False):
+    """plan() for an app's resolved argv with its configured (or auto) mode.
+
+    batch: pipelines, fan-out and the CLI, which cannot answer a UAC prompt.
+    """
+    mode, shell = resolve_mode(app)
+    return plan(argv, mode, shell, raw_args=app.quote_values, batch=batch)
@@ -0,0 +1,199 @@
+# ------------------ Fan-out ------------------
+# Runs one app once per combination of template values, e.g. one MFT parse per collected host.
+# Kept free of Qt imports so it can run from the headless CLI:
+#   python main.py run "MFT Parse" --fanout 'TEMPLATE_MFT_FILE=/cases/hosts/*/C/$MFT' --workers 4
+#
+# Each value of a fan-out template may be a literal or a glob; the matrix is the
+# product of all fan-out templates. Output templates (TEMPLATE_*OUTPUT*/*SAVE*)
+# not fanned out themselves get a per-item subdirectory so runs don't overwrite each other.
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from config import *
+from ToolWin.Core import build_command
+from ToolWin.ExecMode import app_plan, local_path
+from ToolWin.History import run_meta
+from ToolWin.Pipeline import run_argv
+from ToolWin.RunCache import run_incremental
+from ToolWin.TemplateEngine import is_output_template, referenced_templates
+import glob
+import os
+import re
+import time
+
+GLOB_CHARS = re.compile(r'[*?[]')
+LABEL_BAD = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def expand_values(values):
+    """Literal values are kept as-is, glob patterns are expanded (sorted). Duplicates are dropped."""
+    out = []
+    for v in values:
+        v = v.strip()
+        if not v:
+            continue
+        if GLOB_CHARS.search(v):
+            hits = sorted(glob.glob(os.path.expanduser(v)))
+            if not hits:
+                raise ValueError(f'Pattern matched nothing: {v}')
+            out.extend(hits)
+        else:
+            out.append(v)
+    return list(dict.fromkeys(out))
+
+
+def _split(path):
+    return [p for p in re.split(r'[\\/]+', path) if p]
+
+
+def labels_for(values):
+    """Short per-value labels: the first path component where the values differ (the host
+    directory in /cases/HOST1/evtx, /cases/HOST2/evtx), else the basename."""
+    parts = [_split(v) for v in values]
+    if len(values) > 1:
+        n = min(len(p) for p in parts)
+        for i in range(n):
+            if len({p[i] for p in parts}) > 1:
+                return [p[i] for p in parts]
+    return [p[-1] if p else v for p, v in zip(parts, values)]
+
+
+def build_matrix(app, cfg, fanout):
+    """fanout: {TEMPLATE_X: [value or glob, ...]}.
+
+    Returns ([(label, overrides)] with one item per combination, the output template keys made unique).
+    """
+    if not fanout:
+        raise ValueError('No fan-out templates given')
+    templates = cfg.get('templates', {})
+    keys = sorted(fanout)
+    axes = []
+    for k in keys:
+        vals = expand_values(fanout[k])
+        if not vals:
+            raise ValueError(f'{k}: no values')
+        axes.append(list(zip(labels_for(vals), vals)))
+    outputs = [k for k in sorted(referenced_templates(app, templates))
+               if is_output_template(k) and k not in fanout and templates.get(k)]
+    items, used = [], {}
+    for combo in product(*axes):
+        label = LABEL_BAD.sub('_', '_'.join(lbl for lbl, _ in combo)).strip('_') or 'item'
+        used[label] = used.get(label, 0) + 1
+        if used[label] > 1:
+            label = f'{label}_{used[label]}'
+        overrides = {k: v for k, (_, v) in zip(keys, combo)}
+        for k in outputs:
+            base = templates[k].rstrip('/\\')
+            overrides[k] = base + ('\\' if '\\' in base and '/' not in base else '/') + label
+        items.append((label, overrides))
+    return items, outputs
+
+
+class FanOutRunner:
+    """Runs the expanded items on a bounded worker pool.
+
+    An item exiting non-zero is retried up to `retries` more times; a launch
+    error (OSError) is not retried. on_event(label, state, info) is called from
+    worker threads with state in started/retry/dispatched/finished/failed.
+    With `nodes` (an Agent.NodePool) items run on worker nodes instead; the
+    incremental skip only applies to local runs.
+    """
+    def __init__(self, app, cfg, items, outputs=(), max_workers=None, retries=None, runner=run_argv, on_event=None,
+                 force=False, nodes=None):
+        self.app = app
+        self.cfg = cfg
+        self.items = items
+        self.outputs = outputs
+        self.max_workers = max_workers or FANOUT_MAX_WORKERS
+        self.retries = FANOUT_RETRIES if retries is None else retries
+        self.runner = runner
+        self.on_event = on_event or (lambda *a: None)
+        self.force = force
+        self.nodes = nodes
+        self.results = {}
+        self.elapsed = 0.0
+
+    def command(self, overrides):
+        parts = build_command(self.app, self.cfg, overrides)[0]
+        return parts if parts[0] else parts[1:]
+
+    def _prepare(self, overrides):
+        # only a per-item subdirectory of an existing output directory is created
+        for k in self.outputs:
+            path = local_path(overrides[k])
+            if os.path.isabs(path) and os.path.isdir(os.path.dirname(path)):
+                try:
+                    os.makedirs(path, exist_ok=True)
+                except OSError:
+                    pass  # the tool reports it
+
+    def _run_item(self, label, overrides):
+        t0 = time.monotonic()
+        attempt = 0
+        try:
+            argv = self.command(overrides)
+            if self.nodes is None:
+                self._prepare(overrides)
+            name = f"{self.app.get('name', '')} [{label}]"
+            meta = run_meta(self.app, self.cfg, overrides, source='fanout')
+            p = app_plan(self.app, argv, batch=True)
+
+            def attempts():
+                nonlocal attempt
+                while True:
+                    attempt += 1
+                    self.on_event(label, 'started' if attempt == 1 else 'retry', ' '.join(argv))
+                    if self.nodes is not None:
+                        code = self.nodes.run(self.app, self.cfg, overrides, name, meta,
+                                              on_start=lambda node, job: self.on_event(label, 'dispatched',
+                                                                                       f'{node.name} job {job.job}'))
+                    else:
+                        code = self.runner(p['argv'], name=name, cost=self.app.get('cost'), meta=meta,
+                                           command=p['command'])
+                    if code == 0 or attempt > self.retries:
+                        return code
+
+            if self.nodes is not None:
+                code, cached = attempts(), False
+            else:
+                code, cached = run_incremental(self.app, self.cfg, argv, attempts, overrides, name, self.force, meta)
+            res = {'state': 'finished' if code == 0 else 'failed', 'returncode': code, 'attempts': attempt}
+            if cached:
+                res['cached'] = True
+        except (OSError, ValueError) as e:  # e.g. a template cycle from an override, an unusable exec mode/shell
+            res = {'state': 'failed', 'error': str(e), 'attempts': attempt}
+        res['duration'] = time.monotonic() - t0
+        self.results[label] = res
+        self.on_event(label, res['state'], res)
+        return res
+
+    def run(self):
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {label: pool.submit(self._run_item, label, overrides) for label, overrides in self.items}
+        for label, fut in futures.items():
+            try:
+                fut.result()
+            except Exception as e:
+                # a bug, not a failed run: still reported instead of lost with the worker thread
+                res = self.results[label] = {'state': 'failed', 'error': f'{type(e).__name__}: {e}', 'attempts': 0,
+                                             'duration': 0.0}
+                self.on_event(label, 'failed', res)
+        self.elapsed = time.monotonic() - t0
+        return self.results
+
+
+def summary(results, elapsed=None):
+    counts = {}
+    for r in results.values():
+        counts[r['state']] = counts.get(r['state'], 0) + 1
+    text = ', '.join(f'{n} {state}' for state, n in sorted(counts.items()))
+    retried = sum(1 for r in results.values() if r.get('attempts', 1) > 1)
+    if retried:
+        text += f', {retried} retried'
+    cached = sum(1 for r in results.values() if r.get('cached'))
+    if cached:
+        text += f', {cached} up to date'
+    if elapsed is not None:
+        busy = sum(r.get('duration', 0) for r in results.values())
+        text += f' in {elapsed:.1f}s ({busy:.1f}s of work)'
+    return text
@@ -0,0 +1,147 @@
+# ------------------ Dialogs ------------------
+
+from PySide6 import QtCore, QtWidgets
+from config import *
+from ToolWin.FanOut import FanOutRunner, build_matrix, summary
+from ToolWin.TemplateEngine import is_output_template, referenced_templates
+import threading
+
+
+class FanOutDialog(QtWidgets.QDialog):
+    """Run one app per value (or glob match) of one or more templates, with per-item status."""
+    item_event = QtCore.Signal(str, str, object)
+
+    def __init__(self, cfg, app, parent=None):
+        super().__init__(parent)
+        self.cfg = cfg
+        self.app = app
+        self.setWindowTitle(f"Fan-out Run - {app.get('name', '')}")
+        self.resize(640, 480)
+        self._thread = None
+        self._rows = {}
+        self.item_event.connect(self._on_item_event)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        layout.addWidget(QtWidgets.QLabel('One value or glob per line. Leave a template empty to keep its global value.'))
+        form = QtWidgets.QFormLayout()
+        self.value_edits = {}
+        templates = cfg.get('templates', {})
+        for key in sorted(referenced_templates(app, templates)):
+            if is_output_template(key):
+                continue
+            edit = QtWidgets.QPlainTextEdit()
+            edit.setPlaceholderText(templates.get(key, ''))
+            edit.setFixedHeight(60)
+            browse = QtWidgets.QPushButton('Add Folder...')
+            browse.clicked.connect(lambda _=False, e=edit: self.browse_folder(e))
+            row = QtWidgets.QHBoxLayout()
+            row.addWidget(edit, 1)
+            row.addWidget(browse, 0, QtCore.Qt.AlignTop)
+            form.addRow(key, row)
+            self.value_edits[key] = edit
+        layout.addLayout(form)
+
+        opts = QtWidgets.QHBoxLayout()
+        self.workers_spin = QtWidgets.QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(FANOUT_MAX_WORKERS)
+        self.retries_spin = QtWidgets.QSpinBox()
+        self.retries_spin.setRange(0, 10)
+        self.retries_spin.setValue(FANOUT_RETRIES)
+        opts.addWidget(QtWidgets.QLabel('Parallel runs:'))
+        opts.addWidget(self.workers_spin)
+        opts.addWidget(QtWidgets.QLabel('Retries:'))
+        opts.addWidget(self.retries_spin)
+        opts.addStretch()
+        preview = QtWidgets.QPushButton('Preview')
+        preview.clicked.connect(self.preview)
+        self.run_btn = QtWidgets.QPushButton('Run')
+        self.run_btn.clicked.connect(self.on_run)
+        opts.addWidget(preview)
+        opts.addWidget(self.run_btn)
+        layout.addLayout(opts)
+
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(['Item', 'State', 'Exit', 'Attempts', 'Time'])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table, 1)
+        self.summary_label = QtWidgets.QLabel('')
+        layout.addWidget(self.summary_label)
+
+        if not self.value_edits:
+            self.summary_label.setText('This app does not use any template that can be fanned out.')
+            self.run_btn.setEnabled(False)
+
+    def browse_folder(self, edit):
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, 'Select folder')
+        if path:
+            edit.appendPlainText(path)
+
+    def _matrix(self):
+        fanout = {}
+        for key, edit in self.value_edits.items():
+            values = [v for v in edit.toPlainText().splitlines() if v.strip()]
+            if values:
+                fanout[key] = values
+        try:
+            return build_matrix(self.app, self.cfg, fanout)
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, 'Fan-out', str(e))
+            return None
+
+    def _fill(self, items):
+        self.table.setRowCount(0)
+        self._rows = {}
+        for label, overrides in items:
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            item = QtWidgets.QTableWidgetItem(label)
+            item.setToolTip('\n'.join(f'{k} = {v}' for k, v in sorted(overrides.items())))
+            self.table.setItem(r, 0, item)
+            self.table.setItem(r, 1, QtWidgets.QTableWidgetItem('pending'))
+            self._rows[label] = r
+
+    def preview(self):
+        matrix = self._matrix()
+        if matrix is None:
+            return
+        items, outputs = matrix
+        self._fill(items)
+        self.summary_label.setText(f"{len(items)} runs; unique per item: {', '.join(outputs) or 'none'}")
+
+    def on_run(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        matrix = self._matrix()
+        if matrix is None:
+            return
+        items, outputs = matrix
+        self._fill(items)
+        runner = FanOutRunner(self.app, self.cfg, items, outputs, max_workers=self.workers_spin.value(),
+                              retries=self.retries_spin.value(), on_event=self.item_event.emit)
+        self.run_btn.setEnabled(False)
+        self.summary_label.setText(f'Running {len(items)} items...')
+        # items block on their processes, so the pool is driven from its own thread
+        self._thread = threading.Thread(target=lambda: self.item_event.emit('', 'done', (runner.run(), runner.elapsed)), daemon=True)
+        self._thread.start()
+        parent = self.parent()
+        if parent is not None and hasattr(parent, 'ensure_runs_panel'):
+            parent.ensure_runs_panel().show()
+
+    def _on_item_event(self, label, state, info):
+        if state == 'done':
+            results, elapsed = info
+            self.summary_label.setText(summary(results, elapsed))
+            self.run_btn.setEnabled(True)
+            return
+        r = self._rows.get(label)
+        if r is None:
+            return
+        cached = isinstance(info, dict) and info.get('cached')
+        self.table.setItem(r, 1, QtWidgets.QTableWidgetItem('up to date' if cached else state))
+        if isinstance(info, dict):
+            exit_text = str(info['returncode']) if 'returncode' in info else info.get('error', '')
+            self.table.setItem(r, 2, QtWidgets.QTableWidgetItem(exit_text))
+            self.table.setItem(r, 3, QtWidgets.QTableWidgetItem(str(info.get('attempts', ''))))
+            self.table.setItem(r, 4, QtWidgets.QTableWidgetItem(f"{info.get('duration', 0):.1f}s"))
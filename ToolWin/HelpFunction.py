@@ -1,57 +1,82 @@
-# ------------------ Utilities ------------------
-import subprocess
-import platform
-import json
-import ctypes
-from PySide6 import QtWidgets
-from config import *
-
-def load_config():
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            pass
-    # default structure
-    return {'apps': [], 'templates': {}}
-
-
-def save_config(cfg):
-    try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        QtWidgets.QMessageBox.warning(None, 'Save error', f'Failed to save config: {e}')
-
-
-def is_windows():
-    return platform.system() == 'Windows'
-
-
-def launch_process(path, args: list, as_admin=False, use_powershell_elevated=False):
-    """Launch process. If use_powershell_elevated is True on Windows, open an elevated PowerShell window
-    and pass the assembled command to it using -NoExit -Command "<cmd>" so the window stays open after execution.
-    """
-    cmd = [path] + args if path else args
-    try:
-        if is_windows() and use_powershell_elevated:
-            assembled = ' '.join([str(p) for p in cmd])
-            ps_cmd = assembled.replace('"', '\"')
-            params = f'-NoExit -Command "{ps_cmd}"'
-            ctypes.windll.shell32.ShellExecuteW(None, 'runas', 'powershell.exe', params, None, 1)
-            return True
-        elif is_windows() and as_admin and path:
-            params = ' '.join([f'"{p}"' for p in args])
-            ctypes.windll.shell32.ShellExecuteW(None, 'runas', str(path), params, None, 1)
-            return True
-        else:
-            if path:
-                subprocess.Popen([path] + args)
-            else:
-                subprocess.Popen(args)
-            return True
-    except Exception as e:
-        QtWidgets.QMessageBox.warning(None, 'Launch failed', f'Failed to launch: {e}')
-        return False
-
+# ------------------ Utilities ------------------
+import json
+from PySide6 import QtWidgets
+from config import *
+from ToolWin.ConfigStore import config_store
+from ToolWin.Core import load_config, is_windows, find_app, build_command
+
+
+def save_config(cfg):
+    try:
+        config_store().save(cfg)
+    except Exception as e:
+        QtWidgets.QMessageBox.warning(None, 'Save error', f'Failed to save config: {e}')
+
+
+def save_app(app, new=False):
+    """Journal a single app add/update."""
+    try:
+        if new:
+            config_store().add_app(app)
+        else:
+            config_store().update_app(app)
+    except Exception as e:
+        QtWidgets.QMessageBox.warning(None, 'Save error', f'Failed to save config: {e}')
+
+
+def delete_app(app_id):
+    try:
+        config_store().delete_app(app_id)
+    except Exception as e:
+        QtWidgets.QMessageBox.warning(None, 'Save error', f'Failed to save config: {e}')
+
+
+def save_templates(templates):
+    """Journal only the templates that changed."""
+    try:
+        config_store().set_templates(templates)
+    except Exception as e:
+        QtWidgets.QMessageBox.warning(None, 'Save error', f'Failed to save config: {e}')
+
+
+def launch_process(path, args: list, as_admin=False, use_powershell_elevated=False, cost=None, incremental=None, force=False,
+                   meta=None, plan=None, name=None):
+    """Launch process as laid out by `plan` (see ToolWin.ExecMode: direct argv, shell-wrapped or elevated).
+    Without a plan, as_admin / use_powershell_elevated ask for an elevated launch (a PowerShell window
+    kept open on Windows) and anything else runs direct.
+    Elevated launches go through the Windows UAC prompt. Other launches are queued on the run scheduler
+    with the app's cost profile; with `incremental` (the app) they are skipped while an identical earlier
+    run's outputs are up to date, unless `force`. `meta` (see ToolWin.History.run_meta) is recorded
+    with the run in the run history; an elevated launch leaves the launcher's sight once started,
+    so it is recorded as 'launched', without exit code or metrics.
+    """
+    from ToolWin.ExecMode import plan as exec_plan
+    cmd = [path] + args if path else args
+    if plan is None:
+        elevated = as_admin or use_powershell_elevated
+        plan = exec_plan(cmd, 'elevated' if elevated else 'direct', 'powershell' if elevated else None)
+    try:
+        if plan['elevate']:
+            import ctypes
+            import time
+            from ToolWin.History import history
+            file, params = plan['elevate']
+            started = time.time()
+            # values up to 32 are errors (e.g. 5: the UAC prompt was declined)
+            rc = ctypes.windll.shell32.ShellExecuteW(None, 'runas', file, params, None, 1)
+            if rc <= 32:
+                history().record(plan['argv'], name, meta, started, time.time(), 'error',
+                                 error=f'ShellExecute failed ({rc})')
+                raise OSError(f'ShellExecute failed ({rc})')
+            history().record(plan['argv'], name, meta, started, None, 'launched')
+        elif incremental is not None:
+            # scheduled against host budgets, then supervised: output goes to the Runs panel
+            from ToolWin.RunCache import launch_incremental
+            launch_incremental(incremental, cmd, cost=cost, force=force, meta=meta, plan=plan)
+        else:
+            from ToolWin.Scheduler import scheduler
+            scheduler().submit(plan['argv'], cost=cost, meta=meta, command=plan['command'])
+        return True
+    except Exception as e:
+        QtWidgets.QMessageBox.warning(None, 'Launch failed', f'Failed to launch: {e}')
+        return False
@@ -0,0 +1,293 @@
+# ------------------ Run history ------------------
+# Every supervised run (GUI launches, pipeline stages, fan-out items) and every CLI
+# `run` is recorded in a local SQLite database, HISTORY_DB. Kept free of Qt imports:
+#   python main.py history [--app <app>] [--days N]
+#
+# While a run is alive its /proc/<pid> entries are sampled every HISTORY_SAMPLE_SECONDS:
+# peak RSS (VmHWM), CPU time (user + system, including waited-for children) and
+# bytes read/written (rchar/wchar, so reads served from the page cache count too).
+# The last sample before exit is what gets recorded; runs shorter than one interval
+# and hosts without /proc have no metrics. Elevated launches (Windows UAC) run outside
+# the supervisor: they are recorded as 'launched', with neither exit code nor metrics.
+# Rows are queued and written by a background thread in batches, so recording never
+# adds to launch latency.
+from config import *
+from ToolWin.TemplateEngine import expand_templates, referenced_templates
+import atexit
+import json
+import math
+import os
+import queue
+import sqlite3
+import subprocess
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    app_id TEXT, name TEXT, source TEXT, argv TEXT, templates TEXT,
+    started REAL, ended REAL, duration REAL, state TEXT, returncode INTEGER, error TEXT,
+    peak_rss_kb INTEGER, cpu_seconds REAL, read_bytes INTEGER, write_bytes INTEGER);
+CREATE INDEX IF NOT EXISTS runs_app ON runs (app_id, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+'''
+COLUMNS = ('app_id', 'name', 'source', 'argv', 'templates', 'started', 'ended', 'duration', 'state', 'returncode',
+           'error', 'peak_rss_kb', 'cpu_seconds', 'read_bytes', 'write_bytes')
+INSERT = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+METRICS = ('peak_rss_kb', 'cpu_seconds', 'read_bytes', 'write_bytes')
+# not real (or not observed) executions: left out of durations and failure rates;
+# 'launched' is an elevated launch the launcher cannot see finish
+NOT_RUN = ('cached', 'cancelled', 'launched')
+FAILED = ('failed', 'error')
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def sample_proc(pid, proc='/proc'):
+    """{peak_rss_kb, cpu_seconds, read_bytes, write_bytes} of a live process; unreadable values are left out."""
+    out = {}
+    base = os.path.join(proc, str(pid))
+    try:
+        with open(os.path.join(base, 'status')) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    out['peak_rss_kb'] = int(line.split()[1])
+                    break
+        with open(os.path.join(base, 'stat')) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        # fields after the command name start at the state; utime, stime, cutime, cstime follow at 11-14
+        out['cpu_seconds'] = sum(int(v) for v in fields[11:15]) / CLK_TCK
+        with open(os.path.join(base, 'io')) as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('rchar', 'wchar'):
+                    out['read_bytes' if key == 'rchar' else 'write_bytes'] = int(value)
+    except (OSError, ValueError, IndexError):
+        pass
+    return out
+
+
+def _merge(metrics, sample):
+    # every metric only grows, so a partial read of an exiting process never lowers one
+    for k, v in sample.items():
+        metrics[k] = max(metrics.get(k, v), v)
+
+
+def run_meta(app, cfg, overrides=None, source=None):
+    """What a Run carries about its launch: app id, used template values, origin (kept in the history)
+    and the app's resource limits (applied at spawn, see ToolWin.LaunchHelper)."""
+    templates = dict(cfg.get('templates', {}), **(overrides or {}))
+    try:
+        expanded = expand_templates(templates)
+    except ValueError:
+        expanded = templates
+    used = referenced_templates(app, templates)
+    return {'app_id': app.get('id'), 'source': source, 'templates': {k: expanded.get(k, '') for k in sorted(used)},
+            'limits': app.get('limits')}
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, min(len(values) - 1, math.ceil(p * len(values)) - 1))] if values else None
+
+
+class RunHistory:
+    """Run records in SQLite, written in batches by a background thread.
+
+    on_run is a RunSupervisor listener: a run is sampled from 'started' and
+    queued for writing on 'finished'. The launching app travels in run.meta
+    (see run_meta). Rows older than max_age_days are pruned when the writer starts.
+    """
+    def __init__(self, path=HISTORY_DB, sample_interval=HISTORY_SAMPLE_SECONDS, batch=HISTORY_BATCH,
+                 flush_interval=HISTORY_FLUSH_SECONDS, max_age_days=HISTORY_MAX_AGE_DAYS):
+        self.path = str(path)
+        self.sample_interval = sample_interval
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.max_age = max_age_days * 86400
+        self._queue = queue.Queue()
+        self._writer = None
+        self._live = {}     # run id -> (run, metrics)
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._wake = threading.Event()
+
+    # ---- recording ----
+
+    def on_run(self, event, run):
+        if event == 'started' and run.pid:
+            with self._lock:
+                self._live[run.id] = (run, {})
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample_loop, name='run-history-sampler', daemon=True)
+                    self._sampler.start()
+            self._wake.set()
+        elif event == 'finished':
+            with self._lock:
+                _, metrics = self._live.pop(run.id, (None, {}))
+            self.record(run.argv, run.name, getattr(run, 'meta', None), run.started, run.ended, run.state,
+                        run.returncode, run.error, metrics)
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                live = list(self._live.values())
+                if not live:
+                    self._sampler = None
+                    return
+            for run, metrics in live:
+                if run.pid:
+                    _merge(metrics, sample_proc(run.pid))
+            self._wake.wait(self.sample_interval)
+            self._wake.clear()
+
+    def watch(self, proc, argv, started, name=None, meta=None):
+        """Wait for a subprocess.Popen (CLI runs), sampling it like a supervised run, and record it.
+
+        Returns its exit code.
+        """
+        metrics = {}
+        while True:
+            _merge(metrics, sample_proc(proc.pid))
+            try:
+                code = proc.wait(self.sample_interval)
+                break
+            except subprocess.TimeoutExpired:
+                continue
+        self.record(argv, name, meta, started, time.time(), 'finished' if code == 0 else 'failed', code, None, metrics)
+        return code
+
+    def record(self, argv, name, meta, started, ended, state, returncode=None, error=None, metrics=None):
+        """Queue one row; the writer thread stores it with the next batch."""
+        meta = meta or {}
+        metrics = metrics or {}
+        duration = ended - started if started and ended else None
+        row = (meta.get('app_id'), name, meta.get('source'), json.dumps([str(a) for a in argv]),
+               json.dumps(meta.get('templates') or {}), started or ended, ended, duration, state, returncode, error,
+               *(metrics.get(k) for k in METRICS))
+        self._queue.put(row)
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='run-history-writer', daemon=True)
+                self._writer.start()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(SCHEMA)
+        with db:
+            db.execute('DELETE FROM runs WHERE started < ?', (time.time() - self.max_age,))
+        return db
+
+    def _write_loop(self):
+        try:
+            db = self._connect()
+        except sqlite3.Error:
+            db = None  # history is best effort: rows are dropped, launches are not affected
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch and rows[-1] is not None:
+                try:
+                    rows.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = rows[-1] is None
+            rows = [r for r in rows if r is not None]
+            if rows and db is not None:
+                try:
+                    with db:
+                        db.executemany(INSERT, rows)
+                except sqlite3.Error:
+                    pass
+            if stop:
+                if db is not None:
+                    db.close()
+                return
+
+    def close(self, timeout=5):
+        """Write out queued rows and stop the writer (registered with atexit)."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    # ---- queries ----
+
+    def _select(self, sql, args=()):
+        if not os.path.exists(self.path):
+            return []
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.row_factory = sqlite3.Row
+            return [dict(r) for r in db.execute(sql, args)]
+        except sqlite3.Error:
+            return []  # e.g. read before the writer created the table
+        finally:
+            db.close()
+
+    def recent(self, limit=200, app_id=None):
+        """Latest runs, newest first."""
+        where, args = ('WHERE app_id = ?', (app_id,)) if app_id else ('', ())
+        return self._select(f'SELECT * FROM runs {where} ORDER BY started DESC LIMIT ?', (*args, limit))
+
+    def app_stats(self, since=None, app_id=None):
+        """Per app (or run name without an app): runs, failure rate, p50/p95 duration and resource use, most runs first."""
+        sql = ("SELECT app_id, name, state, duration, peak_rss_kb, cpu_seconds, read_bytes, write_bytes FROM runs "
+               f"WHERE started >= ? AND state NOT IN {NOT_RUN}" + (' AND app_id = ?' if app_id else '') + ' ORDER BY started')
+        groups = {}
+        for r in self._select(sql, (since or 0, *((app_id,) if app_id else ()))):
+            groups.setdefault(r['app_id'] or r['name'], []).append(r)
+        out = []
+        for key, rows in groups.items():
+            durations = sorted(r['duration'] for r in rows if r['duration'] is not None)
+            failed = sum(1 for r in rows if r['state'] in FAILED)
+            rss = [r['peak_rss_kb'] for r in rows if r['peak_rss_kb'] is not None]
+            cpu = [r['cpu_seconds'] for r in rows if r['cpu_seconds'] is not None]
+            io = [(r['read_bytes'] or 0) + (r['write_bytes'] or 0) for r in rows if r['read_bytes'] is not None]
+            out.append({'app_id': rows[-1]['app_id'], 'name': rows[-1]['name'], 'runs': len(rows), 'failed': failed,
+                        'failure_rate': failed / len(rows), 'p50': percentile(durations, 0.5),
+                        'p95': percentile(durations, 0.95), 'peak_rss_kb': max(rss) if rss else None,
+                        'cpu_seconds': sum(cpu) / len(cpu) if cpu else None,
+                        'io_bytes': sum(io) / len(io) if io else None})
+        out.sort(key=lambda s: -s['runs'])
+        return out
+
+
+def format_stats(stats):
+    """One line per app, for the CLI."""
+    lines = [f"{'app':<32} {'runs':>5} {'fail':>6} {'p50':>8} {'p95':>8} {'peak RSS':>9} {'CPU':>8} {'I/O':>9}"]
+    for s in stats:
+        lines.append(f"{(s['name'] or s['app_id'] or '')[:32]:<32} {s['runs']:>5} {s['failure_rate']:>6.0%} "
+                     f"{fmt_seconds(s['p50']):>8} {fmt_seconds(s['p95']):>8} {fmt_kb(s['peak_rss_kb']):>9} "
+                     f"{fmt_seconds(s['cpu_seconds']):>8} {fmt_bytes(s['io_bytes']):>9}")
+    return '\n'.join(lines)
+
+
+def fmt_seconds(v):
+    if v is None:
+        return '-'
+    return f'{v:.1f}s' if v < 120 else f'{v / 60:.1f}m'
+
+
+def fmt_kb(v):
+    return '-' if v is None else f'{v / 1024:.0f} MB'
+
+
+def fmt_bytes(v):
+    return '-' if v is None else f'{v / 1e6:.0f} MB'
+
+
+_history = None
+
+
+def history():
+    """Process-wide RunHistory on HISTORY_DB; queued rows are written out at exit."""
+    global _history
+    if _history is None:
+        _history = RunHistory()
+        atexit.register(_history.close)
+    return _history
@@ -0,0 +1,109 @@
+# ------------------ Dialogs ------------------
+
+from PySide6 import QtCore, QtWidgets
+from ToolWin.History import history, fmt_bytes, fmt_kb, fmt_seconds
+from ToolWin.Workers import resolver
+import json
+import time
+
+PERIODS = (('Last 7 days', 7), ('Last 30 days', 30), ('Last 90 days', 90), ('All', None))
+
+
+def _cell(text, align_right=False):
+    item = QtWidgets.QTableWidgetItem(text)
+    if align_right:
+        item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+    return item
+
+
+def _load(days, app_id):
+    # runs on a resolver thread: the database is never read on the GUI thread
+    since = time.time() - days * 86400 if days else None
+    return history().app_stats(since), history().recent(200, app_id)
+
+
+class HistoryDialog(QtWidgets.QDialog):
+    """Per-app run statistics (p50/p95 duration, failure rate, resources) and the latest runs."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Run History')
+        self.resize(900, 600)
+        self._app_ids = []
+        layout = QtWidgets.QVBoxLayout(self)
+
+        top = QtWidgets.QHBoxLayout()
+        self.period_combo = QtWidgets.QComboBox()
+        for text, days in PERIODS:
+            self.period_combo.addItem(text, days)
+        self.period_combo.setCurrentIndex(1)
+        self.period_combo.currentIndexChanged.connect(lambda *a: self.refresh())
+        top.addWidget(self.period_combo)
+        top.addStretch()
+        refresh = QtWidgets.QPushButton('Refresh')
+        refresh.clicked.connect(self.refresh)
+        top.addWidget(refresh)
+        layout.addLayout(top)
+
+        self.stats_table = QtWidgets.QTableWidget(0, 8)
+        self.stats_table.setHorizontalHeaderLabels(['App', 'Runs', 'Failure rate', 'p50', 'p95', 'Peak RSS', 'CPU (avg)', 'I/O (avg)'])
+        self.stats_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.stats_table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.stats_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.stats_table.itemSelectionChanged.connect(self.refresh)
+        layout.addWidget(self.stats_table, 1)
+
+        self.recent_label = QtWidgets.QLabel('Latest runs')
+        layout.addWidget(self.recent_label)
+        self.recent_table = QtWidgets.QTableWidget(0, 8)
+        self.recent_table.setHorizontalHeaderLabels(['Started', 'Run', 'State', 'Exit', 'Duration', 'Peak RSS', 'CPU', 'I/O'])
+        self.recent_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.recent_table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Stretch)
+        layout.addWidget(self.recent_table, 2)
+        self.refresh()
+
+    def selected_app(self):
+        rows = self.stats_table.selectionModel().selectedRows()
+        return self._app_ids[rows[0].row()] if rows else None
+
+    def refresh(self):
+        app_id = self.selected_app()
+        resolver().submit(self, 'history', _load, (self.period_combo.currentData(), app_id),
+                          lambda result: self._fill(result, app_id))
+
+    def _fill(self, result, app_id):
+        if isinstance(result, Exception):
+            QtWidgets.QMessageBox.warning(self, 'Run History', f'Failed to read the run history: {result}')
+            return
+        stats, recent = result
+        self._fill_stats(stats, app_id)
+        self.recent_label.setText('Latest runs' + (f" of {next((s['name'] for s in stats if s['app_id'] == app_id), app_id)}"
+                                                   if app_id else ''))
+        self.recent_table.setRowCount(len(recent))
+        for r, run in enumerate(recent):
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started'])) if run['started'] else ''
+            name = _cell(run['name'] or '')
+            templates = json.loads(run['templates'] or '{}')
+            name.setToolTip(' '.join(json.loads(run['argv'] or '[]'))
+                            + ''.join(f'\n{k} = {v}' for k, v in templates.items()))
+            io = (run['read_bytes'] or 0) + (run['write_bytes'] or 0) if run['read_bytes'] is not None else None
+            for c, item in enumerate((_cell(stamp), name, _cell(run['state'] or ''),
+                                      _cell('' if run['returncode'] is None else str(run['returncode']), True),
+                                      _cell(fmt_seconds(run['duration']), True), _cell(fmt_kb(run['peak_rss_kb']), True),
+                                      _cell(fmt_seconds(run['cpu_seconds']), True), _cell(fmt_bytes(io), True))):
+                self.recent_table.setItem(r, c, item)
+
+    def _fill_stats(self, stats, app_id):
+        self.stats_table.blockSignals(True)
+        self._app_ids = [s['app_id'] for s in stats]
+        self.stats_table.setRowCount(len(stats))
+        for r, s in enumerate(stats):
+            for c, item in enumerate((_cell(s['name'] or s['app_id'] or ''), _cell(str(s['runs']), True),
+                                      _cell(f"{s['failure_rate']:.0%} ({s['failed']})", True),
+                                      _cell(fmt_seconds(s['p50']), True), _cell(fmt_seconds(s['p95']), True),
+                                      _cell(fmt_kb(s['peak_rss_kb']), True), _cell(fmt_seconds(s['cpu_seconds']), True),
+                                      _cell(fmt_bytes(s['io_bytes']), True))):
+                self.stats_table.setItem(r, c, item)
+            if app_id is not None and s['app_id'] == app_id:
+                self.stats_table.selectRow(r)
+        self.stats_table.blockSignals(False)
@@ -0,0 +1,235 @@
+# ------------------ Icon cache ------------------
+from PySide6 import QtCore, QtGui, QtWidgets
+from collections import OrderedDict
+from config import *
+from ToolWin.Trace import traced
+import hashlib
+import threading
+import os
+import time
+
+
+def decode_image(path, px, max_frames=16):
+    """An image file as a QImage fitting px x px (never enlarged), or None; safe off the GUI thread.
+
+    Of multi-size files (.ico) the smallest frame at least px wide is used, else the largest.
+    """
+    reader = QtGui.QImageReader(str(path))
+    best = None
+    for _ in range(max_frames):
+        img = reader.read()
+        if img.isNull():
+            break
+        side = max(img.width(), img.height())
+        if best is None:
+            best = img
+        else:
+            best_side = max(best.width(), best.height())
+            if (best_side < px and side > best_side) or (px <= side < best_side):
+                best = img
+        if not reader.canRead():
+            break
+    if best is None:
+        return None
+    if best.width() > px or best.height() > px:
+        best = best.scaled(px, px, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+    return best
+
+
+class IconCache:
+    """Shared icon cache.
+
+    Pixmaps are kept in memory keyed by (path, mtime, size, pixel size) so tiles
+    pointing at the same file share one decoded pixmap. Extracted icons are also
+    stored as PNG thumbnails in ICON_CACHE_DIR, capped at ICON_CACHE_MAX_BYTES
+    with least-recently-used eviction.
+    """
+    def __init__(self, cache_dir=ICON_CACHE_DIR, max_bytes=ICON_CACHE_MAX_BYTES, max_entries=ICON_CACHE_MEM_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._mem = OrderedDict()
+        self._disk = None  # name -> [size, last_used], loaded lazily
+        self._disk_bytes = 0
+        self._provider = None
+        self._last = {}  # (path, px) -> last resolved key
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(path, px):
+        """Cache key for a file, or None if it does not exist."""
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        return (os.path.normcase(os.path.abspath(path)), st.st_mtime_ns, st.st_size, int(px))
+
+    def pixmap(self, path, px, kind='exe'):
+        """Return a cached pixmap for an image file (kind='image') or an executable icon."""
+        key = self.key_for(path, px)
+        if key is None:
+            return None
+        img = None if key in self._mem else self.load_disk(key)
+        return self.finish(key, img, kind)
+
+    @traced('icon.finish')
+    def finish(self, key, img=None, kind='exe', fresh=False):
+        """Turn a resolved key (and optional image loaded off-thread) into a pixmap.
+
+        Must run on the GUI thread; falls back to extracting the icon. A `fresh`
+        image was decoded from the source file and is stored as a thumbnail.
+        """
+        self._last[(key[0], key[3])] = key
+        pix = self.cached(key)
+        if pix is not None:
+            return pix
+        if img is not None:
+            return self.put(key, QtGui.QPixmap.fromImage(img), persist=fresh)
+        return self.put(key, self.extract(key[0], key[3], kind))
+
+    @traced('icon.resolve')
+    def resolve(self, candidates, px):
+        """Blocking part of an icon lookup, safe to run in a worker thread.
+
+        Returns (key, kind, QImage or None, fresh) for the first existing candidate
+        path, or None if none exists. The image is the disk thumbnail or, for an image
+        file without one, the file decoded here (fresh); executable icons can only be
+        extracted on the GUI thread (QFileIconProvider), so they come back without one.
+        """
+        for path, kind in candidates:
+            if not path:
+                continue
+            key = self.key_for(path, px)
+            if key is None:
+                continue
+            if key in self._mem:
+                return key, kind, None, False
+            img = self.load_disk(key)
+            if img is None and kind == 'image':
+                img = decode_image(path, px)
+                return key, kind, img, img is not None
+            return key, kind, img, False
+        return None
+
+    def peek(self, path, px):
+        """Last known pixmap for a path without touching the filesystem."""
+        if not path:
+            return None
+        key = self._last.get((os.path.normcase(os.path.abspath(path)), int(px)))
+        return self._mem.get(key) if key else None
+
+    def cached(self, key):
+        pix = self._mem.get(key)
+        if pix is not None:
+            self._mem.move_to_end(key)
+        return pix
+
+    def put(self, key, pix, persist=True):
+        if pix is None or pix.isNull():
+            return None
+        self._mem[key] = pix
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+        if persist:
+            self._save_disk(key, pix)
+        return pix
+
+    def extract(self, path, px, kind='exe'):
+        if kind == 'image':
+            img = decode_image(path, px)
+            return QtGui.QPixmap.fromImage(img) if img is not None else None
+        if self._provider is None:
+            self._provider = QtWidgets.QFileIconProvider()
+        return self._provider.icon(QtCore.QFileInfo(str(path))).pixmap(px, px)
+
+    # ---- disk store ----
+    @staticmethod
+    def _name(key):
+        return hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.png'
+
+    def _load_index(self):
+        with self._lock:
+            if self._disk is None:
+                self._scan()
+
+    def _scan(self):
+        self._disk = {}
+        self._disk_bytes = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.name.endswith('.png') and e.is_file():
+                        st = e.stat()
+                        self._disk[e.name] = [st.st_size, st.st_mtime]
+                        self._disk_bytes += st.st_size
+        except OSError:
+            pass
+
+    def load_disk(self, key):
+        """Load a thumbnail from disk as a QImage (safe to call off the GUI thread)."""
+        self._load_index()
+        name = self._name(key)
+        with self._lock:
+            entry = self._disk.get(name)
+        if entry is None:
+            return None
+        p = self.cache_dir / name
+        img = QtGui.QImage(str(p))
+        with self._lock:
+            if img.isNull():
+                self._drop(name)
+                return None
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+            entry[1] = time.time()
+        return img
+
+    def _save_disk(self, key, pix):
+        self._load_index()
+        name = self._name(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            p = self.cache_dir / name
+            if not pix.save(str(p), 'PNG'):
+                return
+            size = p.stat().st_size
+        except OSError:
+            return
+        with self._lock:
+            old = self._disk.get(name)
+            if old:
+                self._disk_bytes -= old[0]
+            self._disk[name] = [size, time.time()]
+            self._disk_bytes += size
+            self._evict()
+
+    def _evict(self):
+        if self._disk_bytes <= self.max_bytes:
+            return
+        for name, _ in sorted(self._disk.items(), key=lambda kv: kv[1][1]):
+            if self._disk_bytes <= self.max_bytes:
+                break
+            self._drop(name)
+
+    def _drop(self, name):
+        entry = self._disk.pop(name, None)
+        if entry:
+            self._disk_bytes -= entry[0]
+        try:
+            os.remove(self.cache_dir / name)
+        except OSError:
+            pass
+
+
+_icon_cache = None
+
+
+def icon_cache():
+    """Process-wide IconCache (requires a QApplication)."""
+    global _icon_cache
+    if _icon_cache is None:
+        _icon_cache = IconCache()
+    return _icon_cache
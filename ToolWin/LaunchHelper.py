@@ -0,0 +1,298 @@
+# ------------------ Launch helper ------------------
+# A small process started once with the GUI (POSIX only) that spawns the launched
+# tools, so a fork never has to copy the launcher's memory and children never see
+# its file descriptors. Kept free of Qt imports, and the helper side uses only the
+# standard library: it runs as a script, `python LaunchHelper.py <socket fd>`.
+#
+# Protocol: JSON lines over a Unix socketpair.
+#   -> {"op": "spawn", "id": 1, "argv": [...], "command": null, "cwd": null, "env": null, "limits": {...}}
+#   <- {"ev": "started", "id": 1, "pid": 4242}   with the read end of the output pipe attached (SCM_RIGHTS)
+#   <- {"ev": "error", "id": 1, "error": "..."}
+#   <- {"ev": "exited", "id": 1, "returncode": 0}
+#   -> {"op": "kill", "id": 1}
+# An app may set limits, applied before exec by this script run as an exec wrapper
+# (`python LaunchHelper.py --limits <json> -- argv...`, see limited_argv), so no
+# preexec_fn ever runs in a forked copy of a threaded process:
+#   "limits": {"cpu_seconds": 3600, "memory_mb": 8192, "nofile": 4096, "nice": 10}
+# The helper itself is single-threaded: one select loop over the socket and a
+# SIGCHLD wakeup pipe, reaping exited children with waitpid.
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+
+FDS_PER_READ = 16
+SCRIPT = os.path.abspath(__file__)
+
+
+def apply_limits(limits):
+    """Apply resource limits to this process (inherited through exec)."""
+    import resource
+    rl = []
+    if limits.get('cpu_seconds'):
+        rl.append((resource.RLIMIT_CPU, int(limits['cpu_seconds'])))
+    if limits.get('memory_mb'):
+        rl.append((resource.RLIMIT_AS, int(limits['memory_mb']) * 1024 * 1024))
+    if limits.get('nofile'):
+        rl.append((resource.RLIMIT_NOFILE, int(limits['nofile'])))
+    for which, value in rl:
+        soft, hard = resource.getrlimit(which)
+        resource.setrlimit(which, (value if hard == resource.RLIM_INFINITY else min(value, hard), hard))
+    if int(limits.get('nice') or 0):
+        os.nice(int(limits['nice']))
+
+
+def limited_argv(argv, command, limits):
+    """argv running `argv` (or the shell `command`) under `limits`, through this script as exec wrapper."""
+    target = ['/bin/sh', '-c', command] if command is not None else [str(a) for a in argv]
+    return [sys.executable, '-I', SCRIPT, '--limits', json.dumps(limits), '--'] + target
+
+
+def _exec_limited(args):
+    # wrapper side: python LaunchHelper.py --limits <json> -- argv...
+    limits, argv = json.loads(args[1]), args[3:]
+    apply_limits(limits)
+    try:
+        os.execvp(argv[0], argv)
+    except OSError as e:
+        print(f'{argv[0]}: {e}', file=sys.stderr)
+        os._exit(127)
+
+
+# ---- helper side (runs in the helper process) ----
+
+class _Helper:
+    def __init__(self, sock):
+        self.sock = sock
+        self.procs = {}   # id -> Popen
+        self.pids = {}    # pid -> id
+
+    def send(self, msg, fds=()):
+        data = (json.dumps(msg) + '\n').encode('utf-8')
+        if fds:
+            socket.send_fds(self.sock, [data], list(fds))
+        else:
+            self.sock.sendall(data)
+
+    def spawn(self, req):
+        rid = req['id']
+        argv, command = req['argv'], req.get('command')
+        if req.get('limits'):
+            argv, command = limited_argv(argv, command, req['limits']), None
+        r, w = os.pipe()
+        try:
+            kw = dict(cwd=req.get('cwd'), env=req.get('env'), stdin=subprocess.DEVNULL, stdout=w,
+                      stderr=subprocess.STDOUT)
+            if command is not None:
+                proc = subprocess.Popen(command, shell=True, **kw)
+            else:
+                proc = subprocess.Popen(argv, **kw)
+        except Exception as e:
+            os.close(r)
+            self.send({'ev': 'error', 'id': rid, 'error': str(e)})
+            return
+        finally:
+            os.close(w)
+        self.procs[rid] = proc
+        self.pids[proc.pid] = rid
+        try:
+            self.send({'ev': 'started', 'id': rid, 'pid': proc.pid}, [r])
+        finally:
+            os.close(r)
+
+    def reap(self):
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            rid = self.pids.pop(pid, None)
+            if rid is None:
+                continue
+            proc = self.procs.pop(rid)
+            proc.returncode = code = os.waitstatus_to_exitcode(status)
+            try:
+                self.send({'ev': 'exited', 'id': rid, 'returncode': code})
+            except OSError:
+                pass  # the launcher is gone
+
+    def handle(self, req):
+        if req['op'] == 'spawn':
+            self.spawn(req)
+        elif req['op'] == 'kill' and req['id'] in self.procs:
+            # not Popen.kill(): its poll() would reap the child behind reap()'s back
+            try:
+                os.kill(self.procs[req['id']].pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def serve(self):
+        # SIGCHLD only wakes the select loop; children are reaped here, between requests
+        wake_r, wake_w = os.pipe()
+        os.set_blocking(wake_r, False)
+        os.set_blocking(wake_w, False)
+        signal.set_wakeup_fd(wake_w, warn_on_full_buffer=False)
+        signal.signal(signal.SIGCHLD, lambda *a: None)
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        sel.register(wake_r, selectors.EVENT_READ)
+        buf = b''
+        while True:
+            for key, _ in sel.select():
+                if key.fileobj == wake_r:
+                    try:
+                        while os.read(wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                data = self.sock.recv(65536)
+                if not data:
+                    return  # launcher exited: running children keep running
+                buf += data
+                while b'\n' in buf:
+                    line, buf = buf.split(b'\n', 1)
+                    self.handle(json.loads(line))
+            self.reap()
+
+
+# ---- launcher side ----
+
+class HelperProcess:
+    """One started child as seen by the supervisor: pid, an asyncio stdout stream, wait() and kill(),
+    like an asyncio.subprocess.Process."""
+    def __init__(self, client, rid, pid, stdout, exited):
+        self._client = client
+        self._rid = rid
+        self.pid = pid
+        self.stdout = stdout
+        self._exited = exited
+
+    async def wait(self):
+        return await self._exited
+
+    def kill(self):
+        self._client.kill(self._rid)
+
+
+class LaunchHelper:
+    """Client for the helper process; spawn() is a coroutine for the supervisor's loop.
+
+    Replies are read by a thread and handed to the loop. If the helper dies,
+    pending spawns fail with OSError and the supervisor falls back to spawning itself.
+    """
+    def __init__(self):
+        import itertools
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.proc = subprocess.Popen([sys.executable, '-I', SCRIPT, str(child.fileno())], pass_fds=[child.fileno()],
+                                     stdin=subprocess.DEVNULL)
+        child.close()
+        self.sock = parent
+        self.alive = True
+        self._ids = itertools.count(1)
+        self._pending = {}  # id -> (loop, started future, exited future)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._read_loop, name='launch-helper', daemon=True).start()
+
+    async def spawn(self, argv, command=None, cwd=None, env=None, limits=None):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        rid = next(self._ids)
+        started, exited = loop.create_future(), loop.create_future()
+        with self._lock:
+            if not self.alive:
+                raise OSError('launch helper is not running')
+            self._pending[rid] = (loop, started, exited)
+        msg = {'op': 'spawn', 'id': rid, 'argv': [str(a) for a in argv], 'command': command, 'cwd': cwd,
+               'env': dict(env) if env is not None else None, 'limits': limits}
+        self._send(msg)
+        pid, fd = await started
+        reader = asyncio.StreamReader(loop=loop)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader, loop=loop), os.fdopen(fd, 'rb', 0))
+        return HelperProcess(self, rid, pid, reader, exited)
+
+    def kill(self, rid):
+        try:
+            self._send({'op': 'kill', 'id': rid})
+        except OSError:
+            pass
+
+    def _send(self, msg):
+        with self._lock:
+            self.sock.sendall((json.dumps(msg) + '\n').encode('utf-8'))
+
+    def _resolve(self, rid, which, value=None, error=None):
+        with self._lock:
+            entry = self._pending.get(rid)
+            if entry is None:
+                return
+            if which == 'exited' or error is not None:
+                del self._pending[rid]
+        loop, started, exited = entry
+        fut = started if which == 'started' else exited
+
+        def set_result():
+            if not fut.done():
+                fut.set_exception(OSError(error)) if error is not None else fut.set_result(value)
+        loop.call_soon_threadsafe(set_result)
+
+    def _read_loop(self):
+        buf, fds = b'', []
+        try:
+            while True:
+                data, new_fds, _, _ = socket.recv_fds(self.sock, 65536, FDS_PER_READ)
+                if not data:
+                    break
+                buf += data
+                fds += new_fds
+                while b'\n' in buf:
+                    line, buf = buf.split(b'\n', 1)
+                    ev = json.loads(line)
+                    if ev['ev'] == 'started':
+                        self._resolve(ev['id'], 'started', (ev['pid'], fds.pop(0)))
+                    elif ev['ev'] == 'error':
+                        self._resolve(ev['id'], 'started', error=ev['error'])
+                    elif ev['ev'] == 'exited':
+                        self._resolve(ev['id'], 'exited', ev['returncode'])
+        except (OSError, ValueError):
+            pass
+        with self._lock:
+            self.alive = False
+            pending, self._pending = self._pending, {}
+        for rid, (loop, started, exited) in pending.items():
+            for fut in (started, exited):
+                loop.call_soon_threadsafe(lambda f=fut: f.done() or f.set_exception(OSError('launch helper exited')))
+
+    def close(self):
+        with self._lock:
+            self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def start_helper():
+    """Start the helper and hand it to the process-wide supervisor (POSIX only; returns it or None)."""
+    if os.name != 'posix' or not hasattr(socket, 'send_fds'):
+        return None
+    from ToolWin.Supervisor import supervisor
+    try:
+        helper = LaunchHelper()
+    except OSError:
+        return None  # the supervisor keeps spawning children itself
+    supervisor().helper = helper
+    return helper
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--limits':
+        _exec_limited(sys.argv[1:])
+    else:
+        _Helper(socket.socket(fileno=int(sys.argv[1]))).serve()
@@ -1,181 +1,488 @@
-# ------------------ Main Window ------------------
-
-from PySide6 import QtCore, QtGui, QtWidgets
-from ToolWin.HelpFunction import *
-from config import *
-from ToolWin.AddEditAppDialog import AddEditAppDialog
-from ToolWin.AppTile import *
-from ToolWin.TemplatesDialog import TemplatesDialog
-
-class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle('Launcher')
-        self.resize(900, 600)
-        self.cfg = load_config()
-        self.setup_ui()
-
-    def setup_ui(self):
-        w = QtWidgets.QWidget()
-        self.setCentralWidget(w)
-        h = QtWidgets.QHBoxLayout(w)
-
-        left_v = QtWidgets.QVBoxLayout()
-        self.templates_btn = QtWidgets.QPushButton('Add Global Template')
-        self.templates_btn.clicked.connect(self.open_templates)
-        left_v.addWidget(self.templates_btn)
-
-        self.import_btn = QtWidgets.QPushButton('Import Config')
-        self.import_btn.clicked.connect(self.import_config)
-        left_v.addWidget(self.import_btn)
-
-        self.export_btn = QtWidgets.QPushButton('Export Config')
-        self.export_btn.clicked.connect(self.export_config)
-        left_v.addWidget(self.export_btn)
-
-        self.clear_btn = QtWidgets.QPushButton('Clear Config')
-        self.clear_btn.clicked.connect(self.clear_config)
-        left_v.addWidget(self.clear_btn)
-
-        left_v.addStretch()
-        h.addLayout(left_v, 0)
-
-        self.scroll = QtWidgets.QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        container = QtWidgets.QWidget()
-        self.grid = QtWidgets.QGridLayout(container)
-        self.grid.setSpacing(12)
-        self.container = container
-        self.scroll.setWidget(container)
-        h.addWidget(self.scroll, 1)
-
-        self.reload_grid()
-
-    def reload_grid(self):
-        # refresh config from disk
-        self.cfg = load_config()
-        # remove all
-        for i in reversed(range(self.grid.count())):
-            item = self.grid.itemAt(i)
-            if item:
-                w = item.widget()
-                if w:
-                    w.setParent(None)
-        # compute number of columns based on available width of scroll viewport
-        viewport_w = max(200, self.scroll.viewport().width())
-        cols = max(1, viewport_w // DESIRED_TILE_WIDTH)
-        # add '+' button as the first tile
-        add_btn = QtWidgets.QPushButton('+')
-        add_btn.setMinimumSize(160, 100)
-        add_btn.clicked.connect(self.add_app)
-        self.grid.addWidget(add_btn, 0, 0)
-
-        apps = self.cfg.get('apps', [])
-        for idx, app in enumerate(apps):
-            # place starting from index 1 (0 reserved for add button)
-            pos = idx + 1
-            r = pos // cols
-            c = pos % cols
-            tile = AppTile(app, self.cfg)
-            tile.gear_btn.clicked.connect(lambda checked=False, a=app: self.edit_app(a))
-            self.grid.addWidget(tile, r, c)
-        # schedule icon adjustment
-        QtCore.QTimer.singleShot(50, self.adjust_tile_icons)
-
-    def adjust_tile_icons(self):
-        # iterate widgets in layout and adjust icon sizes proportionally to tile width
-        for i in range(self.grid.count()):
-            item = self.grid.itemAt(i)
-            if not item:
-                continue
-            w = item.widget()
-            if not w or not isinstance(w, AppTile):
-                continue
-            tw = w.width() or w.sizeHint().width() or w.minimumWidth()
-            iw = max(24, min(96, int(tw * 0.25)))
-            w.icon_lbl.setFixedSize(iw, iw)
-            w.load_icon()
-
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        # recalc grid (columns) + adjust icons after resize
-        QtCore.QTimer.singleShot(50, self.reload_grid)
-
-    def add_app(self):
-        dlg = AddEditAppDialog(self.cfg, parent=self)
-        if dlg.exec():
-            self.cfg = load_config()
-            self.reload_grid()
-
-    def edit_app(self, app):
-        dlg = AddEditAppDialog(self.cfg, app, parent=self)
-        if dlg.exec():
-            self.cfg = load_config()
-            self.reload_grid()
-
-    def remove_app(self, app):
-        resp = QtWidgets.QMessageBox.question(self, 'Remove', f'Remove {app.get("name")}?')
-        if resp == QtWidgets.QMessageBox.Yes:
-            apps = [a for a in self.cfg.get('apps', []) if a.get('id') != app.get('id')]
-            self.cfg['apps'] = apps
-            save_config(self.cfg)
-            self.reload_grid()
-
-    def remove_app_by_id(self, app_id):
-        apps = [a for a in self.cfg.get('apps', []) if a.get('id') != app_id]
-        old = next((a for a in self.cfg.get('apps', []) if a.get('id') == app_id), None)
-        if old:
-            resp = QtWidgets.QMessageBox.question(self, 'Remove', f'Remove {old.get("name")} ?')
-            if resp != QtWidgets.QMessageBox.Yes:
-                return
-        self.cfg['apps'] = apps
-        save_config(self.cfg)
-        self.reload_grid()
-
-    def export_config(self):
-        p, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Export config to file', str(APP_DIR), 'JSON Files (*.json)')
-        if not p:
-            return
-        try:
-            with open(p, 'w', encoding='utf-8') as f:
-                json.dump(self.cfg, f, ensure_ascii=False, indent=2)
-            QtWidgets.QMessageBox.information(self, 'Export', 'Config exported successfully.')
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, 'Export failed', f'Failed to export: {e}')
-
-    def import_config(self):
-        p, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Import config from file', str(APP_DIR), 'JSON Files (*.json)')
-        if not p:
-            return
-        try:
-            with open(p, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            resp = QtWidgets.QMessageBox.question(self, 'Import', 'Replace current configuration with imported one? (No will merge)')
-            if resp == QtWidgets.QMessageBox.Yes:
-                self.cfg = data
-            else:
-                t = self.cfg.get('templates', {})
-                t.update(data.get('templates', {}))
-                a = self.cfg.get('apps', [])
-                a.extend(data.get('apps', []))
-                self.cfg['templates'] = t
-                self.cfg['apps'] = a
-            save_config(self.cfg)
-            self.reload_grid()
-            QtWidgets.QMessageBox.information(self, 'Import', 'Import completed.')
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, 'Import failed', f'Failed to import: {e}')
-
-    def clear_config(self):
-        resp = QtWidgets.QMessageBox.question(self, 'Clear', 'Clear current configuration file? This will remove all apps and templates.')
-        if resp != QtWidgets.QMessageBox.Yes:
-            return
-        self.cfg = {'apps': [], 'templates': {}}
-        save_config(self.cfg)
-        self.reload_grid()
-
-    def open_templates(self):
-        dlg = TemplatesDialog(self.cfg, parent=self)
-        if dlg.exec():
-            self.cfg = load_config()
-            self.reload_grid()
\ No newline at end of file
+# ------------------ Main Window ------------------
+
+# Dialogs, pipelines, the runs panel and ctypes are imported on first use so
+# the window can paint its first frame before any of them are loaded.
+from PySide6 import QtCore, QtGui, QtWidgets
+from ToolWin.HelpFunction import save_config, delete_app
+from config import *
+from ToolWin.AppTile import AppListModel, AppTileDelegate, AppRole, KeyRole, ADD_KEY, app_key, launch_app, copy_command
+from ToolWin.SearchIndex import SearchIndex
+from ToolWin.ConfigStore import config_store, default_config
+from ToolWin.Model import AppList, TemplateSet, json_default, load_model
+from ToolWin.TemplateEngine import template_engine
+from ToolWin.Trace import traced, tracer
+import json
+import threading
+
+class MainWindow(QtWidgets.QMainWindow):
+    pipeline_event = QtCore.Signal(str, str, object)
+    hash_event = QtCore.Signal(str, object)
+    first_paint = QtCore.Signal()
+    tiles_ready = QtCore.Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle('Launcher')
+        self.resize(900, 600)
+        self.store = config_store()
+        self.cfg = self.store.cfg
+        self._resize_timer = QtCore.QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(80)
+        self._resize_timer.timeout.connect(self.reflow)
+        self._painted = False
+        self.runs_panel = None
+        self.search = SearchIndex()
+        self._search_sync = None
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setInterval(0)
+        self._search_timer.timeout.connect(self._search_sync_step)
+        self.setup_ui()
+        # pick up external edits of the config file; the store only re-reads on real changes
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.addPath(str(CONFIG_FILE.parent))
+        if CONFIG_FILE.exists():
+            self.watcher.addPath(str(CONFIG_FILE))
+        self.watcher.fileChanged.connect(self._on_config_file_changed)
+        self.watcher.directoryChanged.connect(self._on_config_file_changed)
+        self.store.subscribe(self._on_config_changed)
+        self.pipeline_event.connect(self._on_pipeline_event)
+        self._pipeline_thread = None
+        self.hash_event.connect(self._on_hash_event)
+        self._hash_thread = None
+        if self.store.load_error:
+            QtWidgets.QMessageBox.warning(self, 'Config error', f'Failed to read {CONFIG_FILE.name}: {self.store.load_error}\n'
+                                          'A copy was kept next to it with a .corrupt suffix. '
+                                          'Changes are not saved until the file is fixed.')
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            self.first_paint.emit()
+            # tiles and the runs panel are filled in only after the first frame is on screen
+            QtCore.QTimer.singleShot(0, self._after_first_paint)
+
+    def _after_first_paint(self):
+        # the runs panel (asyncio supervisor) is only loaded once the tiles are in
+        self.tiles_ready.connect(self.ensure_runs_panel)
+        if LAUNCH_HELPER:
+            # launched tools are spawned by a small helper process, not forked from this one
+            from ToolWin.LaunchHelper import start_helper
+            threading.Thread(target=start_helper, name='launch-helper-start', daemon=True).start()
+        self.reload_grid()
+
+    def ensure_runs_panel(self):
+        if self.runs_panel is None:
+            from ToolWin.RunLogPanel import RunLogPanel
+            self.runs_panel = RunLogPanel(self)
+            self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.runs_panel)
+            self.runs_panel.hide()
+        return self.runs_panel
+
+    def toggle_runs_panel(self):
+        panel = self.ensure_runs_panel()
+        panel.setVisible(not panel.isVisible())
+
+    def closeEvent(self, event):
+        # fold the edit journal into the main config before exiting
+        try:
+            self.store.close()
+        except Exception:
+            pass
+        super().closeEvent(event)
+
+    def _on_config_file_changed(self, *args):
+        # editors and atomic saves replace the file, which drops it from the watcher
+        if CONFIG_FILE.exists() and str(CONFIG_FILE) not in self.watcher.files():
+            self.watcher.addPath(str(CONFIG_FILE))
+        self.store.refresh()
+
+    def _on_config_changed(self, cfg, version):
+        self.reload_grid()
+
+    def setup_ui(self):
+        w = QtWidgets.QWidget()
+        self.setCentralWidget(w)
+        h = QtWidgets.QHBoxLayout(w)
+
+        left_v = QtWidgets.QVBoxLayout()
+        self.templates_btn = QtWidgets.QPushButton('Add Global Template')
+        self.templates_btn.clicked.connect(self.open_templates)
+        left_v.addWidget(self.templates_btn)
+
+        self.import_btn = QtWidgets.QPushButton('Import Config')
+        self.import_btn.clicked.connect(self.import_config)
+        left_v.addWidget(self.import_btn)
+
+        self.export_btn = QtWidgets.QPushButton('Export Config')
+        self.export_btn.clicked.connect(self.export_config)
+        left_v.addWidget(self.export_btn)
+
+        self.clear_btn = QtWidgets.QPushButton('Clear Config')
+        self.clear_btn.clicked.connect(self.clear_config)
+        left_v.addWidget(self.clear_btn)
+
+        self.pipeline_btn = QtWidgets.QPushButton('Run Pipeline')
+        self.pipeline_btn.clicked.connect(self.run_pipeline)
+        left_v.addWidget(self.pipeline_btn)
+
+        self.hash_btn = QtWidgets.QPushButton('Hash Evidence')
+        self.hash_btn.setToolTip('MD5/SHA1/SHA256 of every file the (non-output) templates point at;\n'
+                                 'the manifest is written to TEMPLATE_OUTPUT_DIR')
+        self.hash_btn.clicked.connect(self.hash_evidence)
+        left_v.addWidget(self.hash_btn)
+
+        self.staging_btn = QtWidgets.QPushButton('Local Staging')
+        self.staging_btn.setCheckable(True)
+        self.staging_btn.setToolTip('Copy inputs on slow storage to a local cache before launching\n'
+                                    'and pass the local copies to the tools')
+        self.staging_btn.clicked.connect(self.toggle_staging)
+        left_v.addWidget(self.staging_btn)
+
+        left_v.addStretch()
+        h.addLayout(left_v, 0)
+
+        # virtualized tile grid: only visible tiles are painted, no per-app widgets
+        self.model = AppListModel(self)
+        self.delegate = AppTileDelegate(self)
+        self.delegate.action.connect(self._on_tile_action)
+        self.view = QtWidgets.QListView()
+        # icon-style wrapping grid; list mode (not IconMode) keeps the uniform-size
+        # layout fast path, so relayouts don't visit every row
+        self.view.setFlow(QtWidgets.QListView.LeftToRight)
+        self.view.setWrapping(True)
+        self.view.setMovement(QtWidgets.QListView.Static)
+        self.view.setResizeMode(QtWidgets.QListView.Adjust)
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.view.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.view.setMouseTracking(True)
+        # scrolling is done explicitly; auto-scroll on every current-index change forces a relayout
+        self.view.setAutoScroll(False)
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(self.delegate)
+        self.view.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.view.customContextMenuRequested.connect(self._tile_context_menu)
+        self.view.installEventFilter(self)
+
+        self.search_edit = QtWidgets.QLineEdit()
+        self.search_edit.setPlaceholderText('Search apps, flags, templates... (Ctrl+K, Enter launches the top hit)')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_search)
+        self.search_edit.returnPressed.connect(self.launch_top_hit)
+        self.search_edit.installEventFilter(self)
+        palette_sc = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+K'), self)
+        palette_sc.activated.connect(self.focus_search)
+
+        right_v = QtWidgets.QVBoxLayout()
+        right_v.addWidget(self.search_edit)
+        right_v.addWidget(self.view, 1)
+        h.addLayout(right_v, 1)
+
+        self.runs_btn = QtWidgets.QPushButton('Runs')
+        self.runs_btn.clicked.connect(self.toggle_runs_panel)
+        left_v.insertWidget(left_v.count() - 1, self.runs_btn)
+
+        self.history_btn = QtWidgets.QPushButton('History')
+        self.history_btn.setToolTip('Per-app run durations (p50/p95), failure rate and resource use')
+        self.history_btn.clicked.connect(self.show_history)
+        left_v.insertWidget(left_v.count() - 1, self.history_btn)
+
+        # span timers on the hot paths; also enabled by FCKCMD_TRACE=1
+        self.trace_btn = QtWidgets.QPushButton('Trace')
+        trace_menu = QtWidgets.QMenu(self.trace_btn)
+        self.trace_action = trace_menu.addAction('Record Spans')
+        self.trace_action.setCheckable(True)
+        self.trace_action.setChecked(tracer().enabled)
+        self.trace_action.toggled.connect(self.toggle_trace)
+        trace_menu.addAction('Export Trace...', self.export_trace)
+        trace_menu.addAction('Clear Spans', tracer().clear)
+        self.trace_btn.setMenu(trace_menu)
+        left_v.insertWidget(left_v.count() - 1, self.trace_btn)
+
+    @traced('reload_grid')
+    def reload_grid(self):
+        # the store is kept current by the watcher and by saves
+        self.cfg = self.store.cfg
+        old_keys = set(self.model._keys)
+        apps = self.cfg['apps']
+        self.model.set_apps(apps)
+        for key in old_keys - set(self.model._keys):
+            template_engine().forget(key)
+        self.reflow()
+        self.staging_btn.setChecked(bool((self.cfg.get('staging') or {}).get('enabled')))
+        # the search index is updated incrementally, a batch per event-loop turn
+        self._search_sync = self.search.sync_steps([(app_key(a, i), a) for i, a in enumerate(apps)])
+        self._search_timer.start()
+        self.tiles_ready.emit()
+
+    def _search_sync_step(self):
+        try:
+            next(self._search_sync)
+        except StopIteration:
+            self._search_timer.stop()
+            self._search_sync = None
+            if self.search_edit.text().strip():
+                self.apply_search(self.search_edit.text())
+
+    @traced('apply_search')
+    def apply_search(self, text):
+        # after the reset there is no current index: Enter then launches row 0, the top hit
+        self.model.set_filter(self.search.search(text))
+        self.view.scrollToTop()
+
+    def focus_search(self):
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+
+    def launch_top_hit(self):
+        if not self.search_edit.text().strip():
+            return
+        index = self.view.currentIndex()
+        if not index.isValid():
+            index = self.model.index(0)
+        app = index.data(AppRole)
+        if app is not None:
+            launch_app(app, self)
+
+    @traced('reflow')
+    def reflow(self):
+        # columns from the view width; the scrollbar is always reserved so it can't make the layout oscillate
+        vw = max(200, self.view.contentsRect().width() - self.view.verticalScrollBar().sizeHint().width())
+        cols = max(1, vw // DESIRED_TILE_WIDTH)
+        tile_w = vw // cols
+        px = max(24, min(96, int(tile_w * 0.25)))
+        grid = QtCore.QSize(tile_w, self.delegate.tile_height(px) + 6)
+        if grid != self.view.gridSize():
+            self.delegate.icon_px = px
+            self.model.set_icon_px(px)
+            self.view.setGridSize(grid)
+
+    def eventFilter(self, obj, event):
+        if obj is self.view and event.type() == QtCore.QEvent.Resize:
+            # coalesce resize bursts (window or dock changes) into one reflow
+            self._resize_timer.start()
+        elif obj is self.search_edit and event.type() == QtCore.QEvent.KeyPress:
+            if event.key() == QtCore.Qt.Key_Escape:
+                self.search_edit.clear()
+                return True
+            if event.key() in (QtCore.Qt.Key_Down, QtCore.Qt.Key_Up):
+                # move through the hits without leaving the search bar
+                step = 1 if event.key() == QtCore.Qt.Key_Down else -1
+                row = min(max(self.view.currentIndex().row() + step, 0), self.model.rowCount() - 1)
+                self.view.setCurrentIndex(self.model.index(row))
+                self.view.scrollTo(self.model.index(row))
+                return True
+        return super().eventFilter(obj, event)
+
+    def _on_tile_action(self, action, index):
+        if action == 'add':
+            self.add_app()
+            return
+        app = index.data(AppRole)
+        if app is None:
+            return
+        if action == 'launch':
+            launch_app(app, self)
+        elif action == 'force':
+            launch_app(app, self, force=True)
+        elif action == 'copy':
+            copy_command(app, self)
+        elif action == 'fanout':
+            self.fanout_app(app)
+        elif action == 'watch':
+            self.watch_app(app)
+        elif action == 'edit':
+            self.edit_app(app)
+        elif action == 'delete':
+            self.remove_app_by_id(app.id)
+
+    def _tile_context_menu(self, pos):
+        index = self.view.indexAt(pos)
+        if not index.isValid() or index.data(KeyRole) == ADD_KEY:
+            return
+        menu = QtWidgets.QMenu(self)
+        actions = [('launch', 'Launch'), ('fanout', 'Fan-out Run...'), ('watch', 'Watch Inputs...'),
+                   ('copy', 'Copy Command'),
+                   ('edit', 'Edit...'), ('delete', 'Delete')]
+        if index.data(AppRole).incremental:
+            actions.insert(1, ('force', 'Launch (even if up to date)'))
+        for action, text in actions:
+            menu.addAction(text, lambda a=action, i=QtCore.QPersistentModelIndex(index): self._on_tile_action(a, QtCore.QModelIndex(i)))
+        menu.exec(self.view.viewport().mapToGlobal(pos))
+
+    def add_app(self):
+        from ToolWin.AddEditAppDialog import AddEditAppDialog
+        dlg = AddEditAppDialog(self.cfg, parent=self)
+        dlg.exec()
+
+    def edit_app(self, app):
+        from ToolWin.AddEditAppDialog import AddEditAppDialog
+        dlg = AddEditAppDialog(self.cfg, app, parent=self)
+        dlg.exec()
+
+    def fanout_app(self, app):
+        from ToolWin.FanOutDialog import FanOutDialog
+        # non-modal and not deleted on close: its runner keeps reporting to it until all items finish
+        dlg = FanOutDialog(self.cfg, app, parent=self)
+        dlg.show()
+
+    def watch_app(self, app):
+        from ToolWin.WatchDialog import WatchDialog
+        # non-modal; closing it stops watching and deletes it
+        dlg = WatchDialog(self.cfg, app, parent=self)
+        dlg.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        dlg.show()
+
+    def show_history(self):
+        from ToolWin.HistoryDialog import HistoryDialog
+        dlg = HistoryDialog(parent=self)
+        dlg.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        dlg.show()
+
+    def toggle_trace(self, on):
+        tracer().enabled = on
+
+    def export_trace(self):
+        if not tracer().spans:
+            QtWidgets.QMessageBox.information(self, 'Export Trace', 'No spans recorded yet: enable Trace > Record Spans first.')
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Export Trace', 'fckcmd-trace.json', 'Chrome trace (*.json)')
+        if not path:
+            return
+        try:
+            n = tracer().export(path)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, 'Export Trace', f'Failed to write trace: {e}')
+            return
+        self.statusBar().showMessage(f'{n} spans written to {path} (open in chrome://tracing or ui.perfetto.dev)', 8000)
+
+    def remove_app(self, app):
+        resp = QtWidgets.QMessageBox.question(self, 'Remove', f'Remove {app.name}?')
+        if resp == QtWidgets.QMessageBox.Yes:
+            delete_app(app.id)
+
+    def remove_app_by_id(self, app_id):
+        old = self.cfg['apps'].by_id(app_id)
+        if old:
+            resp = QtWidgets.QMessageBox.question(self, 'Remove', f'Remove {old.name} ?')
+            if resp != QtWidgets.QMessageBox.Yes:
+                return
+        delete_app(app_id)
+
+    def export_config(self):
+        p, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Export config to file', str(APP_DIR), 'JSON Files (*.json)')
+        if not p:
+            return
+        try:
+            with open(p, 'w', encoding='utf-8') as f:
+                json.dump(self.cfg, f, ensure_ascii=False, indent=2, default=json_default)
+            QtWidgets.QMessageBox.information(self, 'Export', 'Config exported successfully.')
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, 'Export failed', f'Failed to export: {e}')
+
+    def import_config(self):
+        p, _ = QtWidgets.QFileDialog.getOpenFileName(self, 'Import config from file', str(APP_DIR), 'JSON Files (*.json)')
+        if not p:
+            return
+        try:
+            with open(p, 'r', encoding='utf-8') as f:
+                data = load_model(json.load(f))
+            resp = QtWidgets.QMessageBox.question(self, 'Import', 'Replace current configuration with imported one? (No will merge)')
+            if resp != QtWidgets.QMessageBox.Yes:
+                t = TemplateSet(self.cfg['templates'])
+                t.update(data['templates'])
+                a = AppList(self.cfg['apps'])
+                for app in data['apps']:
+                    a.put(app)  # an app imported again replaces the current one instead of duplicating its id
+                data = dict(self.cfg, templates=t, apps=a)
+            # the store hands the saved config back through _on_config_changed
+            save_config(data)
+            QtWidgets.QMessageBox.information(self, 'Import', 'Import completed.')
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, 'Import failed', f'Failed to import: {e}')
+
+    def clear_config(self):
+        resp = QtWidgets.QMessageBox.question(self, 'Clear', 'Clear current configuration file? This will remove all apps and templates.')
+        if resp != QtWidgets.QMessageBox.Yes:
+            return
+        save_config(default_config())
+
+    def open_templates(self):
+        from ToolWin.TemplatesDialog import TemplatesDialog
+        dlg = TemplatesDialog(self.cfg, parent=self)
+        dlg.exec()
+
+    def run_pipeline(self):
+        from ToolWin.Pipeline import PipelineRunner, PipelineError
+        pipelines = self.cfg.get('pipelines', [])
+        if not pipelines:
+            QtWidgets.QMessageBox.information(self, 'Pipelines', 'No pipelines are defined in the configuration.')
+            return
+        if self._pipeline_thread is not None and self._pipeline_thread.is_alive():
+            QtWidgets.QMessageBox.information(self, 'Pipelines', 'A pipeline is already running.')
+            return
+        names = [p.get('name') or p.get('id') for p in pipelines]
+        name, ok = QtWidgets.QInputDialog.getItem(self, 'Run Pipeline', 'Pipeline:', names, 0, False)
+        if not ok:
+            return
+        try:
+            runner = PipelineRunner(pipelines[names.index(name)], self.cfg,
+                                    on_event=lambda sid, state, info: self.pipeline_event.emit(sid, state, info))
+        except PipelineError as e:
+            QtWidgets.QMessageBox.warning(self, 'Pipeline', str(e))
+            return
+        # stages block on their processes, so the scheduler runs on its own thread
+        self._pipeline_thread = threading.Thread(target=lambda: self.pipeline_event.emit('', 'done', runner.run()), daemon=True)
+        self._pipeline_thread.start()
+        self.ensure_runs_panel().show()
+        self.statusBar().showMessage(f'Pipeline {name} started')
+
+    def toggle_staging(self, on):
+        staging = dict(self.cfg.get('staging') or {}, enabled=bool(on))
+        save_config(dict(self.cfg, staging=staging))
+
+    def hash_evidence(self):
+        if self._hash_thread is not None and self._hash_thread.is_alive():
+            return
+        from ToolWin.EvidenceHash import run_hash_stage
+        cfg = self.cfg
+
+        def work():
+            try:
+                progress = lambda files, total, done, size: self.hash_event.emit(
+                    'progress', f'Hashing: {files}/{total} files, {done / 1e6:.0f}/{size / 1e6:.0f} MB')
+                self.hash_event.emit('done', run_hash_stage(cfg, on_progress=progress))
+            except Exception as e:
+                self.hash_event.emit('error', e)
+
+        # the pool blocks until every file is hashed, so it is driven from its own thread
+        self._hash_thread = threading.Thread(target=work, daemon=True)
+        self._hash_thread.start()
+        self.hash_btn.setEnabled(False)
+
+    def _on_hash_event(self, state, info):
+        if state == 'progress':
+            self.statusBar().showMessage(info)
+            return
+        self.hash_btn.setEnabled(True)
+        if state == 'error':
+            QtWidgets.QMessageBox.warning(self, 'Hash Evidence', f'Hashing failed: {info}')
+            return
+        from ToolWin.EvidenceHash import summary as hash_summary
+        rows, manifest = info
+        text = hash_summary(rows)
+        self.statusBar().showMessage(text)
+        if manifest:
+            text += f'\n\nManifest: {manifest}'
+        else:
+            text += '\n\nTEMPLATE_OUTPUT_DIR is not an existing directory: no manifest was written.'
+        QtWidgets.QMessageBox.information(self, 'Hash Evidence', text)
+
+    def _on_pipeline_event(self, stage_id, state, info):
+        if state == 'done':
+            from ToolWin.Pipeline import summary as pipeline_summary
+            self.statusBar().showMessage(f'Pipeline done: {pipeline_summary(info)}')
+            return
+        self.statusBar().showMessage(f'{stage_id}: {info}' if state == 'progress' else f'{stage_id}: {state}')
@@ -0,0 +1,304 @@
+# ------------------ Config model ------------------
+# Typed records for the apps and templates of launcher_config.json. Kept free of Qt imports.
+#
+# The config stays a dict at the top level (pipelines, staging, nodes... pass through as
+# they are), but "apps" is an AppList of AppSpec and "templates" a TemplateSet. Records use
+# __slots__, and ids, flags and template keys are interned, so configs with many apps
+# stay small and repeated strings compare by identity. A config is validated once, in
+# load_model(), when the store reads it; json_default() turns the records back into JSON.
+# Loose values are coerced ("yes" for a flag, a number for a path); an entry that still
+# does not fit is skipped and reported, so one bad app never costs the rest of the config.
+#
+# Keys AppSpec has no field for (limits, watch, timeline, ...) are kept in `extra`, and
+# AppSpec.get() answers like the dict it was loaded from, for code reading optional keys.
+import os
+import sys
+
+_intern = sys.intern
+
+
+class ConfigError(ValueError):
+    """The config does not have the expected shape."""
+
+
+def _text(value, what):
+    if value is None:
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise ConfigError(f'{what}: expected a string, got {type(value).__name__}')
+    return value
+
+
+TRUE_WORDS = ('true', 'yes', 'on', '1')
+FALSE_WORDS = ('false', 'no', 'off', '0', '')
+
+
+def _flag(value, what):
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in TRUE_WORDS + FALSE_WORDS:
+        return value.strip().lower() in TRUE_WORDS
+    raise ConfigError(f'{what}: expected true or false, got {value!r}')
+
+
+def _option(value, what):
+    # exec_mode / shell: an interned string or None (checked against the known values at launch)
+    if value is None or value == '':
+        return None
+    return _intern(_text(value, what))
+
+
+class ArgSpec:
+    """One argument row: a flag (may be empty) and a value that may contain TEMPLATE_* tokens."""
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name='', value=''):
+        self.name = _intern(name)
+        self.value = value
+
+    @classmethod
+    def from_dict(cls, d, what='argument'):
+        if not isinstance(d, dict):
+            raise ConfigError(f'{what}: expected an object, got {type(d).__name__}')
+        return cls(_text(d.get('name'), f'{what}.name'), _text(d.get('value'), f'{what}.value'))
+
+    def to_dict(self):
+        return {'name': self.name, 'value': self.value}
+
+    def __eq__(self, other):
+        return isinstance(other, ArgSpec) and self.name == other.name and self.value == other.value
+
+    def __repr__(self):
+        return f'ArgSpec({self.name!r}, {self.value!r})'
+
+
+class AppSpec:
+    """One configured app. Unknown keys are kept in `extra` and written back unchanged."""
+    __slots__ = ('id', 'name', 'path', 'icon_path', 'run_as_admin', 'quote_values', 'args', 'exec_mode', 'shell',
+                 'cost', 'incremental', 'incremental_hash', 'extra')
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, id=None, name='', path='', icon_path='', run_as_admin=False, quote_values=False, args=(),
+                 exec_mode=None, shell=None, cost=None, incremental=False, incremental_hash=False, extra=None):
+        self.id = _intern(id) if id is not None else None
+        self.name = name
+        self.path = path
+        self.icon_path = icon_path
+        self.run_as_admin = run_as_admin
+        self.quote_values = quote_values
+        self.args = tuple(args)
+        self.exec_mode = exec_mode
+        self.shell = shell
+        self.cost = cost
+        self.incremental = incremental
+        self.incremental_hash = incremental_hash
+        self.extra = extra or {}
+
+    @classmethod
+    def from_dict(cls, d, what='app'):
+        """Validate one JSON app; raises ConfigError naming the offending field."""
+        if not isinstance(d, dict):
+            raise ConfigError(f'{what}: expected an object, got {type(d).__name__}')
+        args = d.get('args') or []
+        if not isinstance(args, list):
+            raise ConfigError(f'{what}.args: expected a list')
+        cost = d.get('cost')
+        if cost is not None and not isinstance(cost, dict):
+            raise ConfigError(f'{what}.cost: expected an object')
+        app_id = d.get('id')
+        return cls(id=_text(app_id, f'{what}.id') if app_id is not None else None,
+                   name=_text(d.get('name'), f'{what}.name'),
+                   path=_text(d.get('path'), f'{what}.path'),
+                   icon_path=_text(d.get('icon_path'), f'{what}.icon_path'),
+                   run_as_admin=_flag(d.get('run_as_admin'), f'{what}.run_as_admin'),
+                   quote_values=_flag(d.get('quote_values'), f'{what}.quote_values'),
+                   args=[ArgSpec.from_dict(a, f'{what}.args[{i}]') for i, a in enumerate(args)],
+                   exec_mode=_option(d.get('exec_mode'), f'{what}.exec_mode'),
+                   shell=_option(d.get('shell'), f'{what}.shell'),
+                   cost=cost or None,
+                   incremental=_flag(d.get('incremental'), f'{what}.incremental'),
+                   incremental_hash=_flag(d.get('incremental_hash'), f'{what}.incremental_hash'),
+                   extra={k: v for k, v in d.items() if k not in cls.FIELDS})
+
+    def to_dict(self):
+        """The JSON form; optional fields only when set."""
+        out = {'id': self.id, 'name': self.name, 'path': self.path, 'icon_path': self.icon_path,
+               'run_as_admin': self.run_as_admin, 'quote_values': self.quote_values}
+        if self.id is None:
+            del out['id']
+        for k in ('exec_mode', 'shell', 'cost'):
+            if getattr(self, k):
+                out[k] = getattr(self, k)
+        if self.incremental or self.incremental_hash:
+            out['incremental'] = self.incremental
+            out['incremental_hash'] = self.incremental_hash
+        out['args'] = [a.to_dict() for a in self.args]
+        out.update(self.extra)
+        return out
+
+    def copy(self):
+        return AppSpec(**{k: getattr(self, k) for k in self.FIELDS}, extra=dict(self.extra))
+
+    @property
+    def title(self):
+        return self.name or os.path.basename(self.path)
+
+    # ---- read-only dict view ----
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __contains__(self, key):
+        return getattr(self, key) is not None if key in self.FIELDS else key in self.extra
+
+    def __eq__(self, other):
+        return isinstance(other, AppSpec) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'AppSpec(id={self.id!r}, name={self.name!r})'
+
+
+class TemplateSet(dict):
+    """TEMPLATE_* key -> value, with interned keys."""
+    __slots__ = ()
+
+    def __init__(self, items=()):
+        super().__init__()
+        self.update(items)
+
+    @classmethod
+    def from_dict(cls, d, what='templates'):
+        if not isinstance(d, dict):
+            raise ConfigError(f'{what}: expected an object, got {type(d).__name__}')
+        return cls((k, _text(v, f'{what}.{k}')) for k, v in d.items())
+
+    def __setitem__(self, key, value):
+        super().__setitem__(_intern(key), value)
+
+    def update(self, items=(), **kw):
+        for k, v in (items.items() if isinstance(items, dict) else items):
+            self[k] = v
+        for k, v in kw.items():
+            self[k] = v
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+
+class AppList(list):
+    """Apps in display order, with an id -> position index for O(1) lookups.
+
+    The index is built on first use and dropped by every change of the list.
+    Should ids repeat (hand-edited or merged configs), lookups find the first one.
+    """
+    __slots__ = ('_index',)
+
+    def __init__(self, apps=()):
+        super().__init__(apps)
+        self._index = None
+
+    def _ids(self):
+        if self._index is None:
+            self._index = {}
+            for i, a in enumerate(self):
+                if a.id is not None:
+                    self._index.setdefault(a.id, i)
+        return self._index
+
+    def by_id(self, app_id):
+        """The app with this id, or None."""
+        i = self._ids().get(app_id)
+        return None if i is None else self[i]
+
+    def put(self, app):
+        """Replace the app with the same id, or append it."""
+        i = self._ids().get(app.id) if app.id is not None else None
+        if i is None:
+            self.append(app)
+        else:
+            self[i] = app
+
+    def remove_id(self, app_id):
+        if app_id in self._ids():
+            # every app with that id, like the edit journal always did
+            self[:] = [a for a in self if a.id != app_id]
+
+
+def _dropping_index(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kw):
+        self._index = None
+        return method(self, *args, **kw)
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse', '__setitem__', '__delitem__',
+              '__iadd__'):
+    setattr(AppList, _name, _dropping_index(_name))
+
+
+def as_app(app):
+    """An AppSpec from an AppSpec or a JSON dict."""
+    return app if isinstance(app, AppSpec) else AppSpec.from_dict(app)
+
+
+def load_model(cfg, problems=None):
+    """Validate a parsed config and return it with typed apps and templates; other keys are kept.
+
+    With a `problems` list, apps and templates that do not validate are skipped and their
+    errors appended to it; without one the first such error is raised. A config whose apps
+    or templates are not a list / object at all always raises ConfigError.
+    """
+    if not isinstance(cfg, dict):
+        raise ConfigError(f'expected a JSON object, got {type(cfg).__name__}')
+    apps = cfg.get('apps') or []
+    if not isinstance(apps, list):
+        raise ConfigError('apps: expected a list')
+    templates = cfg.get('templates') or {}
+    if not isinstance(templates, dict):
+        raise ConfigError(f'templates: expected an object, got {type(templates).__name__}')
+    out = dict(cfg)
+    out['apps'] = AppList()
+    for i, a in enumerate(apps):
+        try:
+            out['apps'].append(a if isinstance(a, AppSpec) else AppSpec.from_dict(a, f'apps[{i}]'))
+        except ConfigError as e:
+            if problems is None:
+                raise
+            problems.append(str(e))
+    if not isinstance(templates, TemplateSet):
+        typed = TemplateSet()
+        for k, v in templates.items():
+            try:
+                typed[k] = _text(v, f'templates.{k}')
+            except ConfigError as e:
+                if problems is None:
+                    raise
+                problems.append(str(e))
+        templates = typed
+    out['templates'] = templates
+    return out
+
+
+def json_default(obj):
+    """json.dump(default=...) hook writing the records in their JSON form."""
+    if isinstance(obj, (AppSpec, ArgSpec)):
+        return obj.to_dict()
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
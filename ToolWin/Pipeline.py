@@ -0,0 +1,222 @@
+# ------------------ Pipelines ------------------
+# Kept free of Qt imports so pipelines can run headless:
+#   python -m ToolWin.Pipeline <pipeline-name-or-id> [--workers N]
+#
+# A pipeline is declared in launcher_config.json next to apps/templates:
+#   "pipelines": [{"id": "triage", "name": "Triage", "max_workers": 3,
+#                  "stages": [{"id": "mft", "app_id": "<app id>"},
+#                             {"id": "evtx", "app_id": "<app id>"},
+#                             {"id": "merge", "app_id": "<app id>", "after": ["mft", "evtx"]}]}]
+#
+# Besides app stages there are built-in stage kinds, run in-process:
+#   {"id": "hash", "kind": "hash", "templates": ["TEMPLATE_MFT_FILE", "TEMPLATE_EVTX"]}
+#       hashes the evidence (see ToolWin.EvidenceHash) and writes the manifest to TEMPLATE_OUTPUT_DIR
+#   {"id": "timeline", "kind": "timeline", "apps": ["<app id>", ...], "after": ["mft", "evtx"]}
+#       merges the apps' CSV outputs into TEMPLATE_OUTPUT_DIR/timeline.csv (see ToolWin.Timeline)
+#   {"id": "stage", "kind": "stage", "templates": ["TEMPLATE_EVTX"]}
+#       copies inputs to the local staging cache up front (see ToolWin.Staging); with staging
+#       enabled, app stages also stage the inputs they use before they start
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import *
+from ToolWin.ConfigStore import config_store
+from ToolWin.Core import build_command
+from ToolWin.ExecMode import app_plan
+from ToolWin.History import run_meta
+from ToolWin.RunCache import run_incremental
+from ToolWin.Scheduler import scheduler
+from ToolWin.Supervisor import supervisor
+import sys
+import time
+
+
+class PipelineError(ValueError):
+    """Invalid pipeline definition (unknown app/stage, dependency cycle)."""
+
+
+def find_pipeline(cfg, key):
+    for p in cfg.get('pipelines', []):
+        if key in (p.get('id'), p.get('name')):
+            return p
+    raise PipelineError(f'No pipeline named {key!r}')
+
+
+def validate(pipeline, cfg):
+    """Check stage references and return stage ids in a topological order."""
+    apps = {a.id for a in cfg['apps']}
+    stages = {s['id']: s for s in pipeline.get('stages', [])}
+    for s in stages.values():
+        if s.get('kind'):
+            if s['kind'] not in STAGE_KINDS:
+                raise PipelineError(f"Stage {s['id']!r}: unknown kind {s['kind']!r}")
+        elif s.get('app_id') not in apps:
+            raise PipelineError(f"Stage {s['id']!r}: unknown app id {s.get('app_id')!r}")
+        for dep in s.get('after', []):
+            if dep not in stages:
+                raise PipelineError(f"Stage {s['id']!r}: unknown dependency {dep!r}")
+    order, state = [], {}
+
+    def visit(sid, stack):
+        if state.get(sid) == 'done':
+            return
+        if state.get(sid) == 'visiting':
+            raise PipelineError('Dependency cycle: ' + ' -> '.join(stack[stack.index(sid):] + [sid]))
+        state[sid] = 'visiting'
+        for dep in stages[sid].get('after', []):
+            visit(dep, stack + [sid])
+        state[sid] = 'done'
+        order.append(sid)
+
+    for sid in stages:
+        visit(sid, [])
+    return order
+
+
+def run_argv(argv, name=None, cost=None, meta=None, command=None):
+    """Default stage runner: run the command supervised, without a shell (unless `command`, a
+    system shell command line, is given), once the scheduler admits its cost, and return its
+    exit code. meta is kept with the run for the history."""
+    run = scheduler().submit(argv, name=name, cost=cost, meta=meta, command=command)
+    supervisor().wait(run)
+    if run.error:
+        raise OSError(run.error)
+    return run.returncode
+
+
+def hash_stage(stage, cfg, progress=None):
+    from ToolWin.EvidenceHash import run_hash_stage, summary
+    on_progress = progress and (lambda files, total, done, size: progress(f'hashed {files}/{total} files'))
+    rows, manifest = run_hash_stage(cfg, stage.get('templates'), on_progress=on_progress)
+    return (1 if any(r['error'] for r in rows) else 0), summary(rows) + (f', manifest {manifest}' if manifest else '')
+
+
+def timeline_stage(stage, cfg, progress=None):
+    from ToolWin.Timeline import timeline_stage
+    return timeline_stage(stage, cfg, progress)
+
+
+def staging_stage(stage, cfg, progress=None):
+    from ToolWin.Staging import stage_templates
+    on_progress = progress and (lambda key, done, total: progress(f'staging {key}: {done / 1e6:.0f}/{total / 1e6:.0f} MB'))
+    staged = stage_templates(cfg, stage.get('templates'), on_progress)
+    return 0, ', '.join(f'{k} -> {v}' for k, v in staged.items()) or 'nothing to stage'
+
+
+# built-in stages: fn(stage, cfg, progress(text)) -> (exit code, description)
+STAGE_KINDS = {'hash': hash_stage, 'timeline': timeline_stage, 'stage': staging_stage}
+
+
+class PipelineRunner:
+    """Runs pipeline stages as soon as their dependencies succeeded.
+
+    Independent stages run concurrently, up to max_workers at a time, so the
+    wall-clock time is bounded by the critical path. Stages depending on a
+    failed stage are skipped. on_event(stage_id, state, info) is called from
+    worker threads with state in started/progress/finished/failed/skipped.
+    """
+    def __init__(self, pipeline, cfg, max_workers=None, runner=run_argv, on_event=None, force=False):
+        self.pipeline = pipeline
+        self.cfg = cfg
+        self.order = validate(pipeline, cfg)
+        self.max_workers = max_workers or pipeline.get('max_workers') or PIPELINE_MAX_WORKERS
+        self.runner = runner
+        self.on_event = on_event or (lambda *a: None)
+        self.force = force
+        self.results = {}
+
+    def app(self, stage):
+        return self.cfg['apps'].by_id(stage['app_id'])
+
+    def command(self, stage):
+        return build_command(self.app(stage), self.cfg)[0]
+
+    def _run_stage(self, stage):
+        if stage.get('kind'):
+            self.on_event(stage['id'], 'started', stage['kind'])
+            t0 = time.monotonic()
+            code, detail = STAGE_KINDS[stage['kind']](stage, self.cfg, lambda text: self.on_event(stage['id'], 'progress', text))
+            self.on_event(stage['id'], 'progress', detail)
+            return code, False, time.monotonic() - t0
+        staging = (self.cfg.get('staging') or {}).get('enabled')
+        if staging:
+            from ToolWin.Staging import app_sources, pin, stage_app, unpin
+            # pinned until the run is queued (and pins them itself), so other stages' staging keeps them
+            held = pin(app_sources(self.app(stage), self.cfg))
+        try:
+            if staging:
+                stage_app(self.app(stage), self.cfg)
+            argv = self.command(stage)
+            self.on_event(stage['id'], 'started', ' '.join(argv))
+            t0 = time.monotonic()
+            app = self.app(stage)
+            meta = run_meta(app, self.cfg, source=f"pipeline:{self.pipeline.get('id')}")
+            p = app_plan(app, argv, batch=True)
+            code, cached = run_incremental(app, self.cfg, argv,
+                                           lambda: self.runner(p['argv'], name=stage['id'], cost=app.get('cost'),
+                                                               meta=meta, command=p['command']),
+                                           name=stage['id'], force=self.force, meta=meta)
+        finally:
+            if staging:
+                unpin(held)
+        return code, cached, time.monotonic() - t0
+
+    def run(self):
+        stages = {s['id']: s for s in self.pipeline.get('stages', [])}
+        waiting = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while waiting or running:
+                for sid in list(waiting):
+                    deps = stages[sid].get('after', [])
+                    if any(self.results.get(d, {}).get('state') in ('failed', 'skipped') for d in deps):
+                        waiting.remove(sid)
+                        self.results[sid] = {'state': 'skipped'}
+                        self.on_event(sid, 'skipped', None)
+                    elif all(self.results.get(d, {}).get('state') == 'finished' for d in deps):
+                        waiting.remove(sid)
+                        running[pool.submit(self._run_stage, stages[sid])] = sid
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    sid = running.pop(fut)
+                    try:
+                        code, cached, elapsed = fut.result()
+                        state = 'finished' if code == 0 else 'failed'
+                        self.results[sid] = {'state': state, 'returncode': code, 'duration': elapsed, 'cached': cached}
+                    except Exception as e:
+                        state = 'failed'
+                        self.results[sid] = {'state': state, 'error': str(e)}
+                    self.on_event(sid, state, self.results[sid])
+        return self.results
+
+
+def summary(results):
+    counts = {}
+    for r in results.values():
+        counts[r['state']] = counts.get(r['state'], 0) + 1
+    text = ', '.join(f'{n} {state}' for state, n in sorted(counts.items()))
+    cached = sum(1 for r in results.values() if r.get('cached'))
+    return text + (f', {cached} up to date' if cached else '')
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(prog='python -m ToolWin.Pipeline', description='Run a configured pipeline headless.')
+    ap.add_argument('pipeline', help='pipeline name or id')
+    ap.add_argument('--workers', type=int, default=None, help='max concurrent stages')
+    ap.add_argument('--force', action='store_true', help='run incremental stages even when up to date')
+    ns = ap.parse_args(argv)
+    cfg = config_store().cfg
+    try:
+        runner = PipelineRunner(find_pipeline(cfg, ns.pipeline), cfg, max_workers=ns.workers, force=ns.force,
+                                on_event=lambda sid, state, info: print(f'[{state}] {sid}' + (f': {info}' if state in ('started', 'progress') else ' (up to date)' if isinstance(info, dict) and info.get('cached') else ''), flush=True))
+    except PipelineError as e:
+        print(e, file=sys.stderr)
+        return 2
+    results = runner.run()
+    print(summary(results))
+    return 0 if all(r['state'] == 'finished' for r in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# ------------------ Run cache ------------------
+# Make-style up-to-date check for apps with "incremental": true. Kept free of Qt imports.
+#
+# The key is a hash of the resolved argv (environment variables expanded, quote_values
+# quoting removed) plus fingerprints of its inputs: the executable and every argument
+# naming an existing path (size + mtime, or the content hash with "incremental_hash":
+# true; directories by their files). The outputs are the files a successful run created
+# or changed under the app's output templates (TEMPLATE_*OUTPUT*/*SAVE*). A later run
+# with the same key is skipped while all of those outputs still exist unchanged.
+from config import *
+from ToolWin.ConfigStore import atomic_write_json, config_store
+from ToolWin.ExecMode import local_path, unquote_powershell
+from ToolWin.TemplateEngine import expand_templates, is_output_template, referenced_templates
+import hashlib
+import json
+import os
+import threading
+import time
+
+HASH_CHUNK = 1024 * 1024
+
+
+def _walk(path, prune=()):
+    """(path, size, mtime_ns) of a file, or of every file below a directory, not descending
+    into the directories in `prune` (normcased absolute paths)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return []
+    if not os.path.isdir(path):
+        return [(path, st.st_size, st.st_mtime_ns)]
+    out = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if os.path.normcase(os.path.abspath(os.path.join(root, d))) not in prune)
+        for name in sorted(files):
+            p = os.path.join(root, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            out.append((p, st.st_size, st.st_mtime_ns))
+    return out
+
+
+def output_paths(app, cfg, overrides=None):
+    """Resolved values of the output templates an app uses."""
+    templates = dict(cfg.get('templates', {}), **(overrides or {}))
+    expanded = expand_templates(templates)
+    return [local_path(expanded[k]) for k in sorted(referenced_templates(app, templates))
+            if is_output_template(k) and expanded.get(k)]
+
+
+class RunCache:
+    """Persistent index of successful runs: key -> argv, outputs, created/last_used.
+
+    Entries unused for max_age_days are dropped, and beyond max_entries the
+    least recently used go first. Content hashes are memoized in the same file
+    by (path, size, mtime) so an unchanged input is read only once.
+    """
+    def __init__(self, path=RUN_CACHE_FILE, max_entries=RUN_CACHE_MAX_ENTRIES, max_age_days=RUN_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.RLock()
+        self._data = None
+        self._sig = None
+
+    def _load(self):
+        # re-read when another process (CLI vs GUI) wrote the index
+        try:
+            st = os.stat(self.path)
+            sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            sig = None
+        if self._data is None or sig != self._sig:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+            self._data.setdefault('runs', {})
+            self._data.setdefault('hashes', {})
+            self._sig = sig
+        return self._data
+
+    def _save(self):
+        data = self._data
+        now = time.time()
+        runs = {k: e for k, e in data['runs'].items() if now - e.get('last_used', 0) <= self.max_age}
+        if len(runs) > self.max_entries:
+            keep = sorted(runs, key=lambda k: runs[k].get('last_used', 0))[-self.max_entries:]
+            runs = {k: runs[k] for k in keep}
+        data['runs'] = runs
+        hashes = data['hashes']
+        if len(hashes) > self.max_entries * 4:
+            data['hashes'] = dict(list(hashes.items())[-self.max_entries * 4:])
+        try:
+            atomic_write_json(self.path, data)
+            st = os.stat(self.path)
+            self._sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass  # a cache that cannot be written only costs a re-run
+
+    def _content_hash(self, path, size, mtime_ns):
+        memo_key = f'{path}|{size}|{mtime_ns}'
+        with self._lock:
+            digest = self._load()['hashes'].get(memo_key)
+        if digest:
+            return digest
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._load()['hashes'][memo_key] = digest
+        return digest
+
+    def key(self, argv, outputs=(), content_hash=False):
+        """Hash of argv and the fingerprints of every existing input path in it.
+
+        Arguments are taken as they reach the tool: quote_values quoting removed and
+        $Env:NAME / %NAME% / $NAME expanded, so C:/Users/$Env:UserName/... inputs are found.
+        """
+        argv = [local_path(unquote_powershell(str(a))) for a in argv]
+        outs = tuple(os.path.normcase(os.path.abspath(p)) for p in outputs)
+        h = hashlib.sha256(json.dumps(argv).encode('utf-8'))
+        for arg in argv:
+            if not arg or os.path.normcase(os.path.abspath(arg)) in outs or not os.path.exists(arg):
+                continue
+            # an input directory containing an output directory: the outputs are not inputs
+            # (an input file that merely lives below an output directory still is one)
+            for path, size, mtime_ns in _walk(arg, outs):
+                h.update(f'\0{path}\0{size}'.encode('utf-8', 'surrogateescape'))
+                try:
+                    h.update((self._content_hash(path, size, mtime_ns) if content_hash else str(mtime_ns)).encode())
+                except OSError:
+                    h.update(b'?')
+        return h.hexdigest()
+
+    def lookup(self, key):
+        """The recorded entry if all of its outputs still exist unchanged, else None."""
+        with self._lock:
+            entry = self._load()['runs'].get(key)
+            if entry is None:
+                return None
+            for path, size, mtime_ns in entry['outputs']:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    st = None
+                if st is None or st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    del self._data['runs'][key]
+                    self._save()
+                    return None
+            entry['last_used'] = time.time()
+            self._save()
+            return entry
+
+    def record(self, key, argv, outputs):
+        with self._lock:
+            now = time.time()
+            self._load()['runs'][key] = {'argv': [str(a) for a in argv], 'outputs': [list(o) for o in outputs],
+                                         'created': now, 'last_used': now}
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._data = {'runs': {}, 'hashes': {}}
+            self._save()
+
+
+def snapshot(paths):
+    return {p: (size, mtime_ns) for root in paths for p, size, mtime_ns in _walk(root)}
+
+
+def produced(before, paths):
+    """Files under paths that are new or changed since the `before` snapshot."""
+    return [(p, size, mtime_ns) for root in paths for p, size, mtime_ns in _walk(root)
+            if before.get(p) != (size, mtime_ns)]
+
+
+def run_incremental(app, cfg, argv, run, overrides=None, name=None, force=False, meta=None):
+    """Call run() (which returns an exit code) unless an identical earlier run is still up to date.
+
+    Returns (exit code, cached). A skipped run is still listed by the supervisor,
+    in state 'cached'. Apps without "incremental" always run.
+    """
+    if not app.incremental:
+        return run(), False
+    cache = run_cache()
+    outputs = output_paths(app, cfg, overrides)
+    key = cache.key(argv, outputs, content_hash=app.incremental_hash)
+    if not force:
+        entry = cache.lookup(key)
+        if entry is not None:
+            from ToolWin.Supervisor import supervisor
+            sup = supervisor()
+            stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+            sup.close_queued(sup.create(argv, name or app.name, meta), 'cached', f'up to date (outputs from {stamp})')
+            return 0, True
+    before = snapshot(outputs)
+    code = run()
+    if code == 0:
+        made = produced(before, outputs)
+        # nothing to check later without outputs, so such runs are never skipped
+        if made:
+            cache.record(key, argv, made)
+    return code, False
+
+
+def launch_incremental(app, argv, cost=None, force=False, meta=None, plan=None):
+    """GUI launch: the up-to-date check hashes inputs, so it runs off the caller's thread.
+
+    argv is what the cache key is built from; plan (see ToolWin.ExecMode.plan) is what runs.
+    """
+    from ToolWin.Pipeline import run_argv
+    cfg = config_store().cfg
+    name = app.name
+    exec_argv, command = (plan['argv'], plan['command']) if plan else (argv, None)
+
+    def work():
+        try:
+            run_incremental(app, cfg, argv, lambda: run_argv(exec_argv, name=name, cost=cost, meta=meta, command=command),
+                            name=name, force=force, meta=meta)
+        except OSError:
+            pass  # the launch error is shown on the run in the Runs panel
+
+    threading.Thread(target=work, daemon=True).start()
+
+
+_run_cache = None
+
+
+def run_cache():
+    """Process-wide RunCache on RUN_CACHE_FILE."""
+    global _run_cache
+    if _run_cache is None:
+        _run_cache = RunCache()
+    return _run_cache
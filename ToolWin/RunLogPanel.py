@@ -0,0 +1,120 @@
+# ------------------ Run log panel ------------------
+from PySide6 import QtCore, QtGui, QtWidgets
+from ToolWin.Supervisor import supervisor
+import os
+
+
+class RunLogPanel(QtWidgets.QDockWidget):
+    """Dock listing supervised runs with the output tail of the selected one.
+
+    Supervisor events arrive on its loop thread and are forwarded through a
+    queued signal; output is not pushed per chunk but polled from the run's
+    ring buffer, so a chatty tool costs at most one repaint per tick.
+    """
+    run_event = QtCore.Signal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__('Runs', parent)
+        self.setObjectName('RunLogPanel')
+        w = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(w)
+        v.setContentsMargins(4, 4, 4, 4)
+
+        self.list = QtWidgets.QListWidget()
+        self.list.currentItemChanged.connect(lambda *a: self._refresh_output(force=True))
+        v.addWidget(self.list, 1)
+
+        self.output = QtWidgets.QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.output.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.output.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        v.addWidget(self.output, 2)
+
+        btns = QtWidgets.QHBoxLayout()
+        self.kill_btn = QtWidgets.QPushButton('Kill')
+        self.kill_btn.clicked.connect(self.kill_selected)
+        btns.addWidget(self.kill_btn)
+        self.open_log_btn = QtWidgets.QPushButton('Open Log File')
+        self.open_log_btn.clicked.connect(self.open_log)
+        btns.addWidget(self.open_log_btn)
+        btns.addStretch()
+        v.addLayout(btns)
+        self.setWidget(w)
+
+        self._items = {}
+        self._shown = (None, -1)
+        self.run_event.connect(self._on_run_event)
+        supervisor().subscribe(self._forward)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(250)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start()
+        for run in list(supervisor().runs):
+            self._on_run_event('started', run)
+
+    def _forward(self, event, run):
+        # called on the supervisor thread
+        self.run_event.emit(event, run)
+
+    def _on_run_event(self, event, run):
+        item = self._items.get(run.id)
+        if item is None:
+            item = QtWidgets.QListWidgetItem()
+            item.setData(QtCore.Qt.UserRole, run)
+            self._items[run.id] = item
+            self.list.insertItem(0, item)
+            self.list.setCurrentItem(item)
+            self.show()
+        self._update_item(item)
+        self._refresh_output(force=True)
+
+    def _update_item(self, item):
+        run = item.data(QtCore.Qt.UserRole)
+        text = f'#{run.id} {run.name} - {run.state}'
+        if run.returncode is not None:
+            text += f' (exit {run.returncode})'
+        if run.error:
+            text += f': {run.error}'
+        if run.duration is not None:
+            text += f' [{run.duration:.1f}s]'
+        item.setText(text)
+
+    def _selected_run(self):
+        item = self.list.currentItem()
+        return item.data(QtCore.Qt.UserRole) if item else None
+
+    def _tick(self):
+        run = self._selected_run()
+        if run is not None and run.state == 'running':
+            self._update_item(self.list.currentItem())
+        self._refresh_output()
+
+    def _refresh_output(self, force=False):
+        run = self._selected_run()
+        if run is None:
+            self.output.clear()
+            self._shown = (None, -1)
+            return
+        if not force and self._shown == (run.id, run.output.total):
+            return
+        self._shown = (run.id, run.output.total)
+        sb = self.output.verticalScrollBar()
+        at_end = sb.value() >= sb.maximum() - 2
+        self.output.setPlainText(run.output.getvalue().decode('utf-8', errors='replace'))
+        if at_end or force:
+            sb.setValue(sb.maximum())
+
+    def kill_selected(self):
+        run = self._selected_run()
+        if run is None:
+            return
+        if run.state == 'queued':
+            from ToolWin.Scheduler import scheduler
+            scheduler().cancel(run)
+        else:
+            supervisor().kill(run)
+
+    def open_log(self):
+        run = self._selected_run()
+        if run is not None and os.path.exists(run.log_path):
+            QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(str(run.log_path)))
@@ -0,0 +1,216 @@
+# ------------------ Run scheduler ------------------
+# Kept free of Qt imports; every supervised run (GUI launches, pipeline stages,
+# fan-out items) is admitted here against live host budgets.
+#
+# An app declares its cost next to run_as_admin/quote_values/exec_mode:
+#   "cost": {"profile": "io", "cpu": 1, "rss_mb": 2048, "priority": 5}
+# Explicit fields override the profile defaults; apps without a cost are "normal".
+from config import *
+from ToolWin.Supervisor import supervisor
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# cpu: cores kept busy, io: share of one disk's busy time, rss_mb: expected peak memory
+COST_PROFILES = {
+    'light': {'cpu': 0.5, 'io': 0.1, 'rss_mb': 128},
+    'normal': {'cpu': 1.0, 'io': 0.3, 'rss_mb': 512},
+    'cpu': {'cpu': 2.0, 'io': 0.2, 'rss_mb': 1024},
+    'io': {'cpu': 1.0, 'io': 0.8, 'rss_mb': 512},
+    'memory': {'cpu': 1.0, 'io': 0.3, 'rss_mb': 4096},
+}
+SKIP_DISKS = ('loop', 'ram', 'zram', 'sr', 'fd')
+
+
+def cost_of(cost):
+    """Complete a cost dict (or None) from its profile."""
+    cost = cost or {}
+    out = dict(COST_PROFILES.get(cost.get('profile'), COST_PROFILES['normal']))
+    out['priority'] = 0
+    for k in ('cpu', 'io', 'rss_mb', 'priority'):
+        if cost.get(k) is not None:
+            out[k] = float(cost[k]) if k != 'priority' else int(cost[k])
+    return out
+
+
+class HostMonitor:
+    """Samples host load from /proc.
+
+    busy: cores in use (from /proc/stat deltas), mem_avail_mb: MemAvailable,
+    disk_util: busy share of the busiest disk (io_ticks deltas). Values that
+    cannot be read (no /proc, first sample) are None.
+    """
+    def __init__(self, proc='/proc'):
+        self.proc = proc
+        self.cores = os.cpu_count() or 1
+        self._cpu = None
+        self._disk = None
+        self._last = None
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.proc, name)) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _cpu_busy(self):
+        text = self._read('stat')
+        if not text:
+            return None
+        vals = [int(v) for v in text.split('\n', 1)[0].split()[1:9]]
+        total, idle = sum(vals), vals[3] + vals[4]
+        prev, self._cpu = self._cpu, (total, idle)
+        if prev is None or total == prev[0]:
+            return None
+        return (1.0 - (idle - prev[1]) / (total - prev[0])) * self.cores
+
+    def _mem_avail_mb(self):
+        text = self._read('meminfo')
+        for line in (text or '').splitlines():
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) / 1024
+        return None
+
+    def _disk_util(self):
+        text = self._read('diskstats')
+        if not text:
+            return None
+        ticks = {}
+        for line in text.splitlines():
+            f = line.split()
+            if len(f) > 12 and not f[2].startswith(SKIP_DISKS):
+                ticks[f[2]] = int(f[12])
+        now = time.monotonic()
+        prev, self._disk = self._disk, (now, ticks)
+        if prev is None or now == prev[0]:
+            return None
+        wall_ms = (now - prev[0]) * 1000
+        return min(1.0, max([(t - prev[1].get(d, t)) / wall_ms for d, t in ticks.items()] or [0.0]))
+
+    def sample(self):
+        # deltas over very short windows are noise: reuse a sample younger than 250 ms
+        now = time.monotonic()
+        if self._last is not None and now - self._last[0] < 0.25:
+            return self._last[1]
+        s = {'cores': self.cores, 'busy': self._cpu_busy(), 'mem_avail_mb': self._mem_avail_mb(),
+             'disk_util': self._disk_util()}
+        self._last = (now, s)
+        return s
+
+    def rss_mb(self, pid):
+        text = self._read(f'{pid}/status') if pid else None
+        for line in (text or '').splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+        return 0.0
+
+
+class Scheduler:
+    """Admits queued runs from a priority queue against CPU, memory and disk budgets.
+
+    A job starts when its cost fits next to what is running: reserved cores
+    (or measured load, whichever is higher) within cpu_budget of the cores,
+    its peak RSS within MemAvailable minus mem_reserve_mb and the not yet
+    used part of running jobs' RSS, and its io share within io_budget of the
+    busiest disk. Lower-priority jobs may overtake a job that does not fit,
+    until it has waited max_wait seconds. With nothing running the head job
+    always starts, so an oversized job cannot block the queue.
+    """
+    def __init__(self, sup=None, monitor=None, cpu_budget=SCHED_CPU_BUDGET, mem_reserve_mb=SCHED_MEM_RESERVE_MB,
+                 io_budget=SCHED_IO_BUDGET, interval=SCHED_INTERVAL, max_wait=SCHED_MAX_WAIT):
+        self.sup = sup or supervisor()
+        self.monitor = monitor or HostMonitor()
+        self.cpu_budget = cpu_budget
+        self.mem_reserve_mb = mem_reserve_mb
+        self.io_budget = io_budget
+        self.interval = interval
+        self.max_wait = max_wait
+        self._queue = []
+        self._running = {}
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._thread = None
+        self.sup.subscribe(self._on_run)
+
+    def submit(self, argv, name=None, cost=None, cwd=None, env=None, meta=None, command=None):
+        """Queue argv (or a system shell command line) and return its (queued) Run; wait on run.done
+        as with the supervisor."""
+        cost = cost_of(cost)
+        run = self.sup.create(argv, name, meta, command)
+        with self._cv:
+            heapq.heappush(self._queue, (-cost['priority'], next(self._seq), time.monotonic(), run, cost, cwd, env))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='run-scheduler', daemon=True)
+                self._thread.start()
+            self._cv.notify()
+        return run
+
+    def cancel(self, run):
+        """Drop a run that has not started yet. Returns False if it is not queued."""
+        with self._cv:
+            entry = next((e for e in self._queue if e[3] is run), None)
+            if entry is None:
+                return False
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+        self.sup.close_queued(run)
+        return True
+
+    def pending(self):
+        with self._cv:
+            return [e[3] for e in sorted(self._queue)]
+
+    def _on_run(self, event, run):
+        if event == 'finished':
+            with self._cv:
+                if self._running.pop(run.id, None) is not None:
+                    self._cv.notify()
+
+    def _loop(self):
+        with self._cv:
+            while True:
+                if self._queue:
+                    self._admit()
+                # queued jobs wait on load changes too, so poll while anything is queued
+                self._cv.wait(self.interval if self._queue else None)
+
+    def fits(self, cost, s):
+        if not self._running:
+            return True
+        running = list(self._running.values())
+        cpu_used = max(sum(c['cpu'] for _, c in running), s['busy'] or 0.0)
+        if cpu_used + cost['cpu'] > s['cores'] * self.cpu_budget:
+            return False
+        if s['mem_avail_mb'] is not None:
+            unspent = sum(max(0.0, c['rss_mb'] - self.monitor.rss_mb(r.pid)) for r, c in running)
+            if cost['rss_mb'] > s['mem_avail_mb'] - self.mem_reserve_mb - unspent:
+                return False
+        io_used = max(sum(c['io'] for _, c in running), s['disk_util'] or 0.0)
+        return io_used + cost['io'] <= self.io_budget
+
+    def _admit(self):
+        s = self.monitor.sample()
+        now = time.monotonic()
+        for entry in sorted(self._queue):
+            _, _, queued_at, run, cost, cwd, env = entry
+            if self.fits(cost, s):
+                self._queue.remove(entry)
+                self._running[run.id] = (run, cost)
+                self.sup.launch(run, cwd, env)
+            elif now - queued_at > self.max_wait:
+                break  # stop overtaking: this job gets the next capacity that frees up
+        heapq.heapify(self._queue)
+
+
+_scheduler = None
+
+
+def scheduler():
+    """Process-wide Scheduler on top of the process-wide supervisor."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
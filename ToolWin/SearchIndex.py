@@ -0,0 +1,152 @@
+# ------------------ Search index ------------------
+# Kept free of Qt imports; used by the GUI search bar / Ctrl+K palette.
+from collections import defaultdict
+from ToolWin.TemplateEngine import TOKEN_RE
+import ntpath
+import re
+
+WORD_SPLIT_RE = re.compile(r"[\s_\-./\\:]+")
+EMPTY = frozenset()
+
+
+def trigrams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class SearchIndex:
+    """Incremental trigram / word-prefix index over apps.
+
+    Each app is indexed by name, executable basename, argument flags and the
+    TEMPLATE_* keys its values reference. Terms of 3+ characters match as
+    substrings via trigram postings; shorter terms match word prefixes. All
+    terms must match; hits are ranked by the field they matched in.
+    """
+    def __init__(self):
+        self._docs = {}     # key -> (app, fields, blob)
+        self._ranked = {}   # key -> (name, executable) used for ranking
+        self._order = {}    # key -> position in the config
+        self._tri = defaultdict(set)
+        self._prefix = defaultdict(set)
+        self._memo = {}     # terms -> ranked keys, cleared on every index change
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _fields(app):
+        name = app.name.lower()
+        exe = ntpath.basename(app.path).lower()
+        flags = ' '.join(a.name for a in app.args if a.name).lower()
+        templates = ' '.join(sorted({k for a in app.args for k in TOKEN_RE.findall(a.value)})).lower()
+        return name, exe, flags, templates
+
+    def sync(self, items):
+        """Bring the index in line with [(key, app), ...]; only changed apps are reindexed."""
+        for _ in self.sync_steps(items):
+            pass
+
+    def sync_steps(self, items, batch=500):
+        """Same as sync(), yielding after every `batch` reindexed apps so a GUI can spread the work."""
+        keys = set()
+        done = 0
+        for pos, (key, app) in enumerate(items):
+            keys.add(key)
+            self._order[key] = pos
+            doc = self._docs.get(key)
+            if doc is not None and (doc[0] is app or doc[0] == app):
+                continue
+            self.add(key, app)
+            done += 1
+            if done % batch == 0:
+                yield done
+        for key in [k for k in self._docs if k not in keys]:
+            self.remove(key)
+
+    def add(self, key, app):
+        pos = self._order.get(key)
+        if key in self._docs:
+            self.remove(key)  # drops the position too: an edited app keeps its place below
+        self._memo.clear()
+        fields = self._fields(app)
+        blob = '\n'.join(fields)
+        self._docs[key] = (app, fields, blob)
+        self._ranked[key] = fields[:2]
+        self._order[key] = len(self._order) if pos is None else pos
+        for g in trigrams(blob):
+            self._tri[g].add(key)
+        for w in WORD_SPLIT_RE.split(blob):
+            for n in (1, 2):
+                if len(w) >= n:
+                    self._prefix[w[:n]].add(key)
+
+    def remove(self, key):
+        self._memo.clear()
+        doc = self._docs.pop(key, None)
+        self._ranked.pop(key, None)
+        self._order.pop(key, None)
+        if doc is None:
+            return
+        blob = doc[2]
+        for g in trigrams(blob):
+            s = self._tri.get(g)
+            if s is not None:
+                s.discard(key)
+                if not s:
+                    del self._tri[g]
+        for w in WORD_SPLIT_RE.split(blob):
+            for n in (1, 2):
+                s = self._prefix.get(w[:n]) if len(w) >= n else None
+                if s is not None:
+                    s.discard(key)
+                    if not s:
+                        del self._prefix[w[:n]]
+
+    def _candidates(self, term):
+        if len(term) < 3:
+            return self._prefix.get(term, EMPTY)
+        postings = sorted((self._tri.get(g, EMPTY) for g in trigrams(term)), key=len)
+        if not postings or not postings[0]:
+            return EMPTY
+        cands = set(postings[0])
+        for p in postings[1:]:
+            cands &= p
+            if not cands:
+                return EMPTY
+        # trigrams can match out of order: confirm the substring
+        return {k for k in cands if term in self._docs[k][2]}
+
+    def search(self, query, limit=None):
+        """Ranked keys matching every term of the query (None for an empty query)."""
+        terms = tuple(query.lower().split())
+        if not terms:
+            return None
+        ranked = self._memo.get(terms)
+        if ranked is None:
+            ranked = self._memo[terms] = self._rank(terms)
+            if len(self._memo) > 64:
+                del self._memo[next(iter(self._memo))]
+        return ranked[:limit] if limit else list(ranked)
+
+    def _rank(self, terms):
+        cands = None
+        for t in sorted(terms, key=len, reverse=True):
+            found = self._candidates(t)
+            cands = set(found) if cands is None else cands & found
+            if not cands:
+                return []
+        # rank: name prefix > name > executable prefix > executable > flags / template keys
+        ranked_fields = self._ranked
+        score = dict.fromkeys(cands, 0)
+        for t in terms:
+            for k in cands:
+                name, exe = ranked_fields[k]
+                if t in name:
+                    score[k] += 16 if name.startswith(t) else 8
+                elif t in exe:
+                    score[k] += 8 if exe.startswith(t) else 4
+                else:
+                    score[k] += 2
+        # two stable C-level sorts instead of a tuple key per hit
+        ranked = sorted(cands, key=self._order.__getitem__)
+        ranked.sort(key=score.__getitem__, reverse=True)
+        return ranked
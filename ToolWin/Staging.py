@@ -0,0 +1,372 @@
+# ------------------ Evidence staging ------------------
+# Copies evidence on slow storage (network shares, USB collection drives) once to a fast
+# local cache, so every tool reading TEMPLATE_EVTX / TEMPLATE_MFT_FILE reads the local copy.
+# Kept free of Qt imports. Enabled in launcher_config.json:
+#   "staging": {"enabled": true, "dir": "D:/staging", "max_gb": 50, "max_age_days": 7,
+#               "templates": ["TEMPLATE_EVTX", "TEMPLATE_MFT_FILE"]}
+# ("templates" defaults to every non-output template naming an existing path.)
+#
+# Files are copied in STAGING_RANGE_BYTES ranges by a thread pool; each range is
+# hashed while read and verified by re-reading the copy. Once a source is staged,
+# build_command substitutes the staged path for the template value. A source is
+# re-checked (size + mtime of every file) whenever it is staged again, and only
+# changed files are copied. Least recently used sources beyond max_gb, or unused
+# for max_age_days, are evicted, except those a queued or running run still reads
+# (pinned from the run's 'queued' to its 'finished' event, see on_run).
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from ToolWin.ConfigStore import atomic_write_json
+from ToolWin.ExecMode import local_path
+from ToolWin.TemplateEngine import expand_templates, is_output_template, referenced_templates
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class StagingError(OSError):
+    """A staged copy did not verify against its source."""
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(local_path(path)))
+
+
+def _files(src):
+    """{relative path: (size, mtime_ns)} of a file or of every file below a directory."""
+    if not os.path.isdir(src):
+        st = os.stat(src)
+        return {os.path.basename(src): (st.st_size, st.st_mtime_ns)}
+    out = {}
+    for root, dirs, files in os.walk(src):
+        for name in files:
+            p = os.path.join(root, name)
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            out[os.path.relpath(p, src)] = (st.st_size, st.st_mtime_ns)
+    return out
+
+
+def _hash_range(path, start, length, block):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        left = length
+        while left > 0:
+            data = f.read(min(block, left))
+            if not data:
+                break
+            h.update(data)
+            left -= len(data)
+    return h.hexdigest()
+
+
+def _copy_range(src, dst, start, length, block):
+    """Copy one range, hashing what was read, then verify it by re-reading the copy."""
+    h = hashlib.sha256()
+    with open(src, 'rb') as fi, open(dst, 'r+b') as fo:
+        fi.seek(start)
+        fo.seek(start)
+        left = length
+        while left > 0:
+            data = fi.read(min(block, left))
+            if not data:
+                raise StagingError(f'{src} shrank while being staged')
+            h.update(data)
+            fo.write(data)
+            left -= len(data)
+    digest = h.hexdigest()
+    if _hash_range(dst, start, length, block) != digest:
+        raise StagingError(f'Checksum mismatch staging {src} at offset {start}')
+    return digest
+
+
+class StagingCache:
+    """Local copies of source paths, indexed in <dir>/index.json by normalized source path."""
+    def __init__(self, root=STAGING_DIR, max_bytes=STAGING_MAX_BYTES, max_age_days=STAGING_MAX_AGE_DAYS,
+                 workers=STAGING_WORKERS, block=STAGING_BLOCK_BYTES, range_bytes=STAGING_RANGE_BYTES):
+        self.root = str(root)
+        self.index_path = os.path.join(self.root, 'index.json')
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.workers = workers
+        self.block = block
+        self.range_bytes = range_bytes
+        self._lock = threading.RLock()
+        self._src_locks = {}
+        self._index = None
+        self._sig = None
+
+    def signature(self):
+        try:
+            st = os.stat(self.index_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def index(self):
+        # re-read when another process staged something
+        with self._lock:
+            sig = self.signature()
+            if self._index is None or sig != self._sig:
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError):
+                    self._index = {}
+                self._sig = sig
+            return self._index
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        atomic_write_json(self.index_path, self._index)
+        self._sig = self.signature()
+
+    def lookup(self, src):
+        """Staged path of src, or None (no check that the source is unchanged)."""
+        item = self.index().get(_norm(src))
+        return item['path'] if item else None
+
+    def stage(self, src, on_progress=None):
+        """Copy src (file or directory) into the cache unless its copy is current; returns the staged path.
+
+        on_progress(bytes_done, bytes_total) is called from worker threads.
+        """
+        key = _norm(src)
+        with self._lock:
+            src_lock = self._src_locks.setdefault(key, threading.Lock())
+        with src_lock:
+            current = _files(src)
+            item = dict(self.index().get(key) or {})
+            item_id = hashlib.sha1(key.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+            base = os.path.join(self.root, item_id)
+            is_dir = os.path.isdir(src)
+            staged = os.path.join(base, os.path.basename(key.rstrip('\\/')) or 'root')
+            old = item.get('files', {})
+            changed = [rel for rel, sig in current.items() if old.get(rel, [None])[:2] != list(sig)
+                       or not os.path.exists(self._dest(staged, rel, is_dir))]
+            for rel in set(old) - set(current):
+                try:
+                    os.remove(self._dest(staged, rel, is_dir))
+                except OSError:
+                    pass
+            files = {rel: old[rel] for rel in current if rel in old and rel not in changed}
+            total = sum(current[rel][0] for rel in changed)
+            done = [0]
+            done_lock = threading.Lock()
+
+            def progress(n):
+                with done_lock:
+                    done[0] += n
+                    value = done[0]
+                if on_progress:
+                    on_progress(value, total)
+
+            if changed:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    try:
+                        futures = {rel: self._copy_file(pool, os.path.join(src, rel) if is_dir else src,
+                                                        self._dest(staged, rel, is_dir), current[rel], progress)
+                                   for rel in changed}
+                        for rel, (tmp, dst, parts) in futures.items():
+                            digests = [f.result() for f in parts]
+                            size, mtime_ns = current[rel]
+                            os.utime(tmp, ns=(mtime_ns, mtime_ns))
+                            os.replace(tmp, dst)
+                            files[rel] = [size, mtime_ns, hashlib.sha256(''.join(digests).encode()).hexdigest()]
+                    except BaseException:
+                        # let the running ranges finish, then drop the partial copies
+                        pool.shutdown(cancel_futures=True)
+                        for rel in changed:
+                            try:
+                                os.remove(self._dest(staged, rel, is_dir) + '.part')
+                            except OSError:
+                                pass
+                        raise
+            now = time.time()
+            with self._lock:
+                self.index()[key] = {'src': src, 'path': staged, 'bytes': sum(f[0] for f in files.values()),
+                                     'staged': item.get('staged', now) if not changed else now,
+                                     'last_used': now, 'files': files}
+                self._save()
+            return staged
+
+    @staticmethod
+    def _dest(staged, rel, is_dir):
+        return os.path.join(staged, rel) if is_dir else staged
+
+    def _copy_file(self, pool, src, dst, sig, progress):
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + '.part'
+        size = sig[0]
+        with open(tmp, 'wb') as f:
+            f.truncate(size)
+        parts = []
+        for start in range(0, size, self.range_bytes) or [0]:
+            length = min(self.range_bytes, size - start)
+
+            def task(start=start, length=length):
+                digest = _copy_range(src, tmp, start, length, self.block)
+                progress(length)
+                return digest
+            parts.append(pool.submit(task))
+        return tmp, dst, parts
+
+    def evict(self, keep=()):
+        """Drop sources unused for max_age, then least recently used ones beyond max_bytes.
+
+        Sources in `keep` and those pinned by queued or running runs (see pin) are never dropped.
+        """
+        keep = {_norm(k) for k in keep} | pinned()
+        with self._lock:
+            index = self.index()
+            now = time.time()
+            victims = [k for k, it in index.items() if k not in keep and now - it.get('last_used', 0) > self.max_age]
+            left = sorted((k for k in index if k not in victims), key=lambda k: index[k].get('last_used', 0))
+            total = sum(index[k]['bytes'] for k in left)
+            for k in left:
+                if total <= self.max_bytes:
+                    break
+                if k not in keep:
+                    victims.append(k)
+                    total -= index[k]['bytes']
+            for k in victims:
+                shutil.rmtree(os.path.dirname(index[k]['path']), ignore_errors=True)
+                del index[k]
+            if victims:
+                self._save()
+            return len(victims)
+
+
+# ------------------ Pins ------------------
+# normalized source -> number of holders; a run holds the sources behind its template values
+# from 'queued' to 'finished' (on_run), so staging for another run never evicts them.
+_pins = {}
+_pins_lock = threading.Lock()
+_run_pins = {}
+
+
+def pin(sources):
+    """Hold sources against eviction; returns the keys to pass to unpin."""
+    keys = {_norm(s) for s in sources if s}
+    with _pins_lock:
+        for k in keys:
+            _pins[k] = _pins.get(k, 0) + 1
+    return keys
+
+
+def unpin(keys):
+    with _pins_lock:
+        for k in keys:
+            n = _pins.get(k, 0) - 1
+            if n > 0:
+                _pins[k] = n
+            else:
+                _pins.pop(k, None)
+
+
+def pinned():
+    with _pins_lock:
+        return set(_pins)
+
+
+def app_sources(app, cfg):
+    """The paths behind the templates an app uses (what a run of it reads from the staging cache)."""
+    try:
+        expanded = expand_templates(cfg.get('templates', {}))
+    except ValueError:  # a template cycle: staging reports it
+        return []
+    return [local_path(expanded[k]) for k in referenced_templates(app, cfg.get('templates', {}))
+            if expanded.get(k) and not is_output_template(k)]
+
+
+def on_run(event, run):
+    """RunSupervisor listener pinning a run's template values while it is queued or running."""
+    if event == 'queued':
+        values = ((run.meta or {}).get('templates') or {}).values()
+        keys = pin(v for v in values if isinstance(v, str))
+        with _pins_lock:
+            _run_pins[run.id] = keys
+    elif event == 'finished':
+        with _pins_lock:
+            keys = _run_pins.pop(run.id, ())
+        unpin(keys)
+
+
+def settings(cfg):
+    return cfg.get('staging') or {}
+
+
+def enabled(cfg):
+    return bool(settings(cfg).get('enabled'))
+
+
+_caches = {}
+
+
+def staging_cache(cfg=None):
+    """The StagingCache for the config's staging settings (one per directory)."""
+    s = settings(cfg or {})
+    root = str(s.get('dir') or STAGING_DIR)
+    cache = _caches.get(root)
+    if cache is None:
+        cache = _caches[root] = StagingCache(root)
+    cache.max_bytes = int(float(s.get('max_gb', STAGING_MAX_BYTES / 1024 ** 3)) * 1024 ** 3)
+    cache.max_age = float(s.get('max_age_days', STAGING_MAX_AGE_DAYS)) * 86400
+    return cache
+
+
+_memo = {}
+
+
+def staged_templates(cfg):
+    """({template: staged path} for templates whose value is staged, index signature)."""
+    cache = staging_cache(cfg)
+    templates = cfg.get('templates', {})
+    sig = cache.signature()
+    memo_key = (cache.root, sig, frozenset(templates.items()))
+    hit = _memo.get(memo_key)
+    if hit is None:
+        index = cache.index() if sig else {}
+        hit = {}
+        if index:
+            for k, v in expand_templates(templates).items():
+                item = index.get(_norm(v)) if v and not is_output_template(k) else None
+                if item:
+                    hit[k] = item['path']
+        _memo.clear()
+        _memo[memo_key] = hit
+    return hit, sig
+
+
+def input_templates(cfg, keys=None):
+    """Templates to stage: `keys`, the configured list, or every non-output template naming an existing path."""
+    keys = keys or settings(cfg).get('templates')
+    expanded = expand_templates(cfg.get('templates', {}))
+    keys = keys or [k for k in sorted(expanded) if not is_output_template(k)]
+    paths = [(k, local_path(expanded.get(k) or '')) for k in keys]
+    return [(k, path) for k, path in paths if path and os.path.exists(path)]
+
+
+def stage_templates(cfg, keys=None, on_progress=None):
+    """Stage the inputs behind `keys` and evict old data. Returns {template: staged path}."""
+    cache = staging_cache(cfg)
+    out = {}
+    for k, src in input_templates(cfg, keys):
+        out[k] = cache.stage(src, on_progress and (lambda done, total, k=k: on_progress(k, done, total)))
+    cache.evict(keep=[src for _, src in input_templates(cfg, list(out))])
+    return out
+
+
+def stage_app(app, cfg, on_progress=None):
+    """Stage the input templates one app uses (if staging is enabled)."""
+    if not enabled(cfg):
+        return {}
+    used = referenced_templates(app, cfg.get('templates', {}))
+    configured = settings(cfg).get('templates')
+    keys = [k for k in sorted(used) if not is_output_template(k) and (not configured or k in configured)]
+    return stage_templates(cfg, keys, on_progress) if keys else {}
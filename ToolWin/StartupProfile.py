@@ -0,0 +1,68 @@
+# ------------------ Startup profiling ------------------
+# python main.py --profile-startup
+# Kept free of Qt imports so it can be installed before PySide6 is loaded.
+import builtins
+import sys
+import time
+
+
+class StartupProfiler:
+    """Records first-time imports and named startup milestones, then prints a breakdown."""
+    def __init__(self, t0=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.marks = []
+        self.imports = []   # (name, inclusive seconds, nesting depth)
+        self._depth = 0
+        self._orig_import = None
+        self._reported = False
+
+    def install(self):
+        self._orig_import = builtins.__import__
+        orig = self._orig_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return orig(name, globals, locals, fromlist, level)
+            depth = self._depth
+            self._depth += 1
+            t = time.perf_counter()
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.imports.append((name, time.perf_counter() - t, depth))
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter()))
+
+    def watch(self, window):
+        """Mark the window's first paint and the end of the progressive tile build, then report."""
+        window.first_paint.connect(lambda: self.mark('first paint'))
+
+        def ready():
+            if not self._reported:
+                self.mark('tiles filled')
+                self.report()
+
+        window.tiles_ready.connect(ready)
+
+    def report(self, out=None, top=15):
+        out = out or sys.stderr
+        self._reported = True
+        self.uninstall()
+        print('--- startup profile ---', file=out)
+        prev = self.t0
+        for label, t in self.marks:
+            print(f'{(t - self.t0) * 1000:8.1f} ms  (+{(t - prev) * 1000:7.1f})  {label}', file=out)
+            prev = t
+        print(f'--- slowest imports (inclusive, top {top}) ---', file=out)
+        for name, dt, depth in sorted((i for i in self.imports if i[2] <= 1), key=lambda i: -i[1])[:top]:
+            print(f'{dt * 1000:8.1f} ms  {"  " * depth}{name}', file=out)
+        out.flush()
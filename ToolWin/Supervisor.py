@@ -0,0 +1,299 @@
+# ------------------ Run supervisor ------------------
+# Kept free of Qt imports so headless code (pipelines, CLI) can supervise runs too.
+from collections import deque
+from config import *
+from ToolWin.Trace import tracer
+import asyncio
+import itertools
+import os
+import threading
+import time
+
+
+class RingBuffer:
+    """Keeps the last `capacity` bytes written to it (thread-safe)."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0     # bytes seen over the whole run
+        self._chunks = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            self.total += len(data)
+            if len(data) > self.capacity:
+                data = data[-self.capacity:]
+            self._chunks.append(data)
+            self._size += len(data)
+            while self._size - len(self._chunks[0]) >= self.capacity:
+                self._size -= len(self._chunks.popleft())
+
+    def getvalue(self):
+        with self._lock:
+            data = b''.join(self._chunks)
+        return data[-self.capacity:]
+
+    def since(self, offset):
+        """(bytes written after `offset` that are still held, total written); older ones are gone."""
+        with self._lock:
+            data, total = b''.join(self._chunks)[-self.capacity:], self.total
+        return data[max(0, len(data) - (total - offset)):], total
+
+
+class RotatingSpill:
+    """Append-only log file rotated to .1, .2, ... once it exceeds max_bytes."""
+    def __init__(self, path, max_bytes, backups):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._f = None
+        self._size = 0
+
+    def write(self, data):
+        if self._f is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._f = open(self.path, 'ab')
+            self._size = self._f.tell()
+        if self._size + len(data) > self.max_bytes and self._size:
+            self._rotate()
+        self._f.write(data)
+        self._size += len(data)
+
+    def _rotate(self):
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f'{self.path.name}.{i}')
+            if src.exists():
+                os.replace(src, self.path.with_name(f'{self.path.name}.{i + 1}'))
+        if self.backups:
+            os.replace(self.path, self.path.with_name(f'{self.path.name}.1'))
+        else:
+            os.remove(self.path)
+        self._f = open(self.path, 'ab')
+        self._size = 0
+
+    def close(self):
+        if self._f is not None:
+            f, self._f = self._f, None
+            try:
+                f.close()
+            except OSError:
+                pass  # buffered output could not be flushed (disk full)
+
+
+class Run:
+    """One supervised process: its argv, state, exit status, timing and output tail.
+
+    meta carries what launched it (app id, template values, origin) for the run history.
+    command, if set, is run through the system shell instead of argv (see ToolWin.ExecMode).
+    """
+    def __init__(self, run_id, argv, name, log_path, buffer_bytes, meta=None, command=None):
+        self.id = run_id
+        self.argv = list(argv)
+        self.name = name or (os.path.basename(str(argv[0])) if argv else '')
+        self.meta = meta or {}
+        self.command = command
+        self.log_path = log_path
+        self.output = RingBuffer(buffer_bytes)
+        self.state = 'queued'
+        self.pid = None
+        self.returncode = None
+        self.error = None
+        self.started = None
+        self.ended = None
+        self.done = threading.Event()
+        self._proc = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.ended or time.time()) - self.started
+
+
+class RunSupervisor:
+    """Starts processes on an asyncio loop in a background thread.
+
+    Output (stdout and stderr merged) is streamed into a per-run ring buffer of
+    `buffer_bytes` and spilled to a rotating file in `log_dir`, so arbitrarily
+    large tool output never grows memory; if the log file cannot be written
+    (disk full), only the ring buffer is kept. Log files beyond the newest `keep`
+    are deleted as runs are created. Children are always awaited (and so reaped);
+    exit code and duration are recorded on the Run. Listeners are called with
+    (event, run) for 'queued' (caller's thread), 'started' and 'finished' (loop thread). With a `helper` (see ToolWin.LaunchHelper) the
+    children are spawned by that process instead of by this one.
+    """
+    def __init__(self, log_dir=RUN_LOG_DIR, buffer_bytes=RUN_BUFFER_BYTES, spill_bytes=RUN_SPILL_BYTES,
+                 spill_backups=RUN_SPILL_BACKUPS, keep=RUN_KEEP):
+        self.log_dir = Path(log_dir)
+        self.buffer_bytes = buffer_bytes
+        self.spill_bytes = spill_bytes
+        self.spill_backups = spill_backups
+        self.keep = keep
+        self.runs = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._listeners = []
+        self.helper = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='run-supervisor', daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def subscribe(self, fn):
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _emit(self, event, run):
+        for fn in list(self._listeners):
+            try:
+                fn(event, run)
+            except Exception:
+                pass
+
+    def create(self, argv, name=None, meta=None, command=None):
+        """Register a queued Run without starting it (see launch)."""
+        run_id = next(self._ids)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        run = Run(run_id, argv, name, self.log_dir / f'{stamp}-{run_id}.log', self.buffer_bytes, meta, command)
+        self.runs.append(run)
+        self._prune_logs()
+        self._emit('queued', run)
+        return run
+
+    def _prune_logs(self):
+        # the log dir is shared by every session: only the newest `keep` logs (and their rotations) stay
+        try:
+            logs = sorted(self.log_dir.glob('*.log'), key=lambda p: p.stat().st_mtime, reverse=True)
+        except OSError:
+            return
+        live = {run.log_path for run in self.runs}
+        for path in [p for p in logs if p not in live][max(0, self.keep - len(live)):]:
+            for old in [path] + [path.with_name(f'{path.name}.{i}') for i in range(1, self.spill_backups + 1)]:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+    def launch(self, run, cwd=None, env=None):
+        asyncio.run_coroutine_threadsafe(self._supervise(run, cwd, env), self._ensure_loop())
+        return run
+
+    def start(self, argv, name=None, cwd=None, env=None, meta=None):
+        """Start argv (no shell) and return its Run immediately."""
+        return self.launch(self.create(argv, name, meta), cwd, env)
+
+    def close_queued(self, run, state='cancelled', reason='cancelled'):
+        """Finish a run that was never launched (cancelled, or skipped as up to date)."""
+        run.state = state
+        run.error = reason
+        run.ended = time.time()
+        run.done.set()
+        self._emit('finished', run)
+
+    def wait(self, run, timeout=None):
+        """Block until the run finished; returns its exit code (None on timeout or spawn error)."""
+        run.done.wait(timeout)
+        return run.returncode
+
+    def kill(self, run):
+        if run._proc is not None and run.returncode is None:
+            self._loop.call_soon_threadsafe(run._proc.kill)
+
+    async def _spawn_via_helper(self, run, cwd, env, limits):
+        helper = self.helper
+        if helper is None or not helper.alive:
+            return None
+        try:
+            return await helper.spawn(run.argv, run.command, cwd, env, limits)
+        except OSError:
+            if helper.alive:
+                raise  # the child could not be started
+            self.helper = None  # the helper died: spawn here from now on
+            return None
+
+    async def _supervise(self, run, cwd, env):
+        spill = RotatingSpill(run.log_path, self.spill_bytes, self.spill_backups)
+        run.started = time.time()
+        try:
+            limits = run.meta.get('limits')
+            with tracer().span('spawn', run=run.name, helper=self.helper is not None):
+                proc = await self._spawn_via_helper(run, cwd, env, limits)
+                if proc is None:
+                    pipes = dict(cwd=cwd, env=env, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+                                 stderr=asyncio.subprocess.STDOUT)
+                    argv, command = run.argv, run.command
+                    if limits and os.name == 'posix':
+                        # applied by an exec wrapper: no preexec_fn in a fork of this threaded process
+                        from ToolWin.LaunchHelper import limited_argv
+                        argv, command = limited_argv(argv, command, limits), None
+                    if command is not None:
+                        proc = await asyncio.create_subprocess_shell(command, **pipes)
+                    else:
+                        proc = await asyncio.create_subprocess_exec(*[str(a) for a in argv], **pipes)
+        except Exception as e:
+            run.error = str(e)
+            run.state = 'error'
+            run.ended = time.time()
+            run.done.set()
+            self._emit('finished', run)
+            return
+        run._proc = proc
+        run.pid = proc.pid
+        run.state = 'running'
+        self._emit('started', run)
+        try:
+            while True:
+                data = await proc.stdout.read(64 * 1024)
+                if not data:
+                    break
+                run.output.write(data)
+                if spill is not None:
+                    try:
+                        spill.write(data)
+                    except OSError as e:
+                        # disk full or log dir gone: keep draining the pipe into the ring buffer only
+                        spill.close()
+                        spill = None
+                        run.output.write(f'\n[log file disabled: {e}]\n'.encode('utf-8', 'replace'))
+        finally:
+            if spill is not None:
+                spill.close()
+            run.returncode = await proc.wait()
+            run.ended = time.time()
+            run.state = 'finished' if run.returncode == 0 else 'failed'
+            run._proc = None
+            run.done.set()
+            self._emit('finished', run)
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def supervisor():
+    """Process-wide RunSupervisor; every run it supervises is recorded in the run history
+    and keeps its staged inputs pinned in the staging cache until it finished."""
+    global _supervisor
+    if _supervisor is None:
+        # also reached from the launch helper's start thread
+        with _supervisor_lock:
+            if _supervisor is None:
+                from ToolWin.History import history
+                from ToolWin.Staging import on_run as pin_staged
+                sup = RunSupervisor()
+                sup.subscribe(history().on_run)
+                sup.subscribe(pin_staged)
+                _supervisor = sup
+    return _supervisor
@@ -0,0 +1,140 @@
+# ------------------ Template engine ------------------
+# Kept free of Qt imports so it can be used by headless code.
+import re
+
+TOKEN_RE = re.compile(r"(TEMPLATE_[A-Z0-9_]+)")
+
+
+class TemplateCycleError(ValueError):
+    """A template references itself, directly or through other templates."""
+
+
+def compile_value(value):
+    """Split a value into a token program: even items are literals, odd items template keys."""
+    return tuple(TOKEN_RE.split(value)) if value else ('',)
+
+
+def expand_templates(templates):
+    """Resolve templates that reference other templates. Raises TemplateCycleError on cycles."""
+    out = {}
+
+    def expand(key, stack):
+        if key in out:
+            return out[key]
+        if key not in templates:
+            return key
+        if key in stack:
+            raise TemplateCycleError('Template cycle: ' + ' -> '.join(stack[stack.index(key):] + [key]))
+        stack.append(key)
+        pieces = TOKEN_RE.split(str(templates[key]))
+        for i in range(1, len(pieces), 2):
+            pieces[i] = expand(pieces[i], stack)
+        stack.pop()
+        out[key] = ''.join(pieces)
+        return out[key]
+
+    for k in templates:
+        expand(k, [])
+    return out
+
+
+def is_output_template(key):
+    """Templates naming where a tool writes (TEMPLATE_OUTPUT_DIR, TEMPLATE_SAVE_DIR, ...)."""
+    return 'OUTPUT' in key or 'SAVE' in key
+
+
+def referenced_templates(app, templates):
+    """Template keys used by an app, directly or through other templates."""
+    seen, todo = set(), [app.path] + [a.value for a in app.args]
+    while todo:
+        for key in TOKEN_RE.findall(todo.pop()):
+            if key not in seen:
+                seen.add(key)
+                todo.append(templates.get(key, ''))
+    return seen
+
+
+class CompiledApp:
+    __slots__ = ('source', 'path', 'quote', 'args')
+
+    def __init__(self, app):
+        self.source = app
+        self.path = app.path
+        self.quote = app.quote_values
+        self.args = tuple((a.name, compile_value(a.value)) for a in app.args)
+
+    def run(self, expanded):
+        parts = [self.path]
+        for name, prog in self.args:
+            if len(prog) == 1:
+                val = prog[0]
+            else:
+                pieces = list(prog)
+                for i in range(1, len(pieces), 2):
+                    k = pieces[i]
+                    v = expanded.get(k, k)
+                    if self.quote:
+                        v = "'" + v.replace("'", "''") + "'"
+                    pieces[i] = v
+                val = ''.join(pieces)
+            if name:
+                parts.append(name)
+            if val:
+                parts.append(val)
+        return parts
+
+
+class TemplateEngine:
+    """Builds commands from compiled argument programs.
+
+    Each app is compiled once (recompiled only when its config entry is replaced),
+    expanded templates are cached per templates version, and resolved commands
+    are cached by (app id, templates version).
+    """
+    def __init__(self):
+        self._programs = {}   # app id -> CompiledApp
+        self._expanded = (None, None)
+        self._commands = {}   # app id -> (templates version, app, parts)
+
+    def compile(self, app):
+        app_id = app.id
+        prog = self._programs.get(app_id) if app_id else None
+        if prog is None or prog.source is not app:
+            prog = CompiledApp(app)
+            if app_id:
+                self._programs[app_id] = prog
+        return prog
+
+    def expanded(self, templates, version=None):
+        if version is not None and self._expanded[0] == version:
+            return self._expanded[1]
+        exp = expand_templates(templates)
+        if version is not None:
+            self._expanded = (version, exp)
+        return exp
+
+    def build(self, app, templates, version=None):
+        """Return (parts, assembled command) for an AppSpec."""
+        app_id = app.id
+        if version is not None and app_id:
+            hit = self._commands.get(app_id)
+            if hit and hit[0] == version and hit[1] is app:
+                return list(hit[2]), ' '.join(hit[2])
+        parts = self.compile(app).run(self.expanded(templates, version))
+        if version is not None and app_id:
+            self._commands[app_id] = (version, app, tuple(parts))
+        return parts, ' '.join(parts)
+
+    def forget(self, app_id):
+        self._programs.pop(app_id, None)
+        self._commands.pop(app_id, None)
+
+
+_engine = None
+
+
+def template_engine():
+    global _engine
+    if _engine is None:
+        _engine = TemplateEngine()
+    return _engine
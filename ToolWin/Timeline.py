@@ -0,0 +1,269 @@
+# ------------------ Timeline merge ------------------
+# Merges the CSVs written by MFTECmd, EvtxECmd, Hayabusa (or any CSV with a time column)
+# into one time-sorted super-timeline with bounded memory. Kept free of Qt imports:
+#   python main.py timeline [--app "MFT Parse" ...] [--input file.csv ...] [--out timeline.csv]
+# or as a pipeline stage:
+#   {"id": "timeline", "kind": "timeline", "apps": ["<app id>", ...], "after": [...]}
+#
+# Each input is streamed in chunks of TIMELINE_CHUNK_ROWS rows by a spawned worker
+# process, timestamps are normalized to UTC and every chunk is written out as a
+# sorted run; the runs are then merged with heapq (external merge sort).
+# An app may pick the time columns of its CSVs: "timeline": {"time_columns": [...]}.
+# An app's inputs are the CSVs its arguments name (--csvf, -o), else the CSVs at the
+# top level of its output directories (see app_inputs).
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from config import *
+from operator import itemgetter
+from ToolWin.ExecMode import local_path
+from ToolWin.TemplateEngine import compile_value, expand_templates
+import csv
+import datetime
+import glob
+import heapq
+import io
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import tempfile
+
+COLUMNS = ['timestamp', 'source', 'time_field', 'summary', 'file', 'row']
+# name, header columns that identify the tool, time columns, summary columns
+PROFILES = [
+    ('MFT', {'EntryNumber', 'ParentPath'},
+     ['Created0x10', 'LastModified0x10', 'LastRecordChange0x10', 'LastAccess0x10'], ['ParentPath', 'FileName']),
+    ('EVTX', {'EventId', 'Channel'}, ['TimeCreated'],
+     ['EventId', 'Channel', 'Computer', 'MapDescription', 'PayloadData1', 'PayloadData2', 'PayloadData3']),
+    ('Hayabusa', {'RuleTitle'}, ['Timestamp'], ['Level', 'Computer', 'Channel', 'EventID', 'RuleTitle', 'Details']),
+]
+TIME_RE = re.compile(r'(\d{4})[-/](\d{2})[-/](\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,](\d{1,9}))?\s*(Z|[+-]\d{2}:?\d{2})?$')
+SKIP_NAMES = ('timeline', 'evidence_hashes-')
+# arguments naming an app's CSV: a file name inside its output directory (EZ tools) or a full path (Hayabusa)
+CSV_NAME_FLAGS = ('--csvf',)
+CSV_PATH_FLAGS = ('-o', '--output')
+csv.field_size_limit(2 ** 31 - 1)  # EVTX payloads can exceed the 128 KB default
+
+
+def normalize_time(value):
+    """'YYYY-MM-DD HH:MM:SS.fffffff' in UTC (sorts lexically), or None if unparseable."""
+    m = TIME_RE.match(value.strip())
+    if not m:
+        return None
+    y, mo, d, h, mi, s, frac, tz = m.groups()
+    frac = (frac or '')[:7].ljust(7, '0')
+    if tz and tz not in ('Z', '+00:00', '+0000', '-00:00'):
+        sign = 1 if tz[0] == '+' else -1
+        tz = tz[1:].replace(':', '')
+        try:
+            dt = datetime.datetime(int(y), int(mo), int(d), int(h), int(mi), int(s))
+        except ValueError:
+            return None
+        dt -= sign * datetime.timedelta(hours=int(tz[:2]), minutes=int(tz[2:]))
+        return f'{dt:%Y-%m-%d %H:%M:%S}.{frac}'
+    return f'{y}-{mo}-{d} {h}:{mi}:{s}.{frac}'
+
+
+def detect(header, time_columns=None):
+    """(source name, time columns, summary columns) for a CSV header."""
+    cols = set(header)
+    for name, marks, times, summary in PROFILES:
+        if marks <= cols:
+            return name, [c for c in (time_columns or times) if c in cols], [c for c in summary if c in cols]
+    if time_columns:
+        times = [c for c in time_columns if c in cols]
+    else:
+        times = [c for c in header if re.search('time|date', c, re.I)][:1]
+    return None, times, [c for c in header if c not in times]
+
+
+def _write_run(rows, tmp_dir, prefix, n):
+    rows.sort(key=itemgetter(0))
+    path = os.path.join(tmp_dir, f'{prefix}-{n:05d}.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return path
+
+
+def sort_runs(path, tmp_dir, prefix, time_columns=None, chunk_rows=TIMELINE_CHUNK_ROWS, progress=None):
+    """Split one CSV into sorted run files. Runs in a worker process.
+
+    Returns (run paths, events written, rows without a usable timestamp).
+    progress, a queue, receives (path, bytes read) after each chunk.
+    """
+    runs, rows, events, skipped = [], [], 0, 0
+    with open(path, 'rb') as raw:
+        reader = csv.reader(io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline=''))
+        header = next(reader, None)
+        if not header:
+            return runs, 0, 0
+        source, times, summary = detect(header, time_columns)
+        source = source or os.path.splitext(os.path.basename(path))[0]
+        idx = {c: i for i, c in enumerate(header)}
+        t_idx = [(c, idx[c]) for c in times]
+        s_idx = [(c, idx[c]) for c in summary]
+        for line, rec in enumerate(reader, 2):
+            text = ' | '.join(f'{c}={rec[i]}' for c, i in s_idx if i < len(rec) and rec[i])
+            found = False
+            for c, i in t_idx:
+                ts = normalize_time(rec[i]) if i < len(rec) and rec[i] else None
+                if ts:
+                    rows.append((ts, source, c, text, path, line))
+                    found = True
+            if not found:
+                skipped += 1
+            if len(rows) >= chunk_rows:
+                events += len(rows)
+                runs.append(_write_run(rows, tmp_dir, prefix, len(runs)))
+                rows = []
+                if progress is not None:
+                    progress.put((path, raw.tell()))
+        if rows:
+            events += len(rows)
+            runs.append(_write_run(rows, tmp_dir, prefix, len(runs)))
+    if progress is not None:
+        progress.put((path, os.path.getsize(path)))
+    return runs, events, skipped
+
+
+def _read_run(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+
+def merge_runs(runs, out, tmp_dir, fanin=TIMELINE_MERGE_FANIN, on_row=None):
+    """heapq-merge sorted run files into `out`, in several passes when there are more than `fanin`."""
+    level = 0
+    while len(runs) > fanin:
+        merged = []
+        for i in range(0, len(runs), fanin):
+            path = os.path.join(tmp_dir, f'merge{level}-{i // fanin:05d}.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(heapq.merge(*map(_read_run, runs[i:i + fanin]), key=itemgetter(0)))
+            for r in runs[i:i + fanin]:
+                os.remove(r)
+            merged.append(path)
+        runs, level = merged, level + 1
+    n = 0
+    with open(out, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(COLUMNS)
+        for row in heapq.merge(*map(_read_run, runs), key=itemgetter(0)):
+            w.writerow(row)
+            n += 1
+            if on_row is not None and n % 100000 == 0:
+                on_row(n)
+    return n
+
+
+def merge(inputs, out, time_columns=None, workers=None, on_progress=None):
+    """Merge CSV files into one time-sorted timeline at `out`. Returns a stats dict.
+
+    inputs: paths, or (path, time_columns) pairs. on_progress(text) is called from
+    the calling thread.
+    """
+    inputs = [i if isinstance(i, tuple) else (i, time_columns) for i in inputs]
+    report = on_progress or (lambda text: None)
+    total = sum(os.path.getsize(p) for p, _ in inputs) or 1
+    done = {}
+    tmp_dir = tempfile.mkdtemp(prefix='timeline-', dir=os.path.dirname(os.path.abspath(out)))
+    try:
+        runs, events, skipped = [], 0, 0
+        ctx = multiprocessing.get_context(WORKER_START_METHOD)
+        with ctx.Manager() as mgr, ProcessPoolExecutor(max_workers=workers or TIMELINE_WORKERS, mp_context=ctx) as pool:
+            progress = mgr.Queue()
+            pending = {pool.submit(sort_runs, p, tmp_dir, f'run{n:03d}', cols, TIMELINE_CHUNK_ROWS, progress)
+                       for n, (p, cols) in enumerate(inputs)}
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    r, e, s = fut.result()
+                    runs += r
+                    events += e
+                    skipped += s
+                try:
+                    while True:
+                        path, pos = progress.get_nowait()
+                        done[path] = pos
+                except queue.Empty:
+                    pass
+                report(f'Timeline: parsed {sum(done.values()) / total:.0%} of {total / 1e6:.0f} MB, {len(runs)} sorted runs')
+        runs.sort()
+        written = merge_runs(runs, out, tmp_dir, on_row=lambda n: report(f'Timeline: merged {n}/{events} events'))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    report(f'Timeline: {written} events written to {out}')
+    return {'inputs': len(inputs), 'events': written, 'skipped': skipped, 'out': out}
+
+
+def _arg_value(arg, expanded):
+    program = compile_value(arg.value)
+    return local_path(''.join(expanded.get(t, t) if i % 2 else t for i, t in enumerate(program)))
+
+
+def app_inputs(app, cfg):
+    """The CSVs an app writes, with the app's time columns.
+
+    Files named by its arguments (--csvf inside its output directories, a -o/--output path
+    ending in .csv); without those, the CSVs at the top level of its output template
+    directories. Other tools' files further down are never picked up.
+    """
+    from ToolWin.RunCache import output_paths
+    cols = (app.get('timeline') or {}).get('time_columns')
+    roots = output_paths(app, cfg)
+    expanded = expand_templates(cfg.get('templates', {}))
+    named = []
+    for arg in app.args:
+        if arg.name in CSV_NAME_FLAGS:
+            value = _arg_value(arg, expanded)
+            if value:
+                named += [value] if os.path.isabs(value) else [os.path.join(r, value) for r in roots]
+        elif arg.name in CSV_PATH_FLAGS:
+            value = _arg_value(arg, expanded)
+            if value.lower().endswith('.csv'):
+                named.append(value)
+    hits = named
+    if not hits:
+        for root in roots:
+            top = os.path.join(glob.escape(root), '*.csv')
+            hits += [root] if root.lower().endswith('.csv') else sorted(glob.glob(top))
+    found, seen = [], set()
+    for p in hits:
+        p = os.path.abspath(p)
+        if p not in seen and os.path.isfile(p) and not os.path.basename(p).startswith(SKIP_NAMES):
+            seen.add(p)
+            found.append((p, cols))
+    return found
+
+
+def default_output(cfg):
+    from ToolWin.EvidenceHash import output_dir
+    out_dir = output_dir(cfg)
+    return os.path.join(out_dir, 'timeline.csv') if out_dir else None
+
+
+def timeline_stage(stage, cfg, progress=None):
+    """Pipeline stage kind "timeline": merge the CSV outputs of stage["apps"] (and stage["inputs"])."""
+    inputs, seen = [], set()
+    for app_id in stage.get('apps', []):
+        app = cfg['apps'].by_id(app_id)
+        if app is None:
+            raise ValueError(f'Unknown app id {app_id!r}')
+        for p, cols in app_inputs(app, cfg):
+            if p not in seen:
+                seen.add(p)
+                inputs.append((p, cols))
+    for pattern in stage.get('inputs', []):
+        for p in sorted(glob.glob(local_path(pattern))):
+            if os.path.abspath(p) not in seen:
+                seen.add(os.path.abspath(p))
+                inputs.append((os.path.abspath(p), None))
+    out = stage.get('output') or default_output(cfg)
+    if not inputs or not out:
+        return 1, 'no input CSVs found' if not inputs else 'no output path (set "output" or TEMPLATE_OUTPUT_DIR)'
+    stats = merge(inputs, local_path(out), on_progress=progress)
+    return 0, summary(stats)
+
+
+def summary(stats):
+    return f"{stats['events']} events from {stats['inputs']} files ({stats['skipped']} rows without time) -> {stats['out']}"
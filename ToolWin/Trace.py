@@ -0,0 +1,129 @@
+# ------------------ Tracing ------------------
+# Span timers around the hot paths (config load, grid reload and reflow, icon
+# resolution, command building, launch and process spawn). Kept free of Qt imports.
+#
+# Off by default; a disabled span costs one attribute check. Enable with
+#   FCKCMD_TRACE=1 python main.py ...                    (export from the GUI: Trace > Export Trace...)
+#   FCKCMD_TRACE=/tmp/trace.json python main.py run ...  (written there at exit)
+# or with Trace > Record Spans in the GUI. The last TRACE_RING_SPANS spans are kept
+# in memory and exported as Chrome trace-event JSON (chrome://tracing, Perfetto).
+from collections import deque
+from config import *
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = 'FCKCMD_TRACE'
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 't0')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.t0, time.perf_counter_ns() - self.t0, self.args)
+        return False
+
+
+class Tracer:
+    """Ring of recent spans: (name, start ns, duration ns, thread id, args)."""
+    def __init__(self, enabled=False, capacity=TRACE_RING_SPANS):
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+        self._threads = {}  # thread id -> name, for the exported thread lanes
+
+    def span(self, name, **args):
+        """Context manager timing a block: `with tracer().span('reflow', cols=4): ...`."""
+        return _Span(self, name, args or None) if self.enabled else _NO_SPAN
+
+    def add(self, name, start_ns, dur_ns, args=None):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self.spans.append((name, start_ns, dur_ns, tid, args))  # deque.append is thread-safe
+
+    def clear(self):
+        self.spans.clear()
+
+    def chrome_trace(self):
+        """The recorded spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in list(self._threads.items())]
+        for name, start, dur, tid, args in list(self.spans):
+            ev = {'name': name, 'cat': 'fckcmd', 'ph': 'X', 'ts': start / 1000, 'dur': dur / 1000, 'pid': pid, 'tid': tid}
+            if args:
+                ev['args'] = {k: str(v) for k, v in args.items()}
+            events.append(ev)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        """Write the spans as Chrome trace JSON; returns the number of spans written."""
+        doc = self.chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(doc, f)
+        return sum(1 for ev in doc['traceEvents'] if ev['ph'] == 'X')
+
+
+def traced(name=None):
+    """Decorator recording a span per call (named after the function unless `name` is given)."""
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _tracer.add(label, t0, time.perf_counter_ns() - t0)
+        return wrapper
+    return deco
+
+
+_env = os.environ.get(TRACE_ENV, '')
+_tracer = Tracer(enabled=_env not in ('', '0'))
+
+
+def tracer():
+    """Process-wide Tracer (enabled by FCKCMD_TRACE)."""
+    return _tracer
+
+
+def _export_at_exit(path):
+    try:
+        n = _tracer.export(path)
+        print(f'trace: {n} spans written to {path}', file=sys.stderr)
+    except OSError as e:
+        print(f'trace: could not write {path}: {e}', file=sys.stderr)
+
+
+if _env.lower().endswith('.json'):
+    atexit.register(_export_at_exit, _env)
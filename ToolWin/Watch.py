@@ -0,0 +1,322 @@
+# ------------------ Watch mode ------------------
+# Runs an app or pipeline on newly arrived files only, e.g. EvtxECmd over the .evtx files a
+# collection job dropped into TEMPLATE_EVTX since the last batch. Kept free of Qt imports:
+#   python main.py watch "EVTX Parse" [--template TEMPLATE_EVTX] [--pattern "*.evtx"] [--settle 30]
+#
+# The watched directories (the given templates, else every input template naming a
+# directory) are scanned for files that are new or changed since they were processed.
+# Once none of them has changed for `settle` seconds they form a batch: a fresh
+# directory under WATCH_STAGING_DIR with hard links to them (symlinks or copies across
+# devices) is passed in place of the watched template, and output templates get a
+# per-batch subdirectory. Files of a successful batch go into WATCH_INDEX_FILE, so a
+# restart does not process them again; files of a failed batch wait until they change.
+# Headless, the directories are polled every WATCH_POLL_SECONDS; the GUI adds a
+# QFileSystemWatcher so arrivals are seen at once.
+#
+# Defaults per app or pipeline:
+#   "watch": {"templates": ["TEMPLATE_EVTX"], "patterns": ["*.evtx"], "settle": 30}
+from config import *
+from ToolWin.ConfigStore import atomic_write_json
+from ToolWin.Core import build_command, find_app
+from ToolWin.ExecMode import local_path
+from ToolWin.TemplateEngine import expand_templates, is_output_template, referenced_templates
+import fnmatch
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+LABEL_BAD = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def find_target(cfg, key):
+    """('app', app) or ('pipeline', pipeline) by name or id; apps are looked up first."""
+    try:
+        return 'app', find_app(cfg, key)
+    except KeyError:
+        pass
+    from ToolWin.Pipeline import find_pipeline
+    return 'pipeline', find_pipeline(cfg, key)
+
+
+def target_apps(kind, target, cfg):
+    if kind == 'app':
+        return [target]
+    ids = {s.get('app_id') for s in target.get('stages', []) if not s.get('kind')}
+    return [a for a in cfg['apps'] if a.id in ids]
+
+
+def watch_dirs(kind, target, cfg, keys=None):
+    """{template: directory} to watch: the given templates, else every input template the
+    target uses whose value is an existing directory."""
+    templates = cfg.get('templates', {})
+    expanded = expand_templates(templates)
+    used = set().union(*(referenced_templates(a, templates) for a in target_apps(kind, target, cfg)))
+    out = {}
+    for k in keys or sorted(k for k in used if not is_output_template(k)):
+        path = local_path(expanded.get(k, ''))
+        if keys and k not in used:
+            raise ValueError(f"{k} is not used by {target.get('name') or target.get('id')}")
+        if os.path.isdir(path):
+            out[k] = os.path.abspath(path)
+        elif keys:
+            raise ValueError(f'{k} is not an existing directory: {path or "(empty)"}')
+    if not out:
+        raise ValueError('Nothing to watch: no input template names an existing directory')
+    return out
+
+
+def _link(src, dest):
+    # a batch directory must not cost a copy of the evidence when it can be avoided
+    try:
+        os.link(src, dest)
+        return
+    except OSError:
+        pass
+    if os.name == 'posix':
+        try:
+            os.symlink(src, dest)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dest)
+
+
+class WatchIndex:
+    """Persistent index of processed files: watch key -> {path: [size, mtime_ns]}."""
+    def __init__(self, path=WATCH_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self._sig = None
+
+    def _load(self):
+        # re-read when another process (CLI vs GUI) wrote the index
+        try:
+            st = os.stat(self.path)
+            sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            sig = None
+        if self._data is None or sig != self._sig:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+            self._sig = sig
+        return self._data
+
+    def _save(self):
+        try:
+            atomic_write_json(self.path, self._data)
+            st = os.stat(self.path)
+            self._sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass  # an index that cannot be written only costs reprocessing after a restart
+
+    def processed(self, key):
+        with self._lock:
+            return dict(self._load().get(key, {}))
+
+    def add(self, key, files):
+        """Mark files ({path: (size, mtime_ns)}) as processed."""
+        with self._lock:
+            entry = self._load().setdefault(key, {})
+            entry.update({p: list(sig) for p, sig in files.items()})
+            self._save()
+
+    def reset(self, key):
+        with self._lock:
+            self._load().pop(key, None)
+            self._save()
+
+
+class Watcher:
+    """Scans the watched directories and runs the target on each settled batch of new or changed files.
+
+    on_event(state, info) is called from the thread running run()/step() with state in
+    dirs (watch_paths() changed), pending (number of files waiting to settle),
+    batch (files, dir, label), finished/failed (batch result) and error (message).
+    """
+    def __init__(self, kind, target, cfg, templates=None, patterns=None, settle=None, interval=WATCH_POLL_SECONDS,
+                 on_event=None, index=None, runner=None):
+        opts = target.get('watch') or {}
+        self.kind = kind
+        self.target = target
+        self.cfg = cfg
+        self.dirs = watch_dirs(kind, target, cfg, templates or opts.get('templates'))
+        self.patterns = list(patterns or opts.get('patterns') or ['*'])
+        self.settle = float(settle if settle is not None else opts.get('settle', WATCH_SETTLE_SECONDS))
+        self.interval = interval
+        self.on_event = on_event or (lambda *a: None)
+        self.index = index or watch_index()
+        self.runner = runner
+        self.key = f"{kind}:{target.get('id') or target.get('name')}"
+        self.subdirs = set()
+        self.batches = 0
+        self._failed = {}   # path -> (size, mtime_ns) of a failed batch, retried once the file changes
+        self._pending = {}  # path -> (size, mtime_ns, template, when it last changed)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def scan(self):
+        """Matching files not processed in their current state: {path: (size, mtime_ns, template)}."""
+        done = self.index.processed(self.key)
+        out, subdirs = {}, set()
+        for key, root in self.dirs.items():
+            for parent, dirs, files in os.walk(root):
+                subdirs.update(os.path.join(parent, d) for d in dirs)
+                for name in files:
+                    if not any(fnmatch.fnmatch(name, p) for p in self.patterns):
+                        continue
+                    path = os.path.join(parent, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    sig = (st.st_size, st.st_mtime_ns)
+                    if done.get(path) != list(sig) and self._failed.get(path) != sig:
+                        out[path] = sig + (key,)
+        if subdirs != self.subdirs:
+            self.subdirs = subdirs
+            self.on_event('dirs', self.watch_paths())
+        return out
+
+    def watch_paths(self):
+        """Directories a file system watcher should report changes of."""
+        return sorted(set(self.dirs.values()) | self.subdirs)
+
+    def mark_existing(self):
+        """Record every current file as processed without running anything; returns how many."""
+        files = self.scan()
+        self.index.add(self.key, {p: v[:2] for p, v in files.items()})
+        return len(files)
+
+    def step(self):
+        """Scan once and run a batch if one settled. Returns the batch result, or None."""
+        now, wall = time.monotonic(), time.time()
+        pending = {}
+        for path, (size, mtime_ns, key) in self.scan().items():
+            old = self._pending.get(path)
+            if old is not None and old[:2] == (size, mtime_ns):
+                pending[path] = old
+            else:
+                # a file last written long ago (found at startup) has settled already
+                pending[path] = (size, mtime_ns, key, now - max(0.0, min(self.settle, wall - mtime_ns / 1e9)))
+        if len(pending) != len(self._pending):
+            self.on_event('pending', len(pending))
+        self._pending = pending
+        if not pending or now - max(p[3] for p in pending.values()) < self.settle:
+            return None
+        self._pending = {}
+        return self.run_batch({p: v[:3] for p, v in pending.items()})
+
+    def _outputs(self, label):
+        templates = self.cfg.get('templates', {})
+        expanded = expand_templates(templates)
+        used = set().union(*(referenced_templates(a, templates) for a in target_apps(self.kind, self.target, self.cfg)))
+        out = {}
+        for k in sorted(used):
+            if is_output_template(k) and templates.get(k):
+                base = templates[k].rstrip('/\\')
+                out[k] = base + ('\\' if '\\' in base and '/' not in base else '/') + label
+                # only a per-batch subdirectory of an existing output directory is created
+                path = local_path(expanded[k].rstrip('/\\'))
+                if os.path.isabs(path) and os.path.isdir(path):
+                    try:
+                        os.makedirs(os.path.join(path, label), exist_ok=True)
+                    except OSError:
+                        pass  # the tool reports it
+        return out
+
+    def run_batch(self, files):
+        """Stage files ({path: (size, mtime_ns, template)}) into a batch directory and run the target on it."""
+        self.batches += 1
+        label = f"batch-{time.strftime('%Y%m%d-%H%M%S')}-{self.batches}"
+        batch_dir = Path(WATCH_STAGING_DIR) / LABEL_BAD.sub('_', self.key) / label
+        t0 = time.monotonic()
+        overrides = {}
+        try:
+            for key in self.dirs:
+                # a watched template without new files gets an empty directory, not the full one;
+                # lower case, as a TEMPLATE_X in the path would be substituted again
+                (batch_dir / key.lower()).mkdir(parents=True, exist_ok=True)
+                overrides[key] = str(batch_dir / key.lower())
+            for path, (size, mtime_ns, key) in files.items():
+                dest = batch_dir / key.lower() / os.path.relpath(path, self.dirs[key])
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                _link(path, dest)
+            overrides.update(self._outputs(label))
+            self.on_event('batch', {'files': len(files), 'dir': str(batch_dir), 'label': label})
+            code, error = self._launch(overrides, label), None
+        except (OSError, ValueError) as e:
+            code, error = None, str(e)
+        res = {'label': label, 'files': len(files), 'returncode': code, 'duration': time.monotonic() - t0}
+        if error:
+            res['error'] = error
+        if code == 0:
+            self.index.add(self.key, {p: v[:2] for p, v in files.items()})
+            shutil.rmtree(batch_dir, ignore_errors=True)
+        else:
+            # kept for a look at what failed
+            self._failed.update({p: v[:2] for p, v in files.items()})
+            res['dir'] = str(batch_dir)
+        self.on_event('finished' if code == 0 else 'failed', res)
+        return res
+
+    def _launch(self, overrides, label):
+        if self.kind == 'pipeline':
+            from ToolWin.Pipeline import PipelineRunner
+            cfg = dict(self.cfg, templates=dict(self.cfg.get('templates', {}), **overrides))
+            results = PipelineRunner(self.target, cfg).run()
+            return 0 if all(r['state'] == 'finished' for r in results.values()) else 1
+        from ToolWin.ExecMode import app_plan
+        from ToolWin.History import run_meta
+        from ToolWin.Pipeline import run_argv
+        app = self.target
+        parts = build_command(app, self.cfg, overrides)[0]
+        p = app_plan(app, parts if parts[0] else parts[1:], batch=True)
+        return (self.runner or run_argv)(p['argv'], name=f"{app.get('name', '')} [{label}]", cost=app.get('cost'),
+                                         meta=run_meta(app, self.cfg, overrides, source='watch'), command=p['command'])
+
+    def run_once(self):
+        """Process what is there now, once it settled, as one batch; returns its result, or None if nothing is new."""
+        while True:
+            res = self.step()
+            if res is not None or not self._pending:
+                return res
+            time.sleep(min(self.interval, self.settle))
+
+    def run(self):
+        """Watch until stop(); poke() triggers a scan right away (file system notifications)."""
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except (OSError, ValueError) as e:
+                self.on_event('error', str(e))
+            timeout = self.interval
+            if self._pending:
+                last = max(p[3] for p in self._pending.values())
+                timeout = min(timeout, max(0.1, last + self.settle - time.monotonic()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def poke(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+_watch_index = None
+
+
+def watch_index():
+    """Process-wide WatchIndex on WATCH_INDEX_FILE."""
+    global _watch_index
+    if _watch_index is None:
+        _watch_index = WatchIndex()
+    return _watch_index
@@ -0,0 +1,161 @@
+# ------------------ Dialogs ------------------
+
+from PySide6 import QtCore, QtWidgets
+from config import *
+from ToolWin.ExecMode import local_path
+from ToolWin.TemplateEngine import expand_templates, is_output_template, referenced_templates
+from ToolWin.Watch import Watcher
+import os
+import threading
+import time
+
+
+class WatchDialog(QtWidgets.QDialog):
+    """Watch an app's input directories and run it on each settled batch of new files."""
+    watch_event = QtCore.Signal(str, object)
+
+    def __init__(self, cfg, app, parent=None):
+        super().__init__(parent)
+        self.cfg = cfg
+        self.app = app
+        self.setWindowTitle(f"Watch Inputs - {app.get('name', '')}")
+        self.resize(640, 480)
+        self.watcher = None
+        self._thread = None
+        self._fs = QtCore.QFileSystemWatcher(self)
+        # QFileSystemWatcher only says that something changed; the watcher's scan finds out what
+        self._fs.directoryChanged.connect(self._on_fs_change)
+        self.watch_event.connect(self._on_watch_event)
+        # Esc and reject() skip closeEvent; finished is emitted however the dialog goes away
+        self.finished.connect(self._on_finished)
+        opts = app.get('watch') or {}
+        layout = QtWidgets.QVBoxLayout(self)
+
+        form = QtWidgets.QFormLayout()
+        self.template_list = QtWidgets.QListWidget()
+        self.template_list.setFixedHeight(90)
+        templates = cfg.get('templates', {})
+        expanded = expand_templates(templates)
+        for key in sorted(referenced_templates(app, templates)):
+            path = local_path(expanded.get(key, ''))
+            if is_output_template(key) or not os.path.isdir(path):
+                continue
+            item = QtWidgets.QListWidgetItem(f'{key}  ({path})')
+            item.setData(QtCore.Qt.UserRole, key)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if key in opts.get('templates', [key]) else QtCore.Qt.Unchecked)
+            self.template_list.addItem(item)
+        form.addRow('Watch', self.template_list)
+        self.pattern_edit = QtWidgets.QLineEdit(' '.join(opts.get('patterns') or []))
+        self.pattern_edit.setPlaceholderText('*.evtx (space separated; empty: all files)')
+        form.addRow('Files', self.pattern_edit)
+        self.settle_spin = QtWidgets.QSpinBox()
+        self.settle_spin.setRange(0, 3600)
+        self.settle_spin.setSuffix(' s')
+        self.settle_spin.setValue(int(opts.get('settle', WATCH_SETTLE_SECONDS)))
+        form.addRow('Settle window', self.settle_spin)
+        layout.addLayout(form)
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addStretch()
+        self.skip_btn = QtWidgets.QPushButton('Skip Existing Files')
+        self.skip_btn.setToolTip('Mark the files there now as processed')
+        self.skip_btn.clicked.connect(self.skip_existing)
+        self.start_btn = QtWidgets.QPushButton('Start')
+        self.start_btn.clicked.connect(self.toggle)
+        buttons.addWidget(self.skip_btn)
+        buttons.addWidget(self.start_btn)
+        layout.addLayout(buttons)
+
+        self.log = QtWidgets.QPlainTextEdit()
+        self.log.setReadOnly(True)
+        layout.addWidget(self.log, 1)
+
+        if not self.template_list.count():
+            self.log.setPlainText('This app does not use any input template naming an existing directory.')
+            self.start_btn.setEnabled(False)
+            self.skip_btn.setEnabled(False)
+
+    def _make_watcher(self):
+        keys = [self.template_list.item(i).data(QtCore.Qt.UserRole) for i in range(self.template_list.count())
+                if self.template_list.item(i).checkState() == QtCore.Qt.Checked]
+        try:
+            return Watcher('app', self.app, self.cfg, keys, self.pattern_edit.text().split(), self.settle_spin.value(),
+                           on_event=self.watch_event.emit)
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, 'Watch Inputs', str(e))
+            return None
+
+    def _print(self, text):
+        self.log.appendPlainText(f"{time.strftime('%H:%M:%S')}  {text}")
+
+    def skip_existing(self):
+        watcher = self._make_watcher()
+        if watcher is not None:
+            self._print(f'{watcher.mark_existing()} existing file(s) marked as processed')
+
+    def toggle(self):
+        if self.watcher is not None:
+            self.stop()
+            return
+        self.watcher = self._make_watcher()
+        if self.watcher is None:
+            return
+        self._update_paths()
+        # batches block on their runs, so the watcher loop has its own thread
+        self._thread = threading.Thread(target=self.watcher.run, name='watch', daemon=True)
+        self._thread.start()
+        for w in (self.template_list, self.pattern_edit, self.settle_spin, self.skip_btn):
+            w.setEnabled(False)
+        self.start_btn.setText('Stop')
+        self._print(f"Watching {', '.join(self.watcher.dirs.values())}")
+        parent = self.parent()
+        if parent is not None and hasattr(parent, 'ensure_runs_panel'):
+            parent.ensure_runs_panel().show()
+
+    def stop(self):
+        if self.watcher is None:
+            return
+        self.watcher.stop()
+        self.watcher = None
+        if self._fs.directories():
+            self._fs.removePaths(self._fs.directories())
+        for w in (self.template_list, self.pattern_edit, self.settle_spin, self.skip_btn):
+            w.setEnabled(True)
+        self.start_btn.setText('Start')
+        self._print('Stopped (a running batch still finishes)')
+
+    def _update_paths(self):
+        paths = set(self.watcher.watch_paths()) - set(self._fs.directories())
+        if paths:
+            self._fs.addPaths(sorted(paths))
+
+    def _on_fs_change(self, path):
+        if self.watcher is not None:
+            self.watcher.poke()
+
+    def _on_watch_event(self, state, info):
+        if state == 'dirs':
+            if self.watcher is not None:
+                self._update_paths()
+        elif state == 'pending':
+            if info and self.watcher is not None:
+                self._print(f'{info} new file(s), waiting {self.settle_spin.value()} s for them to settle')
+        elif state == 'batch':
+            self._print(f"Batch {info['label']}: {info['files']} file(s)")
+        elif state == 'error':
+            self._print(f'Error: {info}')
+        else:
+            self._print(f"Batch {info['label']} {state}" + (f" (exit {info['returncode']})" if info['returncode'] is not None
+                                                          else f": {info.get('error')}")
+                        + (f", inputs kept in {info['dir']}" if info.get('dir') else ''))
+
+    def _on_finished(self, result):
+        if self.watcher is not None:
+            # the dialog is deleted on close: a batch still running must not report to it
+            self.watcher.on_event = lambda *a: None
+        self.stop()
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
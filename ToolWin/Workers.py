@@ -0,0 +1,110 @@
+# ------------------ Background workers ------------------
+from PySide6 import QtCore
+import functools
+import itertools
+
+
+class _Task(QtCore.QRunnable):
+    def __init__(self, req_id, fn, args, signal):
+        super().__init__()
+        self.req_id = req_id
+        self.fn = fn
+        self.args = args
+        self.signal = signal
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            result = e
+        self.signal.emit(self.req_id, result)
+
+
+class AsyncResolver(QtCore.QObject):
+    """Runs blocking lookups (stat, exists, icon thumbnails) in a thread pool.
+
+    Each request belongs to an owner widget and a tag; a new request for the same
+    (owner, tag) supersedes the previous one. Results are delivered on the GUI
+    thread through the `done` signal and dropped if the owner was cancelled or
+    destroyed in the meantime.
+    """
+    done = QtCore.Signal(int, object)
+
+    def __init__(self, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._ids = itertools.count(1)
+        self._pending = {}   # req_id -> (slot, task, callback)
+        self._slots = {}     # (owner id, tag) -> req_id
+        self._watched = set()
+        self.done.connect(self._on_done)
+
+    def submit(self, owner, tag, fn, args, callback):
+        oid = id(owner)
+        slot = (oid, tag)
+        self._cancel_req(self._slots.get(slot))
+        if oid not in self._watched:
+            self._watched.add(oid)
+            owner.destroyed.connect(functools.partial(self._owner_destroyed, oid))
+        req_id = next(self._ids)
+        task = _Task(req_id, fn, args, self.done)
+        task.setAutoDelete(False)
+        self._pending[req_id] = (slot, task, callback)
+        self._slots[slot] = req_id
+        self.pool.start(task)
+        return req_id
+
+    def cancel(self, owner, tag=None):
+        oid = id(owner)
+        for slot, req_id in list(self._slots.items()):
+            if slot[0] == oid and (tag is None or slot[1] == tag):
+                self._cancel_req(req_id)
+
+    def _owner_destroyed(self, oid, *args):
+        self._watched.discard(oid)
+        for slot, req_id in list(self._slots.items()):
+            if slot[0] == oid:
+                self._cancel_req(req_id)
+
+    def _cancel_req(self, req_id):
+        entry = self._pending.pop(req_id, None)
+        if entry is None:
+            return
+        slot, task, _ = entry
+        if self._slots.get(slot) == req_id:
+            del self._slots[slot]
+        # not started yet: drop it from the queue; running ones finish and are ignored
+        self.pool.tryTake(task)
+
+    def _on_done(self, req_id, result):
+        entry = self._pending.pop(req_id, None)
+        if entry is None:
+            return
+        slot, _, callback = entry
+        if self._slots.get(slot) == req_id:
+            del self._slots[slot]
+        callback(result)
+
+
+_resolver = None
+
+
+def resolver():
+    """Process-wide AsyncResolver (requires a QApplication)."""
+    global _resolver
+    if _resolver is None:
+        _resolver = AsyncResolver()
+    return _resolver
+
+
+_stager = None
+
+
+def stager():
+    """AsyncResolver for staging copies: they take minutes, so they get their own threads
+    and never hold up the icon and path lookups on resolver()."""
+    global _stager
+    if _stager is None:
+        _stager = AsyncResolver(max_threads=2)
+    return _stager
@@ -1,7 +1,87 @@
-from pathlib import Path
-
-APP_DIR = Path(__file__).parent
-CONFIG_FILE = APP_DIR / 'launcher_config.json'
-
-# Desired approximate tile width used to calculate number of columns
-DESIRED_TILE_WIDTH = 220
\ No newline at end of file
+from pathlib import Path
+
+APP_DIR = Path(__file__).parent
+CONFIG_FILE = APP_DIR / 'launcher_config.json'
+# Append-only edit journal, folded into CONFIG_FILE once it grows past this size
+JOURNAL_COMPACT_BYTES = 64 * 1024
+
+# Desired approximate tile width used to calculate number of columns
+DESIRED_TILE_WIDTH = 220
+
+# Persistent icon thumbnail cache (next to launcher_config.json)
+ICON_CACHE_DIR = APP_DIR / 'icon_cache'
+ICON_CACHE_MAX_BYTES = 32 * 1024 * 1024
+ICON_CACHE_MEM_ENTRIES = 1024
+
+# Default number of pipeline stages run concurrently
+PIPELINE_MAX_WORKERS = 4
+
+# Fan-out runs: concurrent items and extra attempts for an item that exits non-zero
+FANOUT_MAX_WORKERS = 4
+FANOUT_RETRIES = 1
+
+# Supervised runs: in-memory output tail per run, rotating log files on disk
+RUN_LOG_DIR = APP_DIR / 'run_logs'
+RUN_BUFFER_BYTES = 256 * 1024
+RUN_SPILL_BYTES = 64 * 1024 * 1024
+RUN_SPILL_BACKUPS = 3
+RUN_KEEP = 50
+# Run scheduler: share of cores, MB of RAM kept free, and disk busy share runs may use;
+# how often host load is sampled and how long a blocked job lets smaller ones overtake it
+SCHED_CPU_BUDGET = 0.9
+SCHED_MEM_RESERVE_MB = 512
+SCHED_IO_BUDGET = 1.0
+SCHED_INTERVAL = 1.0
+SCHED_MAX_WAIT = 30
+
+# Incremental runs: index of earlier runs and their outputs (next to launcher_config.json)
+RUN_CACHE_FILE = APP_DIR / 'run_cache.json'
+RUN_CACHE_MAX_ENTRIES = 500
+RUN_CACHE_MAX_AGE_DAYS = 30
+
+# Worker processes (hashing, timeline) are started fresh, never forked from the threaded GUI / CLI process
+WORKER_START_METHOD = 'spawn'
+
+# Evidence hashing: worker processes, read size per step, and digests cached by (path, size, mtime, inode)
+HASH_WORKERS = 4
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+HASH_CACHE_FILE = APP_DIR / 'hash_cache.json'
+HASH_CACHE_MAX_ENTRIES = 50000
+
+# Timeline merge: rows sorted in memory per run file, parsing processes, runs merged at once
+TIMELINE_CHUNK_ROWS = 200000
+TIMELINE_WORKERS = 4
+TIMELINE_MERGE_FANIN = 64
+
+# Local staging of evidence on slow storage (enabled per config: "staging": {"enabled": true, ...})
+STAGING_DIR = APP_DIR / 'staging'
+STAGING_WORKERS = 4
+STAGING_BLOCK_BYTES = 8 * 1024 * 1024
+STAGING_RANGE_BYTES = 64 * 1024 * 1024
+STAGING_MAX_BYTES = 50 * 1024 ** 3
+STAGING_MAX_AGE_DAYS = 7
+
+# Run history: SQLite database, /proc sampling interval, rows per write batch / max wait before writing
+HISTORY_DB = APP_DIR / 'history.sqlite3'
+HISTORY_SAMPLE_SECONDS = 0.5
+HISTORY_BATCH = 200
+HISTORY_FLUSH_SECONDS = 1.0
+HISTORY_MAX_AGE_DAYS = 365
+
+# Tracing (FCKCMD_TRACE=1 or Trace > Record Spans): recent spans kept for export
+TRACE_RING_SPANS = 20000
+
+# Spawn launched tools from a small helper process started with the GUI (POSIX only)
+LAUNCH_HELPER = True
+
+# Worker agents (python main.py agent): listen address and port, connect timeout, output/status poll interval
+AGENT_BIND = '127.0.0.1'
+AGENT_PORT = 7821
+AGENT_TIMEOUT = 5.0
+AGENT_POLL_SECONDS = 0.5
+
+# Watch mode: processed-files index, per-batch input directories, default settle window and poll interval
+WATCH_INDEX_FILE = APP_DIR / 'watch_index.json'
+WATCH_STAGING_DIR = APP_DIR / 'watch_batches'
+WATCH_SETTLE_SECONDS = 30
+WATCH_POLL_SECONDS = 5
@@ -1,44 +1,87 @@
-#!/usr/bin/env python3
-"""
-App Launcher (PySide6)
-
-Features implemented according to specification:
-- Grid of app icons; first tile is a large "+" button to add an app.
-- Clicking an app tile launches the app with arguments assembled from its arguments table (top->bottom).
-- Each app tile has a gear button to edit configuration for that app.
-- Add/Edit dialog supports:
-  1) Path to executable
-  2) Arguments table (name / value). Values may contain TEMPLATE_* tokens; tokens are replaced from global templates.
-  3) Order of arguments: supports drag-and-drop reordering of table rows and Up/Down buttons.
-  4) Live preview of the full command assembled from the table (bottom of dialog).
-  5) Save — writes configuration to JSON file (launcher_config.json next to script).
-  6) Dropdown of global templates (insert into value cell)
-  7) Icon: loaded from provided icon file (png/ico) or from executable using QFileIconProvider
-  8) Name field for the app
-  9) Checkbox: run as administrator
- 10) Checkbox: wrap substituted values in single quotes (per-app)
-- Left side button "Add Global Template" opens template manager (add/edit/remove keys and values). Keys by convention: uppercase and start with TEMPLATE_.
-- Configuration file stores JSON containing apps and templates.
-
-Adaptive UI change:
-- AppTile icons adapt to tile size. The grid is now responsive: number of columns is recalculated depending on available width so tiles wrap to next line when window is narrowed.
-
-Requirements: pip install PySide6
-
-"""
-
-from ToolWin import MainWindow
-from PySide6 import QtWidgets
-import sys
-
-# ------------------ Main ------------------
-
-def main():
-    app = QtWidgets.QApplication(sys.argv)
-    mw = MainWindow.MainWindow()
-    mw.show()
-    sys.exit(app.exec())
-
-
-if __name__ == '__main__':
-    main()
+#!/usr/bin/env python3
+"""
+App Launcher (PySide6)
+
+Features implemented according to specification:
+- Grid of app icons; first tile is a large "+" button to add an app.
+- Clicking an app tile launches the app with arguments assembled from its arguments table (top->bottom).
+- Each app tile has a gear button to edit configuration for that app.
+- Add/Edit dialog supports:
+  1) Path to executable
+  2) Arguments table (name / value). Values may contain TEMPLATE_* tokens; tokens are replaced from global templates.
+  3) Order of arguments: supports drag-and-drop reordering of table rows and Up/Down buttons.
+  4) Live preview of the full command assembled from the table (bottom of dialog).
+  5) Save — writes configuration to JSON file (launcher_config.json next to script).
+  6) Dropdown of global templates (insert into value cell)
+  7) Icon: loaded from provided icon file (png/ico) or from executable using QFileIconProvider
+  8) Name field for the app
+  9) Checkbox: run as administrator
+ 10) Checkbox: wrap substituted values in single quotes (per-app)
+ 11) Execution mode (per-app): auto, direct argv exec (no shell), through a shell (powershell/cmd/sh), elevated
+- Left side button "Add Global Template" opens template manager (add/edit/remove keys and values). Keys by convention: uppercase and start with TEMPLATE_.
+- Configuration file stores JSON containing apps and templates.
+
+Adaptive UI change:
+- AppTile icons adapt to tile size. The grid is now responsive: number of columns is recalculated depending on available width so tiles wrap to next line when window is narrowed.
+
+Headless mode (no Qt import):
+  python main.py list
+  python main.py show-command <app-name-or-id> [--set TEMPLATE_X=value ...]
+  python main.py run <app-name-or-id> [--set TEMPLATE_X=value ...] [--fanout TEMPLATE_X=glob ...] [--force]
+  python main.py pipeline <pipeline-name-or-id> [--workers N] [--force]
+  python main.py hash [TEMPLATE_X ...] [--out DIR] [--workers N]
+  python main.py timeline [--app <app-name-or-id> ...] [--input CSV ...] [--out FILE]
+  python main.py stage [TEMPLATE_X ...]
+  python main.py history [--app <app-name-or-id>] [--days N] [--recent N]
+  python main.py agent [--bind ADDR] [--port N] [--slots N] [--token SECRET]   (worker node)
+  python main.py nodes [--jobs]   (run ... --remote [--node NAME] dispatches to the configured nodes)
+  python main.py watch <app-or-pipeline-name-or-id> [--template TEMPLATE_X ...] [--pattern GLOB ...] [--settle S] [--once]
+
+Startup profiling: python main.py --profile-startup  (prints import-time and first-paint breakdown to stderr)
+
+Requirements: pip install PySide6
+
+"""
+
+import time
+_T0 = time.perf_counter()
+import sys
+
+# ------------------ Main ------------------
+
+CLI_COMMANDS = ('run', 'list', 'show-command', 'pipeline', 'hash', 'timeline', 'stage', 'history', 'agent', 'nodes', 'watch')
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        # headless: never import Qt
+        from ToolWin import Cli
+        sys.exit(Cli.main(sys.argv[1:]))
+    prof = None
+    mark = lambda label: None
+    if '--profile-startup' in sys.argv:
+        sys.argv.remove('--profile-startup')
+        from ToolWin.StartupProfile import StartupProfiler
+        prof = StartupProfiler(_T0)
+        prof.install()
+        mark = prof.mark
+    from PySide6 import QtWidgets
+    mark('import PySide6')
+    from ToolWin import MainWindow
+    mark('import MainWindow')
+    app = QtWidgets.QApplication(sys.argv)
+    mark('QApplication')
+    mw = MainWindow.MainWindow()
+    mark('MainWindow()')
+    if prof:
+        prof.watch(mw)
+    mw.show()
+    sys.exit(app.exec())
+
+
+if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # hashing and timeline workers are spawned; a frozen build must let them start here
+        import multiprocessing
+        multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from ToolWin.ConfigStore import ConfigStore
+from ToolWin.Model import ConfigError
+
+
+def app(app_id, name=None):
+    return {'id': app_id, 'name': name or app_id, 'path': f'{app_id}.exe', 'args': []}
+
+
+class StoreCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.path = os.path.join(self.dir, 'launcher_config.json')
+        self.journal = os.path.join(self.dir, 'launcher_config.journal')
+
+    def write_config(self, cfg):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(cfg, f)
+
+    def read_config(self):
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def open_store(self, compact_bytes=1 << 20):
+        store = ConfigStore(self.path, compact_bytes=compact_bytes)
+        store.refresh()
+        self.addCleanup(lambda: store._compactor and store._compactor.join())
+        return store
+
+    def ids(self, store):
+        return [a.id for a in store.cfg['apps']]
+
+
+class Journal(StoreCase):
+    def test_edits_are_journaled_and_replayed(self):
+        self.write_config({'apps': [app('a')], 'templates': {'TEMPLATE_X': '1'}, 'pipelines': []})
+        store = self.open_store()
+        store.add_app(app('b'))
+        store.update_app(app('a', 'renamed'))
+        store.set_template('TEMPLATE_Y', '2')
+        store.delete_template('TEMPLATE_X')
+        self.assertTrue(os.path.exists(self.journal))
+        self.assertEqual(self.read_config()['templates'], {'TEMPLATE_X': '1'})
+
+        fresh = ConfigStore(self.path, compact_bytes=1 << 20)
+        self.addCleanup(lambda: fresh._compactor and fresh._compactor.join())
+        self.assertTrue(fresh.refresh())
+        self.assertEqual(self.ids(fresh), ['a', 'b'])
+        self.assertEqual(fresh.cfg['apps'].by_id('a').name, 'renamed')
+        self.assertEqual(dict(fresh.cfg['templates']), {'TEMPLATE_Y': '2'})
+        self.assertEqual(fresh.cfg['pipelines'], [])
+
+    def test_torn_last_entry_is_cut_off(self):
+        self.write_config({'apps': [app('a')]})
+        store = self.open_store()
+        store.add_app(app('b'))
+        with open(self.journal, 'ab') as f:
+            f.write(b'{"op": "add_app", "app": {"id": "c"')
+        fresh = ConfigStore(self.path, compact_bytes=1 << 20)
+        fresh._replay(fresh.cfg)
+        self.assertEqual(self.ids(fresh), ['b'])
+        with open(self.journal, 'rb') as f:
+            self.assertTrue(f.read().endswith(b'}\n'))
+
+    def test_invalid_entry_is_skipped(self):
+        self.write_config({'apps': [app('a')]})
+        with open(self.journal, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'add_app', 'app': {'id': 'bad', 'args': 'x'}}) + '\n')
+            f.write(json.dumps({'op': 'delete_app', 'id': 'a'}) + '\n')
+        store = ConfigStore(self.path, compact_bytes=1 << 20)
+        self.assertEqual(store._replay(store.cfg), 2)
+        self.assertEqual(self.ids(store), [])
+
+    def test_unchanged_files_are_not_reread(self):
+        self.write_config({'apps': [app('a')]})
+        store = self.open_store()
+        version = store.version
+        self.assertFalse(store.refresh())
+        self.assertEqual(store.version, version)
+
+
+class Compaction(StoreCase):
+    def test_compact_folds_journal_into_config(self):
+        self.write_config({'apps': [app('a')], 'templates': {}})
+        store = self.open_store()
+        store.add_app(app('b'))
+        store.delete_app('a')
+        store.set_template('TEMPLATE_Y', '2')
+        store.compact()
+        self.assertFalse(os.path.exists(self.journal))
+        saved = self.read_config()
+        self.assertEqual([a['id'] for a in saved['apps']], ['b'])
+        self.assertEqual(saved['templates'], {'TEMPLATE_Y': '2'})
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    def test_large_journal_compacts_in_background(self):
+        self.write_config({'apps': []})
+        store = self.open_store(compact_bytes=200)
+        for n in range(5):
+            store.add_app(app(f'app{n}'))
+        store._compactor.join()
+        self.assertIsNone(store.compact_error)
+        store.close()
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual([a['id'] for a in self.read_config()['apps']], [f'app{n}' for n in range(5)])
+
+    def test_journal_left_by_a_crash_is_compacted_on_load(self):
+        self.write_config({'apps': [app('a')]})
+        with open(self.journal, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'add_app', 'app': app('b')}) + '\n')
+        store = self.open_store()
+        store._compactor.join()
+        self.assertEqual([a['id'] for a in self.read_config()['apps']], ['a', 'b'])
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual(self.ids(store), ['a', 'b'])
+
+    def test_save_replaces_config_and_drops_journal(self):
+        self.write_config({'apps': [app('a')]})
+        store = self.open_store()
+        store.add_app(app('b'))
+        store.save({'apps': [app('c')], 'templates': {}})
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual([a['id'] for a in self.read_config()['apps']], ['c'])
+        self.assertEqual(self.ids(store), ['c'])
+
+
+class LoadErrors(StoreCase):
+    def test_skipped_entries_block_writes(self):
+        self.write_config({'apps': [app('a'), {'id': 'bad', 'run_as_admin': 'maybe'}]})
+        store = self.open_store()
+        self.assertIsInstance(store.load_error, ConfigError)
+        self.assertIn('1 entry skipped', str(store.load_error))
+        self.assertEqual(self.ids(store), ['a'])
+        self.assertTrue(os.path.exists(self.path + '.corrupt'))
+        with self.assertRaises(ConfigError):
+            store.add_app(app('b'))
+        store.compact()
+        self.assertEqual(len(self.read_config()['apps']), 2)
+
+    def test_unreadable_file_keeps_a_copy(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"apps": [')
+        store = self.open_store()
+        self.assertIsNotNone(store.load_error)
+        self.assertEqual(self.ids(store), [])
+        with open(self.path + '.corrupt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"apps": [')
+        with self.assertRaises(ConfigError):
+            store.set_template('TEMPLATE_X', '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ToolWin import ExecMode
+from ToolWin.ExecMode import app_plan, expand_env, resolve_mode
+from ToolWin.Model import load_model
+from ToolWin.TemplateEngine import TemplateEngine
+
+SAMPLE_CONFIG = Path(__file__).resolve().parent.parent / 'launcher_config.json'
+
+
+class SampleConfigOnWindows(unittest.TestCase):
+    """The shipped launcher_config.json writes its paths as C:/Users/$Env:UserName/..."""
+
+    def setUp(self):
+        with open(SAMPLE_CONFIG, encoding='utf-8') as f:
+            self.cfg = load_model(json.load(f))
+        patches = [mock.patch.object(ExecMode.os, 'name', 'nt'),
+                   mock.patch.dict(os.environ, {'USERNAME': 'analyst'})]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def plan(self, name, batch=False):
+        app = next(a for a in self.cfg['apps'] if a.name == name)
+        parts = TemplateEngine().build(app, self.cfg['templates'])[0]
+        return resolve_mode(app), app_plan(app, parts, batch=batch)
+
+    def test_elevated_apps_get_expanded_paths(self):
+        for name in ('MFT Parse', 'Evtx Parse'):
+            (mode, shell), p = self.plan(name)
+            self.assertEqual((mode, shell), ('elevated', 'powershell'))
+            params = p['elevate'][1]
+            self.assertNotIn('$Env:', params)
+            self.assertIn("& 'C:/Users/analyst/Desktop/tools/EricZimmermanTool/", params)
+        # the file really is called $MFT: kept literal inside the verbatim quotes
+        self.assertIn("'C:/Users/analyst/Desktop/path_to/C/$MFT'", self.plan('MFT Parse')[1]['elevate'][1])
+
+    def test_direct_app_gets_expanded_argv(self):
+        (mode, shell), p = self.plan('Hayabusa')
+        self.assertEqual(mode, 'direct')
+        self.assertEqual(p['argv'][0], 'C:/Users/analyst/Desktop/tools/hayabusa/hayabusa-3.5.0-win-x64.exe')
+        self.assertIn('C:/Users/analyst/Desktop/path_to/C/Windows/System32/winevt/logs', p['argv'])
+        self.assertFalse(any('$Env:' in a for a in p['argv']))
+
+    def test_batch_runs_of_elevated_apps_are_expanded(self):
+        p = self.plan('MFT Parse', batch=True)[1]
+        self.assertEqual(p['argv'][:3], ['C:/Users/analyst/Desktop/tools/EricZimmermanTool/MFTECmd.exe', '-f',
+                                         'C:/Users/analyst/Desktop/path_to/C/$MFT'])
+
+
+class ExpandEnv(unittest.TestCase):
+    def test_forms(self):
+        with mock.patch.dict(os.environ, {'TOOLS': 'D:/t'}), mock.patch.object(ExecMode.os, 'name', 'nt'):
+            self.assertEqual(expand_env('$env:TOOLS/a'), 'D:/t/a')
+            self.assertEqual(expand_env('${Env:tools}/a'), 'D:/t/a')
+            self.assertEqual(expand_env('%TOOLS%/a %UNSET_X%'), 'D:/t/a %UNSET_X%')
+            self.assertEqual(expand_env('$Env:UNSET_X/a'), '/a')
+
+    def test_percent_is_left_alone_off_windows(self):
+        with mock.patch.dict(os.environ, {'Y': 'x'}), mock.patch.object(ExecMode.os, 'name', 'posix'):
+            self.assertEqual(expand_env('%Y%m%d'), '%Y%m%d')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+
+from ToolWin.Model import AppList, AppSpec, ConfigError, TemplateSet, json_default, load_model
+
+
+GOOD = {'id': 'a', 'name': 'A', 'path': 'a.exe', 'args': [{'name': '-f', 'value': 'TEMPLATE_X'}]}
+
+
+class LoadModel(unittest.TestCase):
+    def test_typed_records_and_other_keys_kept(self):
+        cfg = load_model({'apps': [GOOD], 'templates': {'TEMPLATE_X': 'x'}, 'pipelines': [{'id': 'p'}]})
+        self.assertIsInstance(cfg['apps'], AppList)
+        self.assertIsInstance(cfg['apps'][0], AppSpec)
+        self.assertIsInstance(cfg['templates'], TemplateSet)
+        self.assertEqual(cfg['pipelines'], [{'id': 'p'}])
+        self.assertEqual(json.loads(json.dumps(cfg['apps'][0], default=json_default))['args'], GOOD['args'])
+
+    def test_loose_values_are_coerced(self):
+        app = load_model({'apps': [{'name': 'A', 'path': 7, 'run_as_admin': ' Yes ', 'quote_values': 'off',
+                                    'incremental': 1}]})['apps'][0]
+        self.assertEqual((app.path, app.run_as_admin, app.quote_values, app.incremental), ('7', True, False, True))
+        self.assertEqual(load_model({'templates': {'TEMPLATE_N': 3}})['templates']['TEMPLATE_N'], '3')
+
+    def test_bad_entries_skipped_and_reported(self):
+        problems = []
+        apps = [GOOD, {'name': 'B', 'run_as_admin': 'maybe'}, 'C', {'name': 'D', 'args': {'-f': 'x'}}]
+        cfg = load_model({'apps': apps,
+                          'templates': {'TEMPLATE_X': 'x', 'TEMPLATE_Y': ['y']}}, problems)
+        self.assertEqual([a.id for a in cfg['apps']], ['a'])
+        self.assertEqual(dict(cfg['templates']), {'TEMPLATE_X': 'x'})
+        self.assertEqual(len(problems), 4)
+        self.assertIn('apps[1].run_as_admin', problems[0])
+        self.assertIn('apps[2]', problems[1])
+        self.assertIn('apps[3].args', problems[2])
+        self.assertIn('templates.TEMPLATE_Y', problems[3])
+
+    def test_without_problems_list_first_error_raises(self):
+        with self.assertRaisesRegex(ConfigError, r'apps\[1\]\.run_as_admin'):
+            load_model({'apps': [GOOD, {'run_as_admin': 'maybe'}]})
+        with self.assertRaisesRegex(ConfigError, 'templates.TEMPLATE_Y'):
+            load_model({'templates': {'TEMPLATE_Y': {'nested': 1}}})
+
+    def test_wrong_top_level_shapes_always_raise(self):
+        for cfg in ([], {'apps': {'a': GOOD}}, {'templates': ['TEMPLATE_X']}):
+            with self.assertRaises(ConfigError):
+                load_model(cfg, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
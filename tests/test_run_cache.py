@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from ToolWin.Model import load_model
+from ToolWin.RunCache import RunCache, output_paths
+
+
+class RunCacheCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.cache = RunCache(os.path.join(self.dir, 'run_cache.json'))
+        self.case = os.path.join(self.dir, 'case1')
+        os.makedirs(self.case)
+        self.input = os.path.join(self.case, 'in.txt')
+        self.write(self.input, 'first')
+        env = mock.patch.dict(os.environ, {'CASE': 'case1'})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def write(self, path, text, mtime=None):
+        with open(path, 'w') as f:
+            f.write(text)
+        # distinct mtimes even on coarse filesystem clocks
+        mtime = mtime or time.time() + len(text)
+        os.utime(path, (mtime, mtime))
+
+
+class Key(RunCacheCase):
+    def assert_tracks_input(self, arg):
+        before = self.cache.key(['tool', arg])
+        self.assertEqual(before, self.cache.key(['tool', arg]))
+        self.write(self.input, 'second, longer', mtime=time.time() + 100)
+        self.assertNotEqual(before, self.cache.key(['tool', arg]))
+
+    def test_plain_path(self):
+        self.assert_tracks_input(self.input)
+
+    def test_powershell_env_path(self):
+        self.assert_tracks_input(os.path.join(self.dir, '$Env:CASE', 'in.txt'))
+
+    def test_quote_values_argument(self):
+        self.assert_tracks_input("'" + os.path.join(self.dir, '$Env:CASE', 'in.txt') + "'")
+
+    def test_directory_input(self):
+        self.assert_tracks_input(self.case)
+
+    def test_content_hash_ignores_touch(self):
+        key = self.cache.key(['tool', self.input], content_hash=True)
+        os.utime(self.input, (time.time() + 500, time.time() + 500))
+        self.assertEqual(key, self.cache.key(['tool', self.input], content_hash=True))
+
+    def test_outputs_below_input_are_not_inputs(self):
+        out = os.path.join(self.case, 'out')
+        os.makedirs(out)
+        key = self.cache.key(['tool', self.case], [out])
+        self.write(os.path.join(out, 'result.csv'), 'rows')
+        self.assertEqual(key, self.cache.key(['tool', self.case], [out]))
+
+
+class Lookup(RunCacheCase):
+    def test_entry_lives_while_outputs_are_unchanged(self):
+        out = os.path.join(self.dir, 'result.csv')
+        self.write(out, 'rows')
+        st = os.stat(out)
+        self.cache.record('k', ['tool'], [(out, st.st_size, st.st_mtime_ns)])
+        self.assertIsNotNone(self.cache.lookup('k'))
+        self.write(out, 'other rows')
+        self.assertIsNone(self.cache.lookup('k'))
+        self.assertIsNone(self.cache.lookup('k'))
+
+    def test_missing_output_drops_entry(self):
+        self.cache.record('k', ['tool'], [(os.path.join(self.dir, 'gone.csv'), 1, 1)])
+        self.assertIsNone(self.cache.lookup('k'))
+
+    def test_unknown_key(self):
+        self.assertIsNone(self.cache.lookup('nope'))
+
+
+class OutputPaths(RunCacheCase):
+    def test_env_output_template_is_expanded(self):
+        app = {'name': 'A', 'path': 'tool', 'args': [{'name': '--csv', 'value': 'TEMPLATE_OUTPUT_DIR'}]}
+        cfg = load_model({'apps': [app],
+                          'templates': {'TEMPLATE_OUTPUT_DIR': os.path.join(self.dir, '$Env:CASE', 'out')}})
+        self.assertEqual(output_paths(cfg['apps'][0], cfg), [os.path.join(self.case, 'out')])
+
+
+if __name__ == '__main__':
+    unittest.main()
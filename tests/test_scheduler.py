@@ -0,0 +1,112 @@
+import time
+import unittest
+
+from ToolWin.Scheduler import Scheduler, cost_of
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.launched = []
+
+    def subscribe(self, fn):
+        pass
+
+    def launch(self, run, cwd=None, env=None):
+        self.launched.append(run)
+
+
+class FakeMonitor:
+    def __init__(self, rss=0.0):
+        self.rss = rss
+
+    def rss_mb(self, pid):
+        return self.rss
+
+
+class FakeRun:
+    def __init__(self, run_id):
+        self.id = run_id
+        self.pid = 1000 + run_id
+
+
+def sample(cores=8, busy=0.0, mem_avail_mb=16384, disk_util=0.0):
+    return {'cores': cores, 'busy': busy, 'mem_avail_mb': mem_avail_mb, 'disk_util': disk_util}
+
+
+class SchedulerCase(unittest.TestCase):
+    def setUp(self):
+        self.sup = FakeSupervisor()
+        self.monitor = FakeMonitor()
+        self.sched = Scheduler(self.sup, self.monitor, cpu_budget=1.0, mem_reserve_mb=1024, io_budget=1.0, max_wait=60)
+
+    def run_with(self, run_id, **cost):
+        self.sched._running[run_id] = (FakeRun(run_id), cost_of(cost))
+
+
+class CostOf(unittest.TestCase):
+    def test_profile_defaults_and_overrides(self):
+        self.assertEqual(cost_of(None), {'cpu': 1.0, 'io': 0.3, 'rss_mb': 512, 'priority': 0})
+        self.assertEqual(cost_of({'profile': 'io', 'cpu': '2', 'priority': '5'}),
+                         {'cpu': 2.0, 'io': 0.8, 'rss_mb': 512, 'priority': 5})
+        self.assertEqual(cost_of({'profile': 'unknown'})['cpu'], 1.0)
+
+
+class Fits(SchedulerCase):
+    def test_anything_fits_an_idle_scheduler(self):
+        self.assertTrue(self.sched.fits(cost_of({'cpu': 64, 'rss_mb': 10 ** 6, 'io': 5}), sample()))
+
+    def test_cpu_budget(self):
+        self.run_with(1, cpu=6)
+        self.assertTrue(self.sched.fits(cost_of({'cpu': 2, 'io': 0}), sample()))
+        self.assertFalse(self.sched.fits(cost_of({'cpu': 3, 'io': 0}), sample()))
+
+    def test_measured_load_counts_when_higher_than_reserved(self):
+        self.run_with(1, cpu=1, io=0)
+        self.assertFalse(self.sched.fits(cost_of({'cpu': 2, 'io': 0}), sample(busy=7.0)))
+
+    def test_memory_keeps_reserve_and_unspent_rss(self):
+        self.run_with(1, rss_mb=4096, io=0, cpu=0)
+        self.monitor.rss = 1024  # 3072 MB of the running job's peak still to come
+        s = sample(mem_avail_mb=8192)
+        self.assertTrue(self.sched.fits(cost_of({'rss_mb': 4096, 'io': 0, 'cpu': 0}), s))
+        self.assertFalse(self.sched.fits(cost_of({'rss_mb': 4097, 'io': 0, 'cpu': 0}), s))
+
+    def test_unknown_memory_is_not_a_limit(self):
+        self.run_with(1, cpu=0, io=0)
+        self.assertTrue(self.sched.fits(cost_of({'rss_mb': 10 ** 6, 'cpu': 0, 'io': 0}), sample(mem_avail_mb=None)))
+
+    def test_io_budget(self):
+        self.run_with(1, profile='io')
+        self.assertFalse(self.sched.fits(cost_of({'profile': 'io'}), sample()))
+        self.assertTrue(self.sched.fits(cost_of({'profile': 'light'}), sample()))
+        self.assertFalse(self.sched.fits(cost_of({'profile': 'light'}), sample(disk_util=0.95)))
+
+
+class Admit(SchedulerCase):
+    def queue(self, run_id, queued_at=None, **cost):
+        cost = cost_of(cost)
+        run = FakeRun(run_id)
+        self.sched._queue.append((-cost['priority'], run_id, queued_at or time.monotonic(), run, cost, None, None))
+        return run
+
+    def admit(self, s):
+        self.monitor.sample = lambda: s
+        self.sched._admit()
+        return [r.id for r in self.sup.launched]
+
+    def test_priority_order_and_overtaking(self):
+        self.run_with(99, cpu=6, io=0)
+        self.queue(1, cpu=4, io=0, priority=5)
+        self.queue(2, cpu=1, io=0)
+        self.assertEqual(self.admit(sample()), [2])
+        self.assertEqual([e[3].id for e in self.sched._queue], [1])
+
+    def test_no_overtaking_after_max_wait(self):
+        self.run_with(99, cpu=6, io=0)
+        self.queue(1, queued_at=time.monotonic() - 120, cpu=4, io=0, priority=5)
+        self.queue(2, cpu=1, io=0)
+        self.assertEqual(self.admit(sample()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from ToolWin.Timeline import COLUMNS, detect, merge_runs, normalize_time, sort_runs
+
+
+class NormalizeTime(unittest.TestCase):
+    def test_utc_forms(self):
+        self.assertEqual(normalize_time('2024-03-01 12:34:56'), '2024-03-01 12:34:56.0000000')
+        self.assertEqual(normalize_time('2024/03/01T12:34:56.123Z'), '2024-03-01 12:34:56.1230000')
+        self.assertEqual(normalize_time(' 2024-03-01 12:34:56,123456789 +00:00 '), '2024-03-01 12:34:56.1234567')
+
+    def test_offset_is_converted_to_utc(self):
+        self.assertEqual(normalize_time('2024-03-01T01:00:00.5+02:00'), '2024-02-29 23:00:00.5000000')
+        self.assertEqual(normalize_time('2024-12-31 23:30:00-0100'), '2025-01-01 00:30:00.0000000')
+
+    def test_unparseable(self):
+        for value in ('', 'yesterday', '2024-03-01', '01/03/2024 12:00:00', '2024-02-30 00:00:00+01:00'):
+            self.assertIsNone(normalize_time(value), value)
+
+
+class Detect(unittest.TestCase):
+    def test_profiles(self):
+        header = ['EntryNumber', 'ParentPath', 'FileName', 'Created0x10', 'LastModified0x10']
+        self.assertEqual(detect(header), ('MFT', ['Created0x10', 'LastModified0x10'], ['ParentPath', 'FileName']))
+        self.assertEqual(detect(['TimeCreated', 'EventId', 'Channel'])[:2], ('EVTX', ['TimeCreated']))
+        self.assertEqual(detect(['Timestamp', 'RuleTitle', 'Level'])[:2], ('Hayabusa', ['Timestamp']))
+
+    def test_app_time_columns_override_profile(self):
+        header = ['EntryNumber', 'ParentPath', 'Created0x10', 'LastAccess0x10']
+        self.assertEqual(detect(header, ['LastAccess0x10', 'Missing'])[1], ['LastAccess0x10'])
+
+    def test_generic_csv_uses_first_time_column(self):
+        self.assertEqual(detect(['Host', 'EventDate', 'LastTime', 'Msg']),
+                         (None, ['EventDate'], ['Host', 'LastTime', 'Msg']))
+        self.assertEqual(detect(['Host', 'Seen', 'Msg'], ['Seen'])[1:], (['Seen'], ['Host', 'Msg']))
+
+
+class Merge(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+
+    def write_csv(self, name, rows):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(rows)
+        return path
+
+    def read_out(self, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def test_sort_runs_chunks_and_counts_skipped_rows(self):
+        path = self.write_csv('events.csv', [['TimeCreated', 'EventId', 'Channel']] +
+                              [[f'2024-01-01 00:00:{s:02d}', '4624', 'Security'] for s in (5, 1, 3, 2, 4)] +
+                              [['not a time', '1', 'System']])
+        runs, events, skipped = sort_runs(path, self.dir, 'run000', chunk_rows=2)
+        self.assertEqual((len(runs), events, skipped), (3, 5, 1))
+        first = self.read_out(runs[0])
+        self.assertEqual([r[0] for r in first], ['2024-01-01 00:00:01.0000000', '2024-01-01 00:00:05.0000000'])
+        self.assertEqual(first[0][1:4], ['EVTX', 'TimeCreated', 'EventId=4624 | Channel=Security'])
+        self.assertEqual(first[0][5], '3')
+
+    def test_merge_runs_multi_pass(self):
+        runs = []
+        for n in range(7):
+            path = self.write_csv(f'events{n}.csv', [['Time', 'Msg']] +
+                                  [[f'2024-01-01 00:{m:02d}:{n:02d}', f'e{n}'] for m in range(3)])
+            runs += sort_runs(path, self.dir, f'run{n:03d}', chunk_rows=2)[0]
+        out = os.path.join(self.dir, 'timeline.csv')
+        self.assertEqual(merge_runs(runs, out, self.dir, fanin=3), 21)
+        rows = self.read_out(out)
+        self.assertEqual(rows[0], COLUMNS)
+        times = [r[0] for r in rows[1:]]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(len(set(times)), 21)
+        self.assertFalse([r for r in runs if os.path.exists(r)])
+
+
+if __name__ == '__main__':
+    unittest.main()